@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Stand-in for the HCC CLI miner: prints miner-like progress output at a configurable rate.
+
+It accepts (and ignores) the real miner's flags, so it can be launched through build_miner_command().
+Its behaviour comes from environment variables:
+
+    FAKE_MINER_RATE         progress lines per second (default 10, 0 = as fast as possible)
+    FAKE_MINER_PATTERN      lines | cr | ansi | mixed (default lines)
+    FAKE_MINER_LINES        stop after this many progress lines (default 0 = run until stopped)
+    FAKE_MINER_SOLVE_EVERY  a solution line every N progress lines (default 50, 0 = never)
+    FAKE_MINER_STUBBORN     1 = ignore SIGTERM, so the stop has to escalate to SIGKILL
+"""
+import os
+import signal
+import sys
+import time
+
+
+def progress_line(i, pattern):
+    rate = 1000 + (i * 37) % 500
+    if pattern == 'cr':
+        return f"\rHashrate: {rate} H/s  nonces: {i * 1000}"
+    if pattern == 'ansi':
+        return f"\x1b[32mHashrate:\x1b[0m \x1b[1m{rate} H/s\x1b[0m  nonces: {i * 1000}\n"
+    if pattern == 'mixed':
+        return progress_line(i, ('lines', 'cr', 'ansi')[i % 3])
+    return f"Hashrate: {rate} H/s  nonces: {i * 1000}\n"
+
+
+def main():
+    rate = float(os.environ.get('FAKE_MINER_RATE', '10'))
+    pattern = os.environ.get('FAKE_MINER_PATTERN', 'lines')
+    limit = int(os.environ.get('FAKE_MINER_LINES', '0'))
+    solve_every = int(os.environ.get('FAKE_MINER_SOLVE_EVERY', '50'))
+    if os.environ.get('FAKE_MINER_STUBBORN') == '1' and hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    out = sys.stdout
+    out.write(f"HCC fake miner starting: {' '.join(sys.argv[1:])}\n")
+    out.flush()
+    interval = 1.0 / rate if rate > 0 else 0
+    start = time.monotonic()
+    i = 0
+    while not limit or i < limit:
+        i += 1
+        out.write(progress_line(i, pattern))
+        if solve_every and i % solve_every == 0:
+            out.write(f"\nSolution found in {1 + i % 7}.0s\nSubmission accepted\n")
+        if interval:
+            out.flush()
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    out.write("\nfake miner done\n")
+    out.flush()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
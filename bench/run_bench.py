@@ -0,0 +1,320 @@
+"""Benchmarks for the miner output pipeline, the log view, downloads and start/stop.
+
+Each scenario drives the real code paths (MinerInstance.execute_command, drain_log_into /
+update_output_textbox's insert, ensure_latest_miner, MinerInstance.stop) against bench/fake_miner.py
+and bench/stub_server.py, so nothing needs a real miner, faucet or GitHub:
+
+    python bench/run_bench.py                       # all scenarios
+    python bench/run_bench.py --only throughput,download --quick
+    python bench/run_bench.py --json after.json --baseline before.json
+
+With --baseline, a metric more than --tolerance (default 20%) worse than the baseline counts as a
+regression and the exit code is 1. Everything is written to a temporary app data folder.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+# Keep downloads, caches and logs of the benchmark out of the real app data folder.
+_data_dir = tempfile.mkdtemp(prefix='hcc-bench-')
+os.environ['XDG_DATA_HOME'] = os.environ['LOCALAPPDATA'] = _data_dir
+if sys.platform == 'darwin':
+    os.environ['HOME'] = _data_dir
+
+import hcc_core  # noqa: E402
+from hcc_core import LogBuffer, MinerInstance, MinerTelemetry, SessionLog, profile_settings  # noqa: E402
+from fake_miner import progress_line  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def fake_miner_exe():
+    """An executable that runs fake_miner.py with this Python (the miner command has no room for an interpreter)."""
+    script = os.path.join(BENCH_DIR, 'fake_miner.py')
+    if os.name == 'nt':
+        path = os.path.join(_data_dir, 'fake_miner.cmd')
+        body = f'@"{sys.executable}" "{script}" %*\r\n'
+    else:
+        path = os.path.join(_data_dir, 'fake_miner.sh')
+        body = f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n'
+    with open(path, 'w') as file:
+        file.write(body)
+    os.chmod(path, 0o755)
+    return path
+
+
+def miner_instance(log, api_url='', telemetry=None, **env):
+    """A MinerInstance running the fake miner, configured through FAKE_MINER_* variables."""
+    for key, value in env.items():
+        os.environ[f'FAKE_MINER_{key.upper()}'] = str(value)
+    settings = profile_settings({'miner_path': fake_miner_exe(), 'api_url': api_url, 'private_key': 'bench',
+                                 'auto_restart': False})
+    return MinerInstance('bench', settings, log=log, telemetry=telemetry)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def drain_loop(log, stop, interval, counts):
+    """Drain a LogBuffer every interval seconds like the log view does, counting lines and drops."""
+    while True:
+        finished = stop.wait(interval)
+        lines, dropped = log.drain()
+        counts['lines'] += len(lines)
+        counts['dropped'] += dropped
+        if finished:
+            return
+
+
+def bench_throughput(args):
+    """Lines per second through execute_command's reader (split, telemetry, LogBuffer) with a 100 ms drain."""
+    total = 50_000 if args.quick else 300_000
+    log = LogBuffer(hcc_core.DEFAULT_LOG_MAX_LINES)
+    counts = {'lines': 0, 'dropped': 0}
+    stop = threading.Event()
+    drainer = threading.Thread(target=drain_loop, args=(log, stop, 0.1, counts))
+    instance = miner_instance(log, rate=0, pattern='mixed', lines=total, solve_every=1000)
+    drainer.start()
+    started = time.perf_counter()
+    instance.start()
+    instance._thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    drainer.join()
+    produced = counts['lines'] + counts['dropped']
+    return {
+        'throughput_lines_per_s': (produced / elapsed, 'lines/s', 'higher'),
+        'throughput_dropped_pct': (100.0 * counts['dropped'] / max(produced, 1), '%', 'lower'),
+    }
+
+
+def bench_ui_lag(args):
+    """Tk event-loop lag while the log view drains a fast miner (needs a display)."""
+    import tkinter as tk
+    import hcc_gui_miner as gui
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {'skipped': f"no display ({e})"}
+    root.geometry('900x500')
+    text = tk.Text(root, bg='black', fg='white')
+    text.pack(fill='both', expand=True)
+    gui.configure_log_tags(text)
+    log = LogBuffer(hcc_core.DEFAULT_LOG_MAX_LINES)
+    seconds = 5 if args.quick else 15
+    instance = miner_instance(log, rate=2000, pattern='mixed', lines=2000 * seconds)
+    lags, drains = [], []
+    tick_ms = 10
+
+    def _tick(expected):
+        now = time.perf_counter()
+        lags.append(max(0.0, now - expected) * 1000)
+        if instance.running() or instance.process is None:
+            root.after(tick_ms, _tick, time.perf_counter() + tick_ms / 1000)
+        else:
+            root.quit()
+
+    def _drain():
+        started = time.perf_counter()
+        gui.drain_log_into(text, log, hcc_core.DEFAULT_LOG_MAX_LINES)
+        drains.append((time.perf_counter() - started) * 1000)
+        root.after(gui.LOG_POLL_MS, _drain)
+
+    instance.start()
+    root.after(tick_ms, _tick, time.perf_counter() + tick_ms / 1000)
+    root.after(gui.LOG_POLL_MS, _drain)
+    root.mainloop()
+    root.destroy()
+    return {
+        'ui_lag_p50_ms': (percentile(lags, 0.5), 'ms', 'lower'),
+        'ui_lag_p95_ms': (percentile(lags, 0.95), 'ms', 'lower'),
+        'ui_lag_max_ms': (max(lags, default=0.0), 'ms', 'lower'),
+        'ui_drain_p95_ms': (percentile(drains, 0.95), 'ms', 'lower'),
+    }
+
+
+def bench_memory(args):
+    """Python heap growth over a long miner session (tracemalloc), with the log drained and written to a session log as in the GUI."""
+    total = 50_000 if args.quick else 300_000
+    telemetry = MinerTelemetry()
+    counts = {'lines': 0, 'dropped': 0}
+    stop = threading.Event()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    session_log = SessionLog('bench-memory')
+    log = LogBuffer(hcc_core.DEFAULT_LOG_MAX_LINES, sink=session_log.write_lines)
+    drainer = threading.Thread(target=drain_loop, args=(log, stop, 0.1, counts))
+    instance = miner_instance(log, telemetry=telemetry, rate=0, pattern='mixed', lines=total)
+    drainer.start()
+    instance.start()
+    instance._thread.join()
+    stop.set()
+    drainer.join()
+    # Lines the session log writer hasn't taken yet stay queued in memory and count as growth.
+    session_log.close()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'memory_growth_kb': ((current - baseline) / 1024, 'KB', 'lower'),
+        'memory_peak_kb': ((peak - baseline) / 1024, 'KB', 'lower'),
+    }
+
+
+def bench_download(args):
+    """ensure_latest_miner against the stub: fresh download (MB/s) and the cached, already verified path."""
+    size = (16 if args.quick else 64) * 1024 * 1024
+    stub = StubServer(size)
+    hcc_core.GITHUB_API = stub.url
+
+    def quiet(text):
+        pass
+
+    try:
+        # requests is imported on first use; keep that one-off cost out of the MB/s figure.
+        hcc_core.http_client.session
+        started = time.perf_counter()
+        hcc_core.ensure_latest_miner(quiet)
+        fresh = time.perf_counter() - started
+        started = time.perf_counter()
+        hcc_core.ensure_latest_miner(quiet)
+        cached = time.perf_counter() - started
+    finally:
+        stub.close()
+    return {
+        'download_mb_per_s': (size / (1024 * 1024) / fresh, 'MB/s', 'higher'),
+        'download_cached_ms': (cached * 1000, 'ms', 'lower'),
+    }
+
+
+def bench_start_stop(args):
+    """Time from start() to the miner's first line, and of stop() (cancel_pow to the stub, SIGTERM; SIGKILL if stubborn)."""
+    rounds = 3 if args.quick else 7
+    stub = StubServer(1024)
+    results = {}
+    try:
+        for label, stubborn in (('start_stop', 0), ('stop_stubborn', 1)):
+            starts, stops = [], []
+            for _ in range(rounds if not stubborn else 2):
+                first_line = threading.Event()
+                log = LogBuffer(sink=lambda lines: first_line.set())
+                instance = miner_instance(log, api_url=f"{stub.url}/api", rate=50, stubborn=stubborn)
+                started = time.perf_counter()
+                instance.start()
+                if not first_line.wait(10):
+                    raise RuntimeError("the fake miner printed nothing within 10s")
+                starts.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                instance.stop()
+                stops.append(time.perf_counter() - started)
+            if not stubborn:
+                results['start_first_line_ms'] = (statistics.median(starts) * 1000, 'ms', 'lower')
+            results[f'{label}_ms'] = (statistics.median(stops) * 1000, 'ms', 'lower')
+    finally:
+        os.environ.pop('FAKE_MINER_STUBBORN', None)
+        stub.close()
+    return results
+
+
+def bench_redraw(args):
+    """Carriage-return redraws per second through split_output and feed_output, checking each is parsed once."""
+    count = 5_000 if args.quick else 50_000
+    solve_every = 50
+    writes = []
+    for i in range(1, count + 1):
+        writes.append(progress_line(i, 'cr'))
+        if i % solve_every == 0:
+            writes.append("\nSolution found in 1.0s\n")
+    writes.append("\nfake miner done\n")
+    data = ''.join(writes).encode()
+    expected = [float(progress_line(i, 'cr').split()[1]) for i in range(1, count + 1)]
+    results = {}
+    # One chunk per write like a flushing miner, and odd-sized reads that split redraws.
+    for label, chunks in (('write', [w.encode() for w in writes]),
+                          ('split', [data[i:i + 7] for i in range(0, len(data), 7)])):
+        telemetry = MinerTelemetry(history=count)
+        log = LogBuffer(hcc_core.DEFAULT_LOG_MAX_LINES)
+        started = time.perf_counter()
+        hcc_core.feed_output(hcc_core.split_output(chunks), log, telemetry)
+        elapsed = time.perf_counter() - started
+        rates = [rate for _, rate in telemetry.samples]
+        if rates != expected or telemetry.solutions != count // solve_every:
+            raise RuntimeError(f"{label} chunks: {len(rates)} samples for {count} redraws, "
+                               f"{telemetry.solutions} solutions for {count // solve_every}")
+        results[f'redraw_{label}_per_s'] = (count / elapsed, 'redraws/s', 'higher')
+    return results
+
+
+SCENARIOS = {
+    'throughput': bench_throughput,
+    'ui_lag': bench_ui_lag,
+    'memory': bench_memory,
+    'download': bench_download,
+    'start_stop': bench_start_stop,
+    'redraw': bench_redraw,
+}
+
+
+def compare(results, baseline, tolerance):
+    """Metrics that got worse than the baseline by more than tolerance (a fraction)."""
+    regressions = []
+    for name, (value, unit, better) in results.items():
+        old = baseline.get(name)
+        if not old or not old[0]:
+            continue
+        change = (value - old[0]) / old[0]
+        if (better == 'lower' and change > tolerance) or (better == 'higher' and -change > tolerance):
+            regressions.append(f"{name}: {old[0]:.2f} -> {value:.2f} {unit} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HCC miner GUI's hot paths with a fake miner and stub servers.")
+    parser.add_argument('--only', help=f"comma separated scenarios (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--quick', action='store_true', help="smaller workloads, for a fast sanity run")
+    parser.add_argument('--json', metavar='FILE', help="write the results here")
+    parser.add_argument('--baseline', metavar='FILE', help="compare with the results of an earlier --json run")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown vs. the baseline (default 0.2)")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        print(f"== {name}: {SCENARIOS[name].__doc__.splitlines()[0]}", flush=True)
+        metrics = SCENARIOS[name](args)
+        if 'skipped' in metrics:
+            print(f"   skipped: {metrics['skipped']}")
+            continue
+        for metric, (value, unit, better) in metrics.items():
+            print(f"   {metric:<28} {value:>12.2f} {unit:<8} ({better} is better)")
+        results.update(metrics)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=4)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(f"[!] Regression: {line}")
+        if regressions:
+            return 1
+        print("[+] No regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
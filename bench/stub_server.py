@@ -0,0 +1,138 @@
+"""Local stand-in for the GitHub releases API and the faucet API, for benchmarks.
+
+    GET  /repos/<owner>/<repo>/releases/latest, /releases/tags/<tag>   release JSON for this OS/arch
+    GET  /download/<asset>                                             the asset (Range requests work)
+    POST /api/cancel_pow                                               counted, answers {"ok": true}
+    GET  /api/me                                                       a small account document
+
+Point hcc_core at it with HCC_GITHUB_API=<url> (or hcc_core.GITHUB_API) and an api_url of <url>/api.
+Run it on its own with: python bench/stub_server.py --port 8099 --asset-mb 16
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import re
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import hcc_core  # noqa: E402
+
+
+class StubServer:
+    """Serves a fake release with an asset of asset_size bytes on 127.0.0.1 from a background thread."""
+
+    def __init__(self, asset_size=8 * 1024 * 1024, tag='v9.9.9', port=0, delay=0.0):
+        self.tag = tag
+        self.delay = delay  # seconds added to every faucet request
+        self.asset_name = hcc_core.miner_asset_name(tag)
+        block = hashlib.sha256(b'hcc bench').digest() * 2048
+        self.asset = (block * (asset_size // len(block) + 1))[:asset_size]
+        self.checksums = f"{hashlib.sha256(self.asset).hexdigest()}  {self.asset_name}\n".encode()
+        self.counts = {'release': 0, 'download': 0, 'cancel_pow': 0, 'account': 0}
+        self._lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name='stub-server')
+        self._thread.start()
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def pause(self):
+        if self.delay:
+            threading.Event().wait(self.delay)
+
+    def release(self):
+        return {
+            'tag_name': self.tag,
+            'assets': [
+                {'name': self.asset_name, 'size': len(self.asset),
+                 'browser_download_url': f"{self.url}/download/{self.asset_name}"},
+                {'name': 'checksums.txt', 'size': len(self.checksums),
+                 'browser_download_url': f"{self.url}/download/checksums.txt"},
+            ],
+        }
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, code, body, content_type='application/json', headers=()):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if re.match(r'^/repos/[^/]+/[^/]+/releases/(latest|tags/[^/]+)$', path):
+                    stub.count('release')
+                    self._send(200, json.dumps(stub.release()).encode(), headers=[('ETag', f'"{stub.tag}"')])
+                elif path == f"/download/{stub.asset_name}":
+                    stub.count('download')
+                    self._send_range(stub.asset)
+                elif path == '/download/checksums.txt':
+                    self._send(200, stub.checksums, 'text/plain')
+                elif path == '/api/me':
+                    stub.count('account')
+                    stub.pause()
+                    self._send(200, json.dumps({'balance': 42, 'earned_today': 3, 'daily_cap': 100}).encode())
+                else:
+                    self._send(404, b'{}')
+
+            def _send_range(self, data):
+                m = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+                if m and int(m.group(1)) < len(data):
+                    start = int(m.group(1))
+                    self._send(206, data[start:], 'application/octet-stream',
+                               [('Content-Range', f"bytes {start}-{len(data) - 1}/{len(data)}")])
+                else:
+                    self._send(200, data, 'application/octet-stream')
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if self.path == '/api/cancel_pow':
+                    stub.count('cancel_pow')
+                    stub.pause()
+                    self._send(200, b'{"ok": true}')
+                else:
+                    self._send(404, b'{}')
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub GitHub releases API and faucet API for benchmarks.")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--asset-mb', type=float, default=8)
+    parser.add_argument('--tag', default='v9.9.9')
+    args = parser.parse_args(argv)
+    stub = StubServer(int(args.asset_mb * 1024 * 1024), args.tag, args.port)
+    print(f"Serving on {stub.url} (HCC_GITHUB_API={stub.url}, api_url={stub.url}/api); Ctrl+C stops.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
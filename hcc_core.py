@@ -0,0 +1,3595 @@
+"""Core of the HCC GUI miner: profiles, miner download, command building and process supervision.
+
+Nothing in here imports Tk, so the same code drives the GUI (hcc_gui_miner.py) and headless rigs:
+
+    python hcc_core.py --profile Default --log-file /var/log/hcc_miner.log
+"""
+import argparse
+import codecs
+import collections
+import contextlib
+import gzip
+import json
+import math
+import os
+import platform
+import queue
+import random
+import re
+import shutil
+import signal
+import stat
+import struct
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+# requests, hashlib and http.server are imported by the functions that use them: they are slow to
+# import and no part of them is needed before the window is up (see --startup-trace).
+
+
+config_file = 'dist/hcc_miner_config.json'
+
+
+# Log buffer limits. A log view keeps at most this many lines (configurable per profile);
+# the reader thread buffers at most the same amount between two UI ticks.
+DEFAULT_LOG_MAX_LINES = 5000
+MIN_LOG_MAX_LINES = 100
+
+
+# Number of hashrate samples kept per miner (sparkline / steady-state averages)
+TELEMETRY_HISTORY = 300
+
+
+# Worker tuning: each candidate worker count mines for TUNE_TRIAL_SECONDS; hashrate samples from
+# the first TUNE_WARMUP_SECONDS are ignored.
+TUNE_TRIAL_SECONDS = 30
+TUNE_WARMUP_SECONDS = 10
+
+
+# Watchdog: a running miner counts as stalled after DEFAULT_STALL_SECONDS (per-profile) without a
+# non-zero hashrate line or a cooldown/waiting notice. Restarts back off exponentially from
+# RESTART_BACKOFF_BASE up to RESTART_BACKOFF_MAX seconds (with jitter), at most
+# MAX_RESTARTS_PER_HOUR times; the backoff resets once a miner ran healthy for RESTART_HEALTHY_SECONDS.
+WATCHDOG_INTERVAL = 5
+DEFAULT_STALL_SECONDS = 300
+RESTART_BACKOFF_BASE = 5
+RESTART_BACKOFF_MAX = 300
+MAX_RESTARTS_PER_HOUR = 10
+RESTART_HEALTHY_SECONDS = 600
+
+
+# Worker throttling (profiles with "throttle"): the watchdog measures the CPU cores busy with work other
+# than the miners, keeps THROTTLE_HEADROOM cores free for it and changes the worker count by restarting
+# the miner. Fewer workers take effect after THROTTLE_DOWN_SECONDS of the same verdict, more after
+# THROTTLE_UP_SECONDS, and a miner is restarted at most every THROTTLE_MIN_SECONDS; while a held
+# verdict for fewer workers waits for that, the miner is re-niced to THROTTLE_NICE (and back to its
+# profile's nice if the verdict goes away first). Load readings are smoothed with THROTTLE_SMOOTHING.
+THROTTLE_HEADROOM = 0.5
+THROTTLE_DOWN_SECONDS = 15
+THROTTLE_UP_SECONDS = 120
+THROTTLE_MIN_SECONDS = 60
+THROTTLE_NICE = 19
+THROTTLE_SMOOTHING = 0.3
+
+
+# Miner priority (per profile): nice 0-19, I/O priority and a CPU quota in percent of one core. The quota
+# runs the miner in a transient cgroup v2 scope via systemd-run --user where that works.
+IO_PRIORITIES = ('normal', 'low', 'idle')
+_IONICE_ARGS = {'low': ['-c', '2', '-n', '7'], 'idle': ['-c', '3']}
+
+
+# Stopping a miner: SIGTERM to its process group first, SIGKILL if it is still there after this long
+STOP_GRACE_SECONDS = 3
+
+# Headless mode: how often pending miner output is written out, and how often a summary line is logged
+HEADLESS_POLL_SECONDS = 0.5
+HEADLESS_STATUS_SECONDS = 60
+
+# Faucet account polling: never more often than this, and the window credits/hour is computed over
+FAUCET_POLL_SECONDS = 120
+FAUCET_RATE_WINDOW = 3600
+FAUCET_DEFAULT_PATH = "/me"
+# Hashrate samples further apart than this don't count as continuous mining
+FAUCET_MAX_SAMPLE_GAP = 60
+
+# Mode advisor model per mode: cooldown after a solution (s), credits per solution and the daily-cap
+# pool it counts toward. The cooldowns are only used until the miner has shown real ones; the rewards
+# are assumptions. A profile can override any of it with a "mode_model" dict of the same shape.
+MODES = ('normal', 'EXTREME', 'POTATO')
+MODE_MODEL = {
+    'normal': {'cooldown': 300, 'reward': 1.0, 'cap': 'normal'},
+    'EXTREME': {'cooldown': 0, 'reward': 1.0, 'cap': 'extreme'},
+    'POTATO': {'cooldown': 300, 'reward': 1.0, 'cap': 'normal'},
+}
+MODE_STATS_SAVE_SECONDS = 60
+
+# Profile rotation (profiles with "rotate"): when the key of the mining profile reaches its daily cap
+# (miner output or faucet figures) or the miner announces a cooldown of at least ROTATE_MIN_COOLDOWN
+# seconds, the watchdog restarts the miner with the next rotating profile that is eligible. A cooldown
+# notice is a line saying "cooldown" or a waiting notice with a length; one without a length counts as
+# the mode model's cooldown. A cap lasts until the next UTC day.
+ROTATE_MIN_COOLDOWN = 60
+
+# Diagnostics: upper bounds (ms) of the latency histogram buckets, the window (s) of the lines/s rate and
+# the number of entries listed per section of a profile capture (app_data_dir()/diagnostics).
+DIAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+DIAG_RATE_WINDOW = 10
+DIAG_TOP_ENTRIES = 40
+
+# Prometheus metrics endpoint: used when an address is given without a port
+METRICS_DEFAULT_PORT = 9464
+
+# Session logs under app_data_dir()/logs: the current file is rotated into a gzip archive at
+# SESSION_LOG_MAX_BYTES and at most SESSION_LOG_ARCHIVES archives are kept per log. Each file has a
+# small index (time range, error lines) so searches can skip files or answer from the index alone.
+SESSION_LOG_MAX_BYTES = 8 * 1024 * 1024
+SESSION_LOG_ARCHIVES = 30
+SESSION_LOG_FLUSH_SECONDS = 1
+SESSION_LOG_INDEX_SECONDS = 30
+SESSION_LOG_INDEX_ERRORS = 2000
+LOG_SEARCH_LIMIT = 500
+
+# Session recordings (app_data_dir()/recordings): gzip of RECORDING_MAGIC, a JSON header line, then per
+# chunk of raw miner output a (seconds since start, length) record header followed by the bytes.
+RECORDING_MAGIC = b'HCCREC1\n'
+_RECORD_HEADER = struct.Struct('<dI')
+
+
+default_config = {
+    "Profile": {
+        "Default": {
+            "api_url": "https://hashcash-pow-faucet.dynv6.net/api",
+            "miner_path": "",
+            "private_key": "",
+            "threads": "0",
+            "auto_download": True,
+            "extreme": False,
+            "potato": False,
+            "log_max_lines": str(DEFAULT_LOG_MAX_LINES),
+            "affinity": "",
+            "auto_restart": True,
+            "stall_seconds": str(DEFAULT_STALL_SECONDS),
+            "metrics_address": "",
+            "miner_version": "",
+            "earnings": False,
+            "earnings_path": FAUCET_DEFAULT_PATH,
+            "auto_switch_mode": False,
+            "record": False,
+            "throttle": False,
+            "throttle_min_workers": "1",
+            "throttle_schedule": "",
+            "throttle_idle_seconds": "0",
+            "nice": "",
+            "io_priority": "normal",
+            "cpu_quota": "",
+            "reserve_gui_core": False,
+            "rotate": False
+        }
+    }
+}
+
+
+# Miner output handling. Escape sequences that redraw the current line (erase line, cursor to
+# column 1) are treated like a carriage return; colours (SGR) are kept for the log view.
+_ANSI_RE = re.compile(r'(?:\x1B[@-_]|[\x80-\x9F])[0-?]*[ -/]*[@-~]')
+_REDRAW_RE = re.compile(r'\x1b\[[0-2]?K|\x1b\[[01]?G')
+_SGR_RE = re.compile(r'\x1b\[([0-9;]*)m')
+ANSI_COLOURS = {
+    30: 'black', 31: 'red', 32: 'green', 33: 'yellow', 34: 'blue', 35: 'magenta', 36: 'cyan', 37: 'white',
+    90: 'gray', 91: 'red', 92: 'green', 93: 'yellow', 94: 'blue', 95: 'magenta', 96: 'cyan', 97: 'white',
+}
+READ_CHUNK_SIZE = 64 * 1024
+MAX_PARTIAL_LINE = 64 * 1024  # an unterminated line this long is logged as it is
+
+
+def strip_ansi_codes(text):
+    if '\x1b' not in text and '\x9b' not in text:
+        return text
+    return _ANSI_RE.sub('', text)
+
+
+def ansi_segments(text):
+    """Split a line into (text, tags) pairs by its SGR colour codes; tags are like ('ansi-red', 'ansi-bold').
+
+    Colours are reset at the start of every line. Other escape sequences are dropped.
+    """
+    if '\x1b' not in text:
+        return [(text, ())]
+    segments = []
+    colour, bold = None, False
+    pos = 0
+    for m in _SGR_RE.finditer(text):
+        if m.start() > pos:
+            segments.append((_ANSI_RE.sub('', text[pos:m.start()]), colour, bold))
+        for code in (int(c) for c in m.group(1).split(';') if c.isdigit()) if m.group(1) else (0,):
+            if code == 0:
+                colour, bold = None, False
+            elif code == 1:
+                bold = True
+            elif code == 22:
+                bold = False
+            elif code == 39:
+                colour = None
+            elif code in ANSI_COLOURS:
+                colour = ANSI_COLOURS[code]
+        pos = m.end()
+    segments.append((_ANSI_RE.sub('', text[pos:]), colour, bold))
+    return [(t, tuple(tag for tag in (colour and f'ansi-{colour}', bold and 'ansi-bold') if tag))
+            for t, colour, bold in segments if t]
+
+
+class OutputSplitter:
+    """Turns raw miner output chunks into complete lines plus the line currently being redrawn in place.
+
+    Bytes are decoded incrementally (a UTF-8 sequence split across reads is fine); a line that is
+    rewritten with carriage returns yields only what is finally shown, not every intermediate state.
+    Every redraw is still reported once as an update (for telemetry) when a later one replaces it.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ''  # the unfinished part after the last carriage return
+        self._shown = ''  # the last finished redraw of the current line
+
+    def _finish(self, redraws, updates):
+        for text in redraws:
+            if text:
+                updates.append(text)
+                self._shown = text
+
+    def feed(self, data, final=False):
+        """Return (lines, live, updates).
+
+        lines: new complete lines (ending in newline); live: the unfinished line's text ('' once a line
+        ends, None if nothing new); updates: every finished line and redraw in order, each exactly once.
+        """
+        text = self._partial + self._decoder.decode(data, final)
+        if '\x1b[' in text:
+            text = _REDRAW_RE.sub('\r', text)
+        *complete, partial = text.split('\n')
+        lines, updates = [], []
+        for line in complete:
+            *redraws, last = line.split('\r')
+            self._finish(redraws, updates)
+            if last:
+                updates.append(last)
+            lines.append((last or self._shown) + '\n')
+            self._shown = ''
+        *redraws, tail = partial.split('\r')
+        self._finish(redraws, updates)
+        live = (tail or self._shown) if partial else ('' if complete else None)
+        if final or len(tail) > MAX_PARTIAL_LINE:
+            if tail:
+                updates.append(tail)
+            last = tail or self._shown
+            if last:
+                lines.append(last + '\n')
+            live, tail, self._shown = ('' if final else None), '', ''
+        self._partial = tail
+        return lines, live, updates
+
+
+def read_chunks(stream, recorder=None):
+    """Yield chunks read from a binary stream until EOF, passing each to recorder.write() as well."""
+    while True:
+        data = stream.read(READ_CHUNK_SIZE)
+        if not data:
+            return
+        if recorder is not None:
+            recorder.write(data)
+        yield data
+
+
+def split_output(chunks):
+    """Yield (lines, live, updates) from OutputSplitter for every chunk, and once more at the end."""
+    splitter = OutputSplitter()
+    for data in chunks:
+        yield splitter.feed(data)
+    yield splitter.feed(b'', final=True)
+
+
+def read_output(stream, recorder=None):
+    """Yield (lines, live, updates) for every chunk read from a binary stream, until EOF."""
+    return split_output(read_chunks(stream, recorder))
+
+
+def feed_output(output, log, telemetry):
+    """Feed split_output() results into telemetry and a LogBuffer; the miner's reader loop (and replays)."""
+    for lines, live, updates in output:
+        for text in updates:
+            telemetry.feed(text)
+        if lines:
+            log.put_lines(lines)
+        if live is not None:
+            log.set_live(live)
+
+
+class LogBuffer:
+    """Thread-safe, bounded line buffer between the miner reader thread and the log view.
+
+    When the UI falls behind, the oldest pending lines are dropped (and counted) instead of
+    letting the backlog grow without limit.
+    """
+
+    def __init__(self, max_lines=DEFAULT_LOG_MAX_LINES, sink=None):
+        self._lock = threading.Lock()
+        self._lines = collections.deque(maxlen=max_lines)
+        self._dropped = 0
+        self._live = None  # line the miner is redrawing in place; None = unchanged since take_live()
+        self.sink = sink  # e.g. SessionLog.write_lines; gets every line, even ones the view drops
+
+    def put(self, line):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+        if self.sink is not None:
+            self.sink([line])
+
+    def put_lines(self, lines):
+        with self._lock:
+            self._dropped += max(0, len(self._lines) + len(lines) - self._lines.maxlen)
+            self._lines.extend(lines)
+        if self.sink is not None:
+            self.sink(lines)
+
+    def set_live(self, text):
+        """Replace the live status line ('' clears it)."""
+        with self._lock:
+            self._live = text
+
+    def take_live(self):
+        """The live status line if it changed since the last call, else None."""
+        with self._lock:
+            live, self._live = self._live, None
+        return live
+
+    def set_max_lines(self, max_lines):
+        with self._lock:
+            if max_lines == self._lines.maxlen:
+                return
+            overflow = max(0, len(self._lines) - max_lines)
+            self._lines = collections.deque(self._lines, maxlen=max_lines)
+            self._dropped += overflow
+
+    def pending(self):
+        """Number of lines waiting for the next drain."""
+        with self._lock:
+            return len(self._lines)
+
+    def drain(self):
+        """Return (lines, dropped): everything pending and the number of lines dropped since the last drain."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+
+def coalesce_lines(lines):
+    """Collapse runs of identical consecutive lines into one line with a repeat counter."""
+    out = []
+    prev = None
+    count = 0
+    for line in lines:
+        if line == prev:
+            count += 1
+            continue
+        if prev is not None:
+            out.append(prev if count == 1 else f"{prev.rstrip()}  (x{count})\n")
+        prev, count = line, 1
+    if prev is not None:
+        out.append(prev if count == 1 else f"{prev.rstrip()}  (x{count})\n")
+    return out
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+# Progress-line parsing. The CLI miner's wording is not a stable interface, so the patterns are
+# deliberately tolerant; lines that match nothing are simply not counted.
+_HASHRATE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([kKMGT]?)(?:H/s|hash(?:es)?/s)\b')
+_NONCES_RE = re.compile(r'(?i)\b(?:nonces|hashes|tried|attempts)\b\s*[:=]?\s*(\d[\d,]*)')
+_DURATION_RE = re.compile(r'(?i)\b(?:elapsed|took|in|time)\b\s*[:=]?\s*(\d+(?:\.\d+)?)\s*(ms|s|sec|secs|seconds|m|min)\b')
+_COUNT_RES = {
+    'solutions': re.compile(r'(?i)\bsolutions?\s*[:=]\s*(\d+)'),
+    'accepted': re.compile(r'(?i)\baccepted\s*[:=]\s*(\d+)'),
+    'rejected': re.compile(r'(?i)\brejected\s*[:=]\s*(\d+)'),
+}
+_EVENT_RES = {
+    'solutions': re.compile(r'(?i)\b(?:solution found|found (?:a )?(?:solution|nonce)|solved)\b'),
+    'accepted': re.compile(r'(?i)\b(?:accepted|submit(?:ted)? ok)\b'),
+    'rejected': re.compile(r'(?i)\b(?:rejected|invalid solution)\b'),
+}
+_WAITING_RE = re.compile(r'(?i)\b(?:cooldown|waiting|sleeping|retry(?:ing)? in)\b')
+_COOLDOWN_RE = re.compile(r'(?i)\bcool[- ]?down\b')
+_CAP_RE = re.compile(r'(?i)\b(?:daily (?:cap|limit)|cap reached|limit reached|quota (?:reached|exceeded))\b')
+_UNIT_SCALE = {'': 1.0, 'k': 1e3, 'K': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12}
+_DURATION_SCALE = {'ms': 0.001, 's': 1.0, 'sec': 1.0, 'secs': 1.0, 'seconds': 1.0, 'm': 60.0, 'min': 60.0}
+
+
+def parse_progress_line(line):
+    """Extract telemetry fields from one line of miner output.
+
+    Returns a dict with any of: hashrate (H/s), nonces, seconds, waiting (any wait/backoff notice),
+    cooldown (explicit cooldown notice), cap_reached (daily cap notice), and for solutions/accepted/rejected either an absolute count (int) or True for a single event.
+    Empty dict if nothing matched.
+    """
+    data = {}
+    m = _HASHRATE_RE.search(line)
+    if m:
+        data['hashrate'] = float(m.group(1)) * _UNIT_SCALE[m.group(2)]
+    m = _NONCES_RE.search(line)
+    if m:
+        data['nonces'] = int(m.group(1).replace(',', ''))
+    m = _DURATION_RE.search(line)
+    if m:
+        data['seconds'] = float(m.group(1)) * _DURATION_SCALE[m.group(2).lower()]
+    for key, count_re in _COUNT_RES.items():
+        m = count_re.search(line)
+        if m:
+            data[key] = int(m.group(1))
+        elif _EVENT_RES[key].search(line):
+            data[key] = True
+    if _WAITING_RE.search(line):
+        data['waiting'] = True
+    if _COOLDOWN_RE.search(line):
+        data['cooldown'] = True
+    if _CAP_RE.search(line):
+        data['cap_reached'] = True
+    return data
+
+
+def format_hashrate(hps):
+    for unit, scale in (('TH/s', 1e12), ('GH/s', 1e9), ('MH/s', 1e6), ('kH/s', 1e3)):
+        if hps >= scale:
+            return f"{hps / scale:.2f} {unit}"
+    return f"{hps:.0f} H/s"
+
+
+class MinerTelemetry:
+    """Hashrate samples and result counters parsed from the miner's progress output.
+
+    Fed from the reader thread, read from the Tk thread; samples live in a fixed-size ring buffer.
+    """
+
+    def __init__(self, history=TELEMETRY_HISTORY):
+        self._lock = threading.Lock()
+        self._history = history
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = collections.deque(maxlen=self._history)  # (monotonic time, H/s)
+            self.started = time.monotonic()
+            self.rate_sum = 0.0
+            self.rate_count = 0
+            self.peak = 0.0
+            self.nonces = 0
+            self.hashes = 0.0  # estimated from the hashrate samples
+            self.solutions = 0
+            self.accepted = 0
+            self.rejected = 0
+            self.last_solve_seconds = None
+            self.last_update = None
+            self.last_progress = None  # last line with a hashrate
+            self.first_progress = None  # seconds from start to the first line with a hashrate
+            self.last_activity = None  # last non-zero hashrate or waiting notice
+            self.cap_reached = None  # when the miner last reported a daily cap
+            self.cooldown = None  # (when, seconds or None) of the last cooldown notice; one without a length counts once per wait
+            self.search_started = self.started  # for solve times when the miner doesn't print them
+            self.waiting_since = None
+            self.solve_times = []  # seconds per solution, collected by take_timings()
+            self.wait_times = []  # seconds of cooldown/waiting between solutions
+
+    def feed(self, line):
+        data = parse_progress_line(line)
+        if not data:
+            return data
+        now = time.monotonic()
+        with self._lock:
+            self.last_update = now
+            solved = data.get('solutions')
+            if solved is True or (solved is not None and solved > self.solutions):
+                self.solve_times.append(data.get('seconds') or now - self.search_started)
+                self.search_started = now
+            # Only an explicit cooldown, or a wait with a length, is a cooldown; "Waiting for challenge..." isn't.
+            timed_wait = data.get('waiting') and 'seconds' in data
+            new_wait = self.waiting_since is None or self.cooldown is None or self.cooldown[0] < self.waiting_since
+            if (data.get('cooldown') and new_wait) or timed_wait:
+                self.cooldown = (now, data.get('seconds'))
+            if data.get('waiting') and self.waiting_since is None:
+                self.waiting_since = now
+            if data.get('hashrate') and self.waiting_since is not None:
+                self.wait_times.append(now - self.waiting_since)
+                self.waiting_since = None
+                self.search_started = now
+            if data.get('cap_reached'):
+                self.cap_reached = now
+            if 'hashrate' in data:
+                rate = data['hashrate']
+                if self.samples:
+                    self.hashes += rate * min(now - self.samples[-1][0], FAUCET_MAX_SAMPLE_GAP)
+                self.samples.append((now, rate))
+                self.rate_sum += rate
+                self.rate_count += 1
+                self.peak = max(self.peak, rate)
+                self.last_progress = now
+                if self.first_progress is None:
+                    self.first_progress = now - self.started
+                    diagnostics.stage_done('first progress line', self.first_progress)
+                if rate > 0:
+                    self.last_activity = now
+            if data.get('waiting'):
+                self.last_activity = now
+            if 'nonces' in data:
+                self.nonces = max(self.nonces, data['nonces'])
+            for key in ('solutions', 'accepted', 'rejected'):
+                value = data.get(key)
+                if value is True:
+                    setattr(self, key, getattr(self, key) + 1)
+                elif value is not None:
+                    setattr(self, key, value)
+            if data.get('solutions') is not None and 'seconds' in data:
+                self.last_solve_seconds = data['seconds']
+        return data
+
+    def take_timings(self):
+        """Solve and wait durations recorded since the last call: (solve_times, wait_times)."""
+        with self._lock:
+            timings = self.solve_times, self.wait_times
+            self.solve_times, self.wait_times = [], []
+            return timings
+
+    def snapshot(self, samples=True):
+        with self._lock:
+            return {
+                'current': self.samples[-1][1] if self.samples else 0.0,
+                'average': self.rate_sum / self.rate_count if self.rate_count else 0.0,
+                'peak': self.peak,
+                'nonces': self.nonces,
+                'hashes': max(self.hashes, self.nonces),
+                'solutions': self.solutions,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'last_solve_seconds': self.last_solve_seconds,
+                'uptime': time.monotonic() - self.started,
+                'samples': list(self.samples) if samples else [],
+            }
+
+
+# In-memory copy of config_file: parsed once and re-read only when the file changes on disk
+# (another process, or an edit by hand). save_profile() writes through it.
+_config_cache = {'key': None, 'config': None}
+
+
+def _config_key():
+    try:
+        st = os.stat(config_file)
+    except OSError:
+        return None
+    return os.path.abspath(config_file), st.st_mtime_ns, st.st_size
+
+
+def _stored_config():
+    """The parsed config file, or None if there is none. Raises ValueError if it isn't valid JSON."""
+    key = _config_key()
+    if key is None:
+        return None
+    if _config_cache['key'] != key:
+        with open(config_file, 'r') as file:
+            config = json.load(file)
+        _config_cache.update(key=key, config=config)
+    return _config_cache['config']
+
+
+def write_config(config):
+    """Write the whole config atomically (temporary file, then rename) and keep it as the in-memory copy."""
+    os.makedirs(os.path.dirname(config_file) or '.', exist_ok=True)
+    tmp = config_file + '.tmp'
+    with open(tmp, 'w') as file:
+        json.dump(config, file, indent=4)
+    os.replace(tmp, config_file)
+    _config_cache.update(key=_config_key(), config=config)
+
+
+def read_config():
+    """The whole config (shared, don't modify it; see save_profile). The default config is written out if there is none yet."""
+    config = _stored_config()
+    if config is None:
+        config = json.loads(json.dumps(default_config))
+        write_config(config)
+    return config
+
+
+def save_profile(profile_name, values):
+    """Merge values into the named profile and write the config file. Other keys of the profile are kept."""
+    config = _stored_config() or {"Profile": {}}
+    config.setdefault("Profile", {}).setdefault(profile_name, {}).update(values)
+    write_config(config)
+
+
+def _config_or_default():
+    try:
+        return _stored_config() or default_config
+    except ValueError:
+        return default_config
+
+
+def load_profile_names():
+    config = _config_or_default()
+    if "Profile" in config:
+        return list(config["Profile"].keys())
+    else:
+        return ["Default"]
+
+
+def load_profile(profile_name):
+    """The stored profile dict (the default profile if it doesn't exist)."""
+    return _config_or_default().get("Profile", {}).get(profile_name, default_config["Profile"]["Default"])
+
+
+def hidden_startupinfo():
+    """STARTUPINFO that hides the console window on Windows; None elsewhere."""
+    startupinfo = None
+    if os.name == 'nt':  # If running on Windows
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+
+def parse_cpu_list(text):
+    """Parse a CPU list like '0-3,6' into a set of CPU numbers; None for an empty list (no pinning)."""
+    cpus = set()
+    for part in (text or '').replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus or None
+
+
+def format_cpu_list(cpus):
+    """The inverse of parse_cpu_list: {0, 1, 2, 6} -> '0-2,6'."""
+    parts = []
+    for cpu in sorted(cpus):
+        if parts and parts[-1][1] == cpu - 1:
+            parts[-1][1] = cpu
+        else:
+            parts.append([cpu, cpu])
+    return ','.join(f"{a}-{b}" if a != b else str(a) for a, b in parts)
+
+
+_cgroup_scope_ok = None
+
+
+def cgroup_scope_available():
+    """Whether `systemd-run --user --scope` can put a process into a cgroup v2 scope with a CPU quota (cached)."""
+    global _cgroup_scope_ok
+    if _cgroup_scope_ok is None:
+        _cgroup_scope_ok = False
+        if os.path.exists('/sys/fs/cgroup/cgroup.controllers') and shutil.which('systemd-run'):
+            try:
+                probe = subprocess.run(['systemd-run', '--user', '--scope', '--quiet', '-p', 'CPUQuota=50%', 'true'],
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+                _cgroup_scope_ok = probe.returncode == 0
+            except (OSError, subprocess.SubprocessError):
+                pass
+    return _cgroup_scope_ok
+
+
+def launch_command(command, settings, log_fn):
+    """The miner command behind the helpers that apply the profile's CPU quota, nice level and I/O priority.
+
+    The helpers exec the miner, so its pid and process group stay the same. What no helper can do here is
+    logged; MinerInstance applies the nice level after the start instead where `nice` is missing.
+    """
+    prefix = []
+    quota = settings.get('cpu_quota')
+    if quota:
+        if cgroup_scope_available():
+            prefix += ['systemd-run', '--user', '--scope', '--quiet', '--collect', '-p', f'CPUQuota={quota}%', '--']
+        else:
+            log_fn(f"[!] A CPU quota needs cgroup v2 and a systemd user session (systemd-run --user); "
+                   f"running without the {quota}% quota.\n")
+    nice = settings.get('nice')
+    if nice and os.name != 'nt' and shutil.which('nice'):
+        prefix += ['nice', '-n', nice]
+    io_priority = settings.get('io_priority', 'normal')
+    if io_priority in _IONICE_ARGS:
+        if sys.platform.startswith('linux') and shutil.which('ionice'):
+            prefix += ['ionice'] + _IONICE_ARGS[io_priority]
+        else:
+            log_fn("[!] I/O priority needs Linux with ionice; ignoring it.\n")
+    return prefix + list(command)
+
+
+# CPUs this process could use before reserve_gui_core() pinned the Tk thread, and the reserved one
+_allowed_cpus = None
+_reserved_cpus = set()
+
+
+def reserve_gui_core():
+    """Pin the calling (Tk) thread to the last CPU it may use and return that CPU as a set.
+
+    Threads and processes it starts later inherit the pin; miner_cpus() keeps every miner off it from
+    then on. Returns None where this isn't possible.
+    """
+    global _allowed_cpus, _reserved_cpus
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    try:
+        allowed = os.sched_getaffinity(0)
+        if len(allowed) < 2:
+            return None
+        core = max(allowed)
+        os.sched_setaffinity(0, {core})
+    except OSError:
+        return None
+    _allowed_cpus, _reserved_cpus = allowed, {core}
+    return {core}
+
+
+def miner_cpus(affinity):
+    """The CPUs a miner should run on: its affinity setting (or all CPUs) minus the GUI's reserved core.
+
+    None means no pinning. Raises ValueError for an invalid affinity list.
+    """
+    cpus = parse_cpu_list(affinity)
+    if not hasattr(os, 'sched_setaffinity'):
+        return cpus
+    if _reserved_cpus:
+        cpus = (cpus or _allowed_cpus) - _reserved_cpus or cpus or _allowed_cpus
+    return cpus
+
+
+class RestartPolicy:
+    """Exponential backoff with jitter and an hourly cap for watchdog restarts."""
+
+    def __init__(self, base=RESTART_BACKOFF_BASE, maximum=RESTART_BACKOFF_MAX, per_hour=MAX_RESTARTS_PER_HOUR):
+        self.base = base
+        self.maximum = maximum
+        self.per_hour = per_hour
+        self.failures = 0
+        self.exhausted = False
+        self._history = collections.deque()
+
+    def next_delay(self, now):
+        """Seconds to wait before the next restart, or None once the hourly cap is reached."""
+        while self._history and now - self._history[0] > 3600:
+            self._history.popleft()
+        if len(self._history) >= self.per_hour:
+            self.exhausted = True
+            return None
+        delay = min(self.maximum, self.base * 2 ** self.failures)
+        self.failures += 1
+        self._history.append(now)
+        # Equal jitter: somewhere between half and the full backoff, so rigs restarted by the same
+        # faucet outage don't all come back at the same moment.
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+class MinerInstance:
+    """One miner process with its own settings, log buffer, telemetry and status.
+
+    The main window drives one of these; the Instances window can run more side by side.
+    settings is a dict as returned by profile_settings(), with miner_exe already resolved.
+    on_exit(instance) is called from the reader thread whenever the process has ended. If the
+    profile has auto_restart enabled, an unexpected exit schedules a restart (restart_at) that
+    the Watchdog carries out.
+
+    Lifecycle (state): stopped -> starting -> running -> stopping [-> killing] -> stopped, or
+    running -> exited when the miner ends by itself. on_state(instance) is called from whichever
+    thread changes the state.
+    """
+
+    def __init__(self, name, settings, log=None, telemetry=None, on_exit=None, on_state=None):
+        self.name = name
+        self.settings = settings
+        self.log = log if log is not None else LogBuffer()
+        self.telemetry = telemetry if telemetry is not None else MinerTelemetry()
+        self.on_exit = on_exit
+        self.on_state = on_state
+        self.process = None
+        self.state = "stopped"
+        self.status = "Not Mining"
+        self.stop_requested = False
+        self.restart_policy = RestartPolicy() if settings.get('auto_restart') else None
+        self.restart_at = None
+        self.restarts = 0
+        self.started_at = None
+        self.version = miner_version_from_path(settings['miner_exe'])
+        self.configured_threads = settings['threads']
+        self._thread = None
+
+    def _set_state(self, state, status=None):
+        self.state = state
+        if status is not None:
+            self.status = status
+        if self.on_state:
+            self.on_state(self)
+
+    def profile(self):
+        """The profile the miner runs with; the name it started with unless a ProfileRotator moved it on."""
+        return self.settings.get('profile', self.name)
+
+    def mode(self):
+        return "EXTREME" if self.settings['extreme'] else "POTATO" if self.settings['potato'] else "normal"
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def active(self):
+        """Running, or waiting for a watchdog restart."""
+        return self.running() or self.restart_at is not None
+
+    def start(self):
+        self.stop_requested = False
+        self.process = None
+        self.restart_at = None
+        self._set_state("starting", "Mining")
+        self.started_at = time.monotonic()
+        self.telemetry.reset()
+        self._thread = threading.Thread(target=self.execute_command, daemon=True, name=f"miner-{self.name}")
+        self._thread.start()
+
+    def stall_reason(self, now):
+        """Why the running miner looks stalled, or None."""
+        try:
+            stall_seconds = int(self.settings.get('stall_seconds') or 0)
+        except ValueError:
+            stall_seconds = DEFAULT_STALL_SECONDS
+        if stall_seconds <= 0 or self.started_at is None:
+            return None
+        telemetry = self.telemetry
+        last_activity = max(self.started_at, telemetry.last_activity or 0)
+        idle = now - last_activity
+        if idle < stall_seconds:
+            return None
+        if telemetry.last_progress is not None and now - telemetry.last_progress < stall_seconds:
+            return f"Stalled: zero hashrate for {idle:.0f}s"
+        return f"Stalled: no progress output for {idle:.0f}s"
+
+    def schedule_restart(self, reason):
+        """Arrange for the watchdog to restart this instance. Returns False once the restart cap is hit."""
+        delay = self.restart_policy.next_delay(time.monotonic())
+        if delay is None:
+            self.restart_at = None
+            self.status = f"Error: Restart limit reached ({reason})"
+            self.log.put(f"[watchdog] {reason}; {self.restart_policy.per_hour} restarts in the last hour, giving up.\n")
+            return False
+        self.restart_at = time.monotonic() + delay
+        self.status = f"Restarting in {delay:.0f}s ({reason})"
+        self.log.put(f"[watchdog] {reason}; restart #{self.restarts + 1} in {delay:.0f}s\n")
+        return True
+
+    def relaunch(self, changes, status):
+        """Restart the running miner with some settings changed. Blocking; the watchdog calls it."""
+        self.status = status
+        # restart_at keeps _ended() from treating the exit as a crash
+        self.restart_at = time.monotonic()
+        process = self.process
+        if process is not None:
+            shutdown_miner(process, self.settings['api_url'], self.settings['private_key'])
+        if self._thread is not None:
+            self._thread.join(10)
+        if self.stop_requested:
+            return False
+        self.settings.update(changes)
+        self.start()
+        return True
+
+    def switch_mode(self, mode, reason):
+        """Restart the running miner in another mode (normal/EXTREME/POTATO)."""
+        self.log.put(f"[advisor] {reason}; switching to {mode} mode\n")
+        self.relaunch({'extreme': mode == 'EXTREME', 'potato': mode == 'POTATO'}, f"Switching to {mode} mode")
+
+    def switch_profile(self, profile, settings, reason):
+        """Restart the running miner with another profile's settings (see ProfileRotator)."""
+        self.log.put(f"[rotate] {reason}; switching to profile '{profile}'\n")
+        self.configured_threads = settings['threads']
+        self.version = miner_version_from_path(settings['miner_exe'])
+        if self.relaunch(dict(settings, profile=profile), f"Switching to profile {profile}"):
+            self.status = f"Mining (profile {profile}: {reason})"
+
+    def workers(self):
+        """Worker count the miner runs with (0 = all cores)."""
+        return _worker_count(self.settings['threads'])
+
+    def base_workers(self):
+        """Worker count of the profile, before any throttling."""
+        return _worker_count(self.configured_threads)
+
+    def set_workers(self, workers, reason):
+        """Restart the running miner with another worker count (see Throttle)."""
+        self.log.put(f"[throttle] {reason}; restarting with {workers} of {self.base_workers()} workers\n")
+        if self.relaunch({'threads': str(workers)}, f"Throttling to {workers} workers"):
+            self.status = f"Mining ({workers} of {self.base_workers()} workers: {reason})"
+
+    def restart(self):
+        """Called by the watchdog once restart_at has passed."""
+        self.restarts += 1
+        self.log.put(f"[watchdog] Restarting miner (restart #{self.restarts})\n")
+        self.start()
+
+    def execute_command(self):
+        """Reader thread: run the miner and feed its output into telemetry and the log buffer."""
+        s = self.settings
+        exit_reason = None
+        recorder = None
+        cpus = miner_cpus(s.get('affinity'))
+        threads = s['threads']
+        if cpus and _reserved_cpus:
+            threads = str(min(_worker_count(threads), len(cpus)))
+        cmd = build_miner_command(s['miner_exe'], s['api_url'], s['private_key'], threads, s['extreme'], s['potato'])
+        try:
+            command = launch_command(cmd, s, self.log.put)
+            with diagnostics.stage('spawn'):
+                self.process = popen_miner(command, s.get('nice'), cpus)
+            if self.stop_requested:
+                # Stop was pressed while the process was being spawned.
+                signal_miner(self.process)
+            else:
+                self._set_state("running")
+
+            # On Windows popen_miner sets it as the priority class; elsewhere the `nice` helper may be missing.
+            nice_applied = bool(s.get('nice')) and (os.name == 'nt' or 'nice' in command[:len(command) - len(cmd)])
+            if s.get('nice') and not nice_applied:
+                # No `nice` helper: set it now, for every thread in the miner's process group.
+                nice_applied = renice_miner(self.process, int(s['nice']))
+                if not nice_applied:
+                    self.log.put(f"[!] Could not set the miner's nice level to {s['nice']}; running at normal priority.\n")
+            if cpus:
+                if not hasattr(os, 'sched_setaffinity'):
+                    self.log.put("[!] CPU affinity is only supported on Linux; ignoring it.\n")
+                elif not affinity_applied(self.process, cpus):
+                    self.log.put(f"[!] Could not set CPU affinity {format_cpu_list(cpus)}\n")
+            applied = [f"nice {s['nice']}"] if nice_applied else []
+            if 'ionice' in command:
+                applied.append(f"I/O {s['io_priority']}")
+            if 'systemd-run' in command:
+                applied.append(f"CPU quota {s['cpu_quota']}% (cgroup)")
+            if cpus and hasattr(os, 'sched_setaffinity'):
+                applied.append(f"CPUs {format_cpu_list(cpus)}")
+            if applied:
+                self.log.put(f"[*] Miner priority: {', '.join(applied)}\n")
+
+            if s.get('record'):
+                recorder = self._open_recorder(cmd)
+
+            # Continuously read output; lines redrawn in place only update the live status line
+            feed_output(read_output(self.process.stdout, recorder), self.log, self.telemetry)
+
+            return_code = self.process.wait()
+            if not self.stop_requested:
+                exit_reason = f"Process exited with return code {return_code}"
+
+        except (subprocess.CalledProcessError, OSError) as e:
+            exit_reason = f"Exception: {str(e)}"
+        finally:
+            if recorder is not None:
+                recorder.close()
+            self._ended(exit_reason)
+            if self.on_exit:
+                self.on_exit(self)
+
+    def _open_recorder(self, cmd):
+        path = os.path.join(recordings_dir(), f"{safe_file_name(self.name)}-{time.strftime('%Y%m%d-%H%M%S')}.hccrec.gz")
+        shown = [arg if arg != self.settings['private_key'] else '***' for arg in cmd]
+        try:
+            recorder = SessionRecorder(path, {'profile': self.name, 'version': self.version, 'command': shown})
+        except OSError as e:
+            self.log.put(f"[!] Could not record the miner output: {e}\n")
+            return None
+        self.log.put(f"[*] Recording miner output to {path}\n")
+        return recorder
+
+    def _ended(self, exit_reason):
+        if self.process is not None:
+            # Workers the miner left behind in its process group
+            sweep_miner_group(self.process)
+        if self.stop_requested:
+            self.status = "Not Mining"
+        elif self.restart_at is not None:
+            pass  # the watchdog stopped a stalled miner and will restart it
+        elif self.restart_policy is not None and self.restart_policy.exhausted:
+            pass  # the watchdog gave up; keep its status
+        else:
+            if exit_reason:
+                self.log.put(exit_reason + "\n")
+            if self.restart_policy is not None:
+                self.schedule_restart(exit_reason or "Process exited")
+            else:
+                self.status = exit_reason or "Not Mining"
+        self._set_state("stopped" if self.stop_requested else "exited")
+
+    def stop(self, cancel_pow=True):
+        """Cancel the pending PoW and stop the miner (SIGTERM, SIGKILL after STOP_GRACE_SECONDS).
+
+        Blocking for at most the grace period plus a moment; run it on the executor.
+        """
+        self.stop_requested = True
+        self.restart_at = None
+        # The reader thread may still be spawning the process.
+        deadline = time.monotonic() + 1
+        while self.process is None and self.running() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        process = self.process
+        if process is not None and process.poll() is None:
+            self._set_state("stopping", "Stopping...")
+
+            def _escalate():
+                self.log.put(f"[!] Miner ignored SIGTERM for {STOP_GRACE_SECONDS}s; killing it.\n")
+                self._set_state("killing", "Killing miner...")
+
+            if cancel_pow:
+                shutdown_miner(process, self.settings['api_url'], self.settings['private_key'], _escalate)
+            else:
+                shutdown_miner(process, on_escalate=_escalate)
+        if self._thread is not None:
+            self._thread.join(2)
+        if self.state != "stopped":
+            self._set_state("stopped", "Not Mining")
+
+
+class Watchdog:
+    """Background thread that restarts stalled or crashed miner instances of a Supervisor.
+
+    Only instances whose profile enables auto_restart are watched. Every restart is logged into the
+    instance's log with its reason; see RestartPolicy for backoff and the hourly cap.
+    With an advisor it also feeds the ModeAdvisor and carries out automatic mode switches, with a rotator
+    it moves miners of rotating profiles on to the next eligible profile, and it applies the worker
+    counts the Throttle picks for profiles with throttling enabled.
+    """
+
+    def __init__(self, supervisor, interval=WATCHDOG_INTERVAL, advisor=None, throttle=None, rotator=None):
+        self.supervisor = supervisor
+        self.interval = interval
+        self.advisor = advisor
+        self.throttle = throttle if throttle is not None else Throttle()
+        self.rotator = rotator
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name='hcc-watchdog').start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check(time.monotonic())
+            except Exception as e:
+                print("Watchdog check failed:", e)
+
+    def check(self, now):
+        for instance in self.supervisor.instances():
+            if self.advisor is not None and not instance.stop_requested:
+                self.advisor.harvest(instance)
+                target = self.advisor.switch_target(instance)
+                if target:
+                    instance.switch_mode(target, f"{instance.mode()} daily cap reached")
+                    continue
+            if self.rotator is not None and not instance.stop_requested:
+                busy = {other.profile() for other in self.supervisor.instances() if other is not instance and other.active()}
+                target = self.rotator.switch_target(instance, busy)
+                if target:
+                    instance.switch_profile(*target)
+                    continue
+            policy = instance.restart_policy
+            if policy is None or instance.stop_requested:
+                continue
+            if instance.restart_at is not None:
+                if now >= instance.restart_at and not instance.running():
+                    instance.restart()
+                continue
+            if not instance.running():
+                continue
+            reason = instance.stall_reason(now)
+            if reason:
+                instance.schedule_restart(reason)
+                process = instance.process
+                if process is not None:
+                    shutdown_miner(process, instance.settings['api_url'], instance.settings['private_key'])
+            elif policy.failures and now - instance.started_at > RESTART_HEALTHY_SECONDS:
+                policy.failures = 0
+        for instance, workers, reason in self.throttle.plan(self.supervisor.instances(), now):
+            instance.set_workers(workers, reason)
+
+
+class Supervisor:
+    """Registry of the miner instances of this GUI, keyed by name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instances = {}
+
+    def add(self, instance):
+        with self._lock:
+            current = self._instances.get(instance.name)
+            if current is not None and current is not instance and current.running():
+                raise RuntimeError(f"'{instance.name}' is already running")
+            for other in self._instances.values():
+                if other is not instance and other.running() and other.profile() == instance.profile():
+                    raise RuntimeError(f"'{instance.profile()}' is already running as '{other.name}'")
+            self._instances[instance.name] = instance
+
+    def get(self, name):
+        with self._lock:
+            return self._instances.get(name)
+
+    def instances(self):
+        with self._lock:
+            return list(self._instances.values())
+
+    def aggregate(self):
+        """Summed telemetry of all running instances."""
+        total = {'running': 0, 'current': 0.0, 'average': 0.0, 'solutions': 0, 'accepted': 0, 'rejected': 0}
+        for instance in self.instances():
+            if not instance.running():
+                continue
+            snap = instance.telemetry.snapshot()
+            total['running'] += 1
+            for key in ('current', 'average', 'solutions', 'accepted', 'rejected'):
+                total[key] += snap[key]
+        return total
+
+
+def _worker_count(threads):
+    try:
+        workers = int(threads)
+    except (TypeError, ValueError):
+        workers = 0
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def _proc_cpu_ticks(pid):
+    """utime + stime of a process (all its threads) in clock ticks, from /proc."""
+    with open(f'/proc/{pid}/stat', 'r') as file:
+        fields = file.read().rsplit(')', 1)[1].split()
+    return int(fields[11]) + int(fields[12])
+
+
+class SystemLoad:
+    """CPU cores kept busy by everything except the miners, smoothed over the samples.
+
+    Linux compares /proc/stat with the miners' own CPU time; other Unixes subtract the miners'
+    workers from the 1-minute load average. Where neither exists there is no reading (None).
+    """
+
+    def __init__(self, smoothing=THROTTLE_SMOOTHING):
+        self.smoothing = smoothing
+        self.value = None
+        self._prev = None
+
+    def sample(self, miners):
+        """miners is a list of (pid, workers) of the running miners. Returns the smoothed load in cores, or None."""
+        if os.path.exists('/proc/stat'):
+            raw = self._proc_stat([pid for pid, _ in miners])
+        elif hasattr(os, 'getloadavg'):
+            raw = max(0.0, os.getloadavg()[0] - sum(workers for _, workers in miners))
+        else:
+            raw = None
+        if raw is not None:
+            self.value = raw if self.value is None else self.value + self.smoothing * (raw - self.value)
+        return self.value
+
+    def _proc_stat(self, pids):
+        try:
+            with open('/proc/stat', 'r') as file:
+                ticks = [int(n) for n in file.readline().split()[1:9]]
+            miner = sum(_proc_cpu_ticks(pid) for pid in pids)
+        except (OSError, ValueError, IndexError):
+            return None
+        total = sum(ticks)
+        busy = total - ticks[3] - ticks[4]  # minus idle and iowait
+        prev, self._prev = self._prev, (total, busy, miner, frozenset(pids))
+        # A miner that (re)started in between makes the difference meaningless.
+        if prev is None or prev[3] != frozenset(pids) or total <= prev[0]:
+            return None
+        share = (busy - prev[1] - (miner - prev[2])) / (total - prev[0])
+        return max(0.0, share * (os.cpu_count() or 1))
+
+
+def user_idle_seconds():
+    """Seconds since the last keyboard/mouse input, or None where that can't be found out."""
+    try:
+        if os.name == 'nt':
+            import ctypes
+
+            class LASTINPUTINFO(ctypes.Structure):
+                _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+
+            info = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO), 0)
+            if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+                return None
+            return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
+        if sys.platform == 'darwin':
+            out = subprocess.run(['ioreg', '-c', 'IOHIDSystem'], capture_output=True, text=True, timeout=5).stdout
+            m = re.search(r'"HIDIdleTime" = (\d+)', out)
+            return int(m.group(1)) / 1e9 if m else None
+        if os.environ.get('DISPLAY') and shutil.which('xprintidle'):
+            out = subprocess.run(['xprintidle'], capture_output=True, text=True, timeout=5).stdout
+            return int(out.strip()) / 1000.0
+    except (OSError, ValueError, AttributeError, subprocess.SubprocessError):
+        pass
+    return None
+
+
+_DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+_SCHEDULE_RE = re.compile(r'(?i)^(?:([a-z]{3})(?:-([a-z]{3}))?\s+)?(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\d+)$')
+
+
+def parse_schedule(text):
+    """Parse 'mon-fri 09:00-18:00=2; 22:00-06:00=8' into (weekdays, start, end, workers) windows.
+
+    start/end are minutes since midnight; a window may run past midnight. Raises ValueError.
+    """
+    windows = []
+    for entry in re.split(r'[;,]', text or ''):
+        entry = entry.strip()
+        if not entry:
+            continue
+        m = _SCHEDULE_RE.match(entry)
+        days = [d.lower() if d else None for d in m.group(1, 2)] if m else []
+        if not m or any(d is not None and d not in _DAYS for d in days):
+            raise ValueError(f"Invalid schedule entry '{entry}' (expected e.g. 'mon-fri 09:00-18:00=2')")
+        first, last = (_DAYS.index(d) if d else None for d in days)
+        if first is None:
+            weekdays = frozenset(range(7))
+        else:
+            weekdays = frozenset((first + i) % 7 for i in range(((last if last is not None else first) - first) % 7 + 1))
+        h1, m1, h2, m2, workers = (int(n) for n in m.group(3, 4, 5, 6, 7))
+        if h1 > 24 or h2 > 24 or m1 > 59 or m2 > 59 or workers < 1:
+            raise ValueError(f"Invalid schedule entry '{entry}' (times are HH:MM, workers at least 1)")
+        windows.append((weekdays, h1 * 60 + m1, h2 * 60 + m2, workers))
+    return windows
+
+
+def scheduled_workers(windows, when=None):
+    """Worker cap of the first window covering local time `when` (default now), or None."""
+    t = time.localtime(when)
+    minute = t.tm_hour * 60 + t.tm_min
+    for weekdays, start, end, workers in windows:
+        if start <= end:
+            if t.tm_wday in weekdays and start <= minute < end:
+                return workers
+        elif (t.tm_wday in weekdays and minute >= start) or ((t.tm_wday - 1) % 7 in weekdays and minute < end):
+            return workers
+    return None
+
+
+def renice_miner(process, nice):
+    """Lower the priority of every thread in the miner's process group (Unix). Returns False if it failed."""
+    if not hasattr(os, 'setpriority'):
+        return False
+    try:
+        os.setpriority(os.PRIO_PGRP, os.getpgid(process.pid), nice)
+        return True
+    except OSError:
+        return False
+
+
+class Throttle:
+    """Picks worker counts for running miners whose profile enables throttling (see THROTTLE_*).
+
+    A miner gets its profile's workers, capped by the schedule window in effect, by
+    throttle_min_workers while the user is active (throttle_idle_seconds), and by the cores other
+    work leaves free. Several throttled miners share those cores in proportion to their workers.
+    """
+
+    def __init__(self, load=None):
+        self.load = load if load is not None else SystemLoad()
+        self._pending = {}  # name -> (direction, since)
+        self._changed = {}  # name -> when its worker count last changed
+        self._reniced = {}  # name -> pid re-niced to THROTTLE_NICE while its restart waits
+
+    def plan(self, instances, now):
+        """[(instance, workers, reason)] for the miners whose worker count should change now."""
+        instances = [i for i in instances
+                     if i.settings.get('throttle') and not i.stop_requested and i.running() and i.process is not None]
+        if not instances:
+            return []
+        load = self.load.sample([(i.process.pid, i.workers()) for i in instances])
+        bases = {i.name: i.base_workers() for i in instances}
+        total = sum(bases.values())
+        idle = None
+        if any(_int_setting(i.settings, 'throttle_idle_seconds', 0) for i in instances):
+            idle = user_idle_seconds()
+        changes = []
+        for instance in instances:
+            s = instance.settings
+            base = bases[instance.name]
+            minimum = min(base, max(1, _int_setting(s, 'throttle_min_workers', 1)))
+            target, reason = base, "load is low"
+            try:
+                cap = scheduled_workers(parse_schedule(s.get('throttle_schedule')))
+            except ValueError:
+                cap = None
+            if cap is not None and cap < target:
+                target, reason = cap, "schedule"
+            idle_limit = _int_setting(s, 'throttle_idle_seconds', 0)
+            if idle is not None and idle_limit and idle < idle_limit and minimum < target:
+                target, reason = minimum, f"user active ({idle:.0f}s since last input)"
+            if load is not None:
+                free = math.ceil(((os.cpu_count() or 1) - load - THROTTLE_HEADROOM) * base / total)
+                if free < target:
+                    target, reason = free, f"other load {load:.1f} cores"
+            target = max(minimum, target)
+            changes.extend(self._settle(instance, target, reason, now))
+        return changes
+
+    def _settle(self, instance, target, reason, now):
+        """Hysteresis: only act on a verdict that held for a while, and not too often."""
+        current = instance.workers()
+        if target >= current:
+            self._restore_nice(instance)
+        if target == current:
+            self._pending.pop(instance.name, None)
+            return []
+        direction = -1 if target < current else 1
+        pending = self._pending.get(instance.name)
+        if pending is None or pending[0] != direction:
+            self._pending[instance.name] = (direction, now)
+            return []
+        hold = THROTTLE_DOWN_SECONDS if direction < 0 else THROTTLE_UP_SECONDS
+        if now - pending[1] < hold:
+            return []
+        if now - self._changed.get(instance.name, now - THROTTLE_MIN_SECONDS) < THROTTLE_MIN_SECONDS:
+            if direction < 0 and self._reniced.get(instance.name) != instance.process.pid:
+                # The verdict held but the last restart was too recent; give way until the next one.
+                self._reniced[instance.name] = instance.process.pid
+                if renice_miner(instance.process, THROTTLE_NICE):
+                    instance.log.put(f"[throttle] {reason}; lowered the miner's CPU priority\n")
+            return []
+        self._pending.pop(instance.name, None)
+        self._changed[instance.name] = now
+        self._reniced.pop(instance.name, None)  # the restarted miner gets its profile's nice again
+        return [(instance, target, reason)]
+
+    def _restore_nice(self, instance):
+        """Undo a THROTTLE_NICE renice of the running miner, back to its profile's nice."""
+        if self._reniced.pop(instance.name, None) != instance.process.pid:
+            return  # not re-niced, or the miner has restarted since
+        nice = _int_setting(instance.settings, 'nice', 0)
+        if renice_miner(instance.process, nice):
+            instance.log.put(f"[throttle] Load is back down; restored the miner's CPU priority (nice {nice})\n")
+        else:
+            instance.log.put(f"[!] Could not restore the miner's CPU priority to nice {nice}; "
+                             f"it stays at {THROTTLE_NICE} until the miner restarts.\n")
+
+
+def _int_setting(settings, key, default):
+    try:
+        return int(settings.get(key) or default)
+    except ValueError:
+        return default
+
+
+def default_miner_path():
+    """Default miner path for manual mode. If a local miner is in the same folder, prefer it; else empty."""
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        # Prefer a simple local name if user placed it next to the GUI.
+        candidates = ['hcc_miner.exe', 'hcc_miner', 'faucet_miner.exe', 'faucet_miner']
+        for name in candidates:
+            candidate = os.path.join(script_dir, name)
+            if os.path.exists(candidate):
+                return candidate
+    except Exception:
+        pass
+    # Empty means: rely on auto-download or PATH.
+    return ''
+
+
+def resolve_miner_exe(p):
+    """Resolve a miner path. If empty, use default. If relative, try script dir first, then PATH."""
+    p = (p or '').strip()
+    if not p:
+        p = default_miner_path() or 'hcc_miner.exe' if os.name == 'nt' else 'hcc_miner'
+
+    # If relative, try script directory.
+    if not os.path.isabs(p):
+        try:
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            candidate = os.path.join(script_dir, p)
+            if os.path.exists(candidate):
+                return candidate
+        except Exception:
+            pass
+
+        # Try PATH
+        which = shutil.which(p)
+        if which:
+            return which
+
+    return p
+
+
+GITHUB_OWNER = "Hashcash-PoW-Faucet"
+GITHUB_REPO = "HCC-CLI-Miner"
+# GitHub API base; HCC_GITHUB_API points release lookups elsewhere (e.g. the stub server in bench/)
+GITHUB_API = os.environ.get('HCC_GITHUB_API', 'https://api.github.com').rstrip('/')
+
+
+def app_data_dir():
+    """Cross-platform per-user data dir."""
+    # Windows
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'HashcashMiner')
+    # macOS
+    if platform.system().lower() == 'darwin':
+        return os.path.join(os.path.expanduser('~'), 'Library', 'Application Support', 'HashcashMiner')
+    # Linux/Unix
+    xdg = os.environ.get('XDG_DATA_HOME')
+    if xdg:
+        return os.path.join(xdg, 'hashcashminer')
+    return os.path.join(os.path.expanduser('~'), '.local', 'share', 'hashcashminer')
+
+
+def detect_os_arch():
+    """Map current OS/arch to the release asset naming scheme."""
+    sys = platform.system().lower()
+    mach = platform.machine().lower()
+
+    # OS mapping
+    if sys.startswith('win'):
+        os_id = 'win'
+        ext = '.exe'
+    elif sys == 'darwin':
+        os_id = 'mac'
+        ext = ''
+    else:
+        os_id = 'linux'
+        ext = ''
+
+    # Arch mapping
+    # Prefer pointer size to detect 32-bit python on x86
+    ptr_bits = struct.calcsize('P') * 8
+
+    if mach in ('x86_64', 'amd64'):
+        arch = 'amd64' if ptr_bits == 64 else '386'
+    elif mach in ('i386', 'i686', 'x86'):
+        arch = '386'
+    elif mach in ('arm64', 'aarch64'):
+        arch = 'arm64'
+    elif mach.startswith('armv6') or mach == 'armv6l':
+        arch = 'armv6'
+    elif mach.startswith('armv7') or mach == 'armv7l':
+        arch = 'armv7'
+    else:
+        raise RuntimeError(f"Unsupported architecture: {platform.machine()}")
+
+    return os_id, arch, ext
+
+
+def sha256_file(path, h=None):
+    import hashlib
+    h = h or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Shared HTTP client: connection pool size and retries of a request on connection errors / 5xx
+HTTP_POOL_SIZE = 8
+HTTP_RETRIES = 3
+HTTP_BACKOFF_BASE = 0.5  # seconds, doubled per retry
+HTTP_RETRY_STATUSES = (500, 502, 503, 504)
+
+# Extra places to fetch release assets from, tried after GitHub, e.g.
+# HCC_ASSET_MIRRORS="https://mirror.example.org/hcc/{tag}/{name}"
+ASSET_MIRRORS = os.environ.get('HCC_ASSET_MIRRORS', '').split()
+
+
+class HttpClient:
+    """One requests.Session for all GitHub and faucet calls: keep-alive pooling, retries and per-endpoint stats.
+
+    Connection errors, timeouts and 5xx responses are retried with jittered exponential backoff.
+    Stats are kept per endpoint name (the host unless given): calls, errors, retries and latency.
+    """
+
+    def __init__(self, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF_BASE):
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    @property
+    def session(self):
+        """The requests.Session, created on the first request."""
+        with self._lock:
+            if self._session is None:
+                import requests
+                import requests.adapters
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
+            return self._session
+
+    def _record(self, endpoint, seconds, error=False, retry=False):
+        with self._lock:
+            st = self.stats.setdefault(endpoint, {'calls': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0, 'last_seconds': 0.0})
+            st['calls'] += 1
+            st['errors'] += error
+            st['retries'] += retry
+            st['seconds'] += seconds
+            st['last_seconds'] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(st) for endpoint, st in self.stats.items()}
+
+    def request(self, method, url, endpoint=None, retries=None, cancel_event=None, **kwargs):
+        """Like requests.request. The response of the last attempt is returned even if it is a 5xx."""
+        import requests
+        endpoint = endpoint or urllib.parse.urlsplit(url).netloc
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise TaskCancelled()
+            started = time.monotonic()
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, time.monotonic() - started, error=True, retry=attempt > 0)
+                if attempt == retries:
+                    raise
+            else:
+                failed = r.status_code in HTTP_RETRY_STATUSES
+                self._record(endpoint, time.monotonic() - started, error=failed or r.status_code >= 400,
+                             retry=attempt > 0)
+                if not failed or attempt == retries:
+                    return r
+                r.close()
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+http_client = HttpClient()
+
+
+# Streaming download settings
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_ATTEMPTS = 4
+DOWNLOAD_PROGRESS_INTERVAL = 0.2  # seconds between progress callbacks
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024.0
+
+
+def download_file(url, dest, expected_size=None, progress_fn=None, log_fn=None, cancel_event=None):
+    """Stream url into dest and return the SHA256 of the complete file.
+
+    Chunks are written straight to disk and hashed on the way, so the file is never held in
+    memory or read back. A partial dest left by an earlier attempt is resumed with an HTTP
+    Range request; connection errors mid-transfer are retried the same way.
+    progress_fn(done_bytes, total_bytes_or_None) is called at most every DOWNLOAD_PROGRESS_INTERVAL.
+    Setting cancel_event aborts the transfer with TaskCancelled (the partial file is kept).
+    """
+    import hashlib
+    import requests
+    if expected_size is not None:
+        expected_size = int(expected_size)
+
+    h = hashlib.sha256()
+    done = os.path.getsize(dest) if os.path.exists(dest) else 0
+    if expected_size is not None and done > expected_size:
+        done = 0
+    if done:
+        # Hash what we already have once; everything after that is hashed while writing.
+        sha256_file(dest, h)
+        if done == expected_size:
+            return h.hexdigest()
+
+    last_progress = 0.0
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise TaskCancelled()
+        headers = {'Range': f'bytes={done}-'} if done else {}
+        try:
+            # Connection errors are resumed by this loop; the client only retries 5xx once.
+            with http_client.get(url, endpoint='download', headers=headers, stream=True, timeout=(10, 60),
+                                 retries=1, cancel_event=cancel_event) as r:
+                if done and r.status_code == 206 and r.headers.get('Content-Range', '').startswith(f'bytes {done}-'):
+                    mode = 'ab'
+                    if log_fn and attempt == 1:
+                        log_fn(f"[*] Resuming download at {format_bytes(done)}\n")
+                else:
+                    r.raise_for_status()
+                    # Server ignored the Range header: start over.
+                    done = 0
+                    h = hashlib.sha256()
+                    mode = 'wb'
+
+                total = expected_size
+                if total is None and r.headers.get('Content-Length'):
+                    total = done + int(r.headers['Content-Length'])
+
+                with open(dest, mode) as f:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise TaskCancelled()
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        h.update(chunk)
+                        done += len(chunk)
+                        now = time.monotonic()
+                        if progress_fn and now - last_progress >= DOWNLOAD_PROGRESS_INTERVAL:
+                            last_progress = now
+                            progress_fn(done, total)
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == DOWNLOAD_ATTEMPTS:
+                raise
+            if log_fn:
+                log_fn(f"[!] Download interrupted at {format_bytes(done)} ({e}); resuming...\n")
+            delay = min(2 ** attempt, 10)
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+    if progress_fn:
+        progress_fn(done, total)
+    if expected_size is not None and done != expected_size:
+        raise RuntimeError(f"Incomplete download: got {done} of {expected_size} bytes")
+    return h.hexdigest()
+
+
+# Release metadata is cached on disk and only revalidated with GitHub once per TTL.
+RELEASE_CACHE_TTL = 3600  # seconds
+
+
+def release_cache_path():
+    return os.path.join(app_data_dir(), 'release_cache.json')
+
+
+def load_release_cache():
+    try:
+        with open(release_cache_path(), 'r') as file:
+            cache = json.load(file)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_release_cache(cache):
+    path = release_cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as file:
+        json.dump(cache, file, indent=4)
+    os.replace(tmp, path)
+
+
+def github_latest_release(log_fn=None):
+    """Return the latest release JSON, served from the on-disk cache while it is fresh.
+
+    A stale entry is revalidated with If-None-Match (a 304 does not count against GitHub's
+    rate limit). If GitHub is unreachable or rate limits us, the stale entry is used instead.
+    """
+    return github_release(None, log_fn)
+
+
+def github_release(tag=None, log_fn=None):
+    """Release JSON for a tag (None = latest); see github_latest_release. Tagged releases are cached for good."""
+    import requests
+    if tag:
+        url = f"{GITHUB_API}/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/tags/{tag}"
+    else:
+        url = f"{GITHUB_API}/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
+    cache = load_release_cache()
+    entry = cache.get(url)
+    now = time.time()
+    if entry and (tag or now - entry.get('fetched_at', 0) < RELEASE_CACHE_TTL):
+        return entry['release']
+
+    headers = {'Accept': 'application/vnd.github+json'}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    try:
+        r = http_client.get(url, endpoint='github_api', headers=headers, timeout=(5, 10))
+        if r.status_code == 304 and entry:
+            entry['fetched_at'] = now
+            save_release_cache(cache)
+            return entry['release']
+        r.raise_for_status()
+        release = r.json()
+    except (requests.RequestException, ValueError) as e:
+        if not entry:
+            raise
+        if log_fn:
+            log_fn(f"[!] GitHub release lookup failed ({e}); using cached release info for {entry['release'].get('tag_name', '?')}\n")
+        return entry['release']
+
+    cache[url] = {'etag': r.headers.get('ETag'), 'fetched_at': now, 'release': release}
+    try:
+        save_release_cache(cache)
+    except OSError:
+        pass
+    return release
+
+
+def version_key(tag):
+    """Sort key for release tags like v1.2.10."""
+    return tuple(int(n) for n in re.findall(r'\d+', tag))
+
+
+def miner_asset_name(tag):
+    """Release asset name of the miner for this OS/arch."""
+    os_id, arch, ext = detect_os_arch()
+    version = tag[1:] if tag.startswith('v') else tag
+    return f"hcc_miner_{os_id}_{arch}_{version}{ext}"
+
+
+def cached_versions():
+    """Miners for this OS/arch under app_data_dir()/bin, newest first: dicts with tag, path and size in bytes."""
+    bin_root = os.path.join(app_data_dir(), 'bin')
+    try:
+        tags = sorted(os.listdir(bin_root), key=version_key, reverse=True)
+    except OSError:
+        return []
+    versions = []
+    for tag in tags:
+        path = os.path.join(bin_root, tag, miner_asset_name(tag))
+        if os.path.isfile(path):
+            size = sum(os.path.getsize(os.path.join(bin_root, tag, f)) for f in os.listdir(os.path.join(bin_root, tag)))
+            versions.append({'tag': tag, 'path': path, 'size': size})
+    return versions
+
+
+def newest_cached_miner():
+    """Path of the newest miner binary for this OS/arch already under app_data_dir()/bin, or None."""
+    versions = cached_versions()
+    return versions[0]['path'] if versions else None
+
+
+def pinned_versions():
+    """Tags pinned by any saved profile."""
+    try:
+        profiles = read_config().get("Profile", {})
+    except (OSError, ValueError):
+        return set()
+    return {p.get('miner_version').strip() for p in profiles.values() if (p.get('miner_version') or '').strip()}
+
+
+def prune_versions(keep=None, max_bytes=None, protect=(), log_fn=None):
+    """Delete cached miner versions beyond the newest `keep`, then oldest first until they fit in max_bytes.
+
+    Pinned tags and those in `protect` (e.g. running miners) are never deleted. Returns the deleted tags.
+    """
+    protect = set(protect) | pinned_versions()
+    versions = cached_versions()
+    doomed = []
+    if keep is not None:
+        doomed = [v for v in versions[keep:] if v['tag'] not in protect]
+    if max_bytes is not None:
+        total = sum(v['size'] for v in versions if v not in doomed)
+        for v in reversed(versions):
+            if total <= max_bytes:
+                break
+            if v['tag'] not in protect and v not in doomed:
+                doomed.append(v)
+                total -= v['size']
+    removed = []
+    for v in doomed:
+        try:
+            shutil.rmtree(os.path.dirname(v['path']))
+        except OSError as e:
+            if log_fn:
+                log_fn(f"[!] Could not delete miner {v['tag']}: {e}\n")
+            continue
+        removed.append(v['tag'])
+        if log_fn:
+            log_fn(f"[*] Deleted miner {v['tag']} ({format_bytes(v['size'])})\n")
+    return removed
+
+
+def find_asset(release_json, asset_name):
+    for a in release_json.get('assets', []):
+        if a.get('name') == asset_name:
+            return a
+    return None
+
+
+# Names of checksum files some releases publish next to the binaries
+_CHECKSUM_ASSET_RE = re.compile(r'(?i)(checksums?|sha256sums?)(\.txt)?$|\.sha256$')
+_CHECKSUM_LINE_RE = re.compile(r'^([0-9a-fA-F]{64})\s+\*?(\S+)\s*$')
+
+
+def published_sha256(release_json, asset_name, log_fn=None):
+    """SHA256 the release publishes for an asset, None if it publishes none, or '' if a checksum file couldn't be fetched.
+
+    Uses the asset's own "digest" field ("sha256:<hex>") when GitHub provides it, otherwise a
+    checksum asset (checksums.txt, SHA256SUMS, <asset>.sha256, ...) in sha256sum format.
+    """
+    import requests
+    asset = find_asset(release_json, asset_name) or {}
+    digest = asset.get('digest') or ''
+    if digest.lower().startswith('sha256:'):
+        return digest[7:].lower()
+
+    unavailable = False
+    for a in release_json.get('assets', []):
+        name = a.get('name') or ''
+        url = a.get('browser_download_url')
+        if not url or not _CHECKSUM_ASSET_RE.search(name):
+            continue
+        try:
+            r = http_client.get(url, endpoint='download', timeout=(5, 10))
+            r.raise_for_status()
+        except requests.RequestException as e:
+            if log_fn:
+                log_fn(f"[!] Could not fetch {name}: {e}\n")
+            unavailable = True
+            continue
+        for line in r.text.splitlines():
+            m = _CHECKSUM_LINE_RE.match(line.strip())
+            if m and os.path.basename(m.group(2)) == asset_name:
+                return m.group(1).lower()
+            if name == asset_name + '.sha256' and re.fullmatch(r'[0-9a-fA-F]{64}', line.strip()):
+                return line.strip().lower()
+    return '' if unavailable else None
+
+
+def verify_cache_path():
+    return os.path.join(app_data_dir(), 'verify_cache.json')
+
+
+def _file_key(st):
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def load_verify_cache():
+    try:
+        with open(verify_cache_path(), 'r') as file:
+            cache = json.load(file)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def remember_sha256(path, sha256):
+    """Record the SHA256 of path for its current size/mtime/inode."""
+    cache = load_verify_cache()
+    cache[os.path.abspath(path)] = {'key': _file_key(os.stat(path)), 'sha256': sha256}
+    tmp = verify_cache_path() + '.tmp'
+    try:
+        with open(tmp, 'w') as file:
+            json.dump(cache, file, indent=4)
+        os.replace(tmp, verify_cache_path())
+    except OSError:
+        pass
+
+
+def quarantine_file(path, log_fn=None):
+    """Move a binary that failed verification out of the way (into app_data_dir()/quarantine)."""
+    qdir = os.path.join(app_data_dir(), 'quarantine')
+    os.makedirs(qdir, exist_ok=True)
+    dest = os.path.join(qdir, f"{os.path.basename(path)}.{time.strftime('%Y%m%d-%H%M%S')}")
+    os.replace(path, dest)
+    if log_fn:
+        log_fn(f"[!] Quarantined {os.path.basename(path)} -> {dest}\n")
+    return dest
+
+
+def ensure_latest_miner(log_fn, progress_fn=None, cancel_event=None, tag=None):
+    """Download the latest miner binary (or the pinned release `tag`) for this OS/arch into app data dir and return its path.
+
+    Only an unpinned miner falls back to another cached version when GitHub or the download fails.
+    """
+    import requests
+    pinned = tag
+    try:
+        with diagnostics.stage('release lookup'):
+            rel = github_release(pinned, log_fn)
+    except Exception as e:
+        # Offline and nothing cached about releases: fall back to a binary we downloaded earlier.
+        cached = newest_cached_miner() if not pinned else next(
+            (v['path'] for v in cached_versions() if v['tag'] == pinned), None)
+        if not cached:
+            raise
+        log_fn(f"[!] Could not look up the {pinned or 'latest'} miner release ({e}); using cached miner: {cached}\n")
+        return cached
+    tag = rel.get('tag_name', '')
+    _, _, ext = detect_os_arch()
+    asset_name = miner_asset_name(tag)
+
+    asset = find_asset(rel, asset_name)
+    if not asset:
+        raise RuntimeError(f"No matching asset in release {tag}: {asset_name}")
+
+    download_url = asset.get('browser_download_url')
+    if not download_url:
+        raise RuntimeError('Missing download URL for asset')
+    download_urls = [download_url] + [m.format(tag=tag, name=asset_name) for m in ASSET_MIRRORS]
+
+    base = app_data_dir()
+    bin_dir = os.path.join(base, 'bin', tag)
+    os.makedirs(bin_dir, exist_ok=True)
+    local_path = os.path.join(bin_dir, asset_name)
+
+    expected_size = asset.get('size')
+    expected_sha = None
+    if os.path.exists(local_path):
+        local_size = os.path.getsize(local_path)
+
+        # If the cached file size doesn't match the GitHub asset size, re-download.
+        if expected_size is not None and int(local_size) != int(expected_size):
+            log_fn(f"[!] Cached miner size mismatch (local={local_size} bytes, expected={expected_size} bytes). Re-downloading...\n")
+            quarantine_file(local_path, log_fn)
+        else:
+            entry = load_verify_cache().get(os.path.abspath(local_path))
+            if not (entry and entry.get('key') == _file_key(os.stat(local_path))):
+                # New or changed since it was last verified: hash it and check the published checksum.
+                with diagnostics.stage('verify'):
+                    h = sha256_file(local_path)
+                    log_fn(f"[*] Cached miner SHA256: {h}\n")
+                    expected_sha = published_sha256(rel, asset_name, log_fn)
+                if expected_sha and h != expected_sha:
+                    log_fn(f"[!] Cached miner SHA256 does not match the published checksum {expected_sha}. Re-downloading...\n")
+                    quarantine_file(local_path, log_fn)
+                elif expected_sha == '':
+                    log_fn("[!] Could not check the cached miner against the published checksum; checking again next time.\n")
+                else:
+                    remember_sha256(local_path, h)
+            if os.path.exists(local_path):
+                log_fn(f"[*] Using cached miner: {local_path}\n")
+                return local_path
+
+    log_fn(f"[*] Downloading latest miner: {asset_name}\n")
+    # The .tmp file is kept on failure so the next attempt can resume it.
+    tmp = local_path + '.tmp'
+    try:
+        for i, url in enumerate(download_urls):
+            try:
+                with diagnostics.stage('download'):
+                    h = download_file(url, tmp, expected_size=expected_size, progress_fn=progress_fn, log_fn=log_fn,
+                                      cancel_event=cancel_event)
+                break
+            except (requests.RequestException, RuntimeError) as e:
+                if i == len(download_urls) - 1:
+                    raise
+                log_fn(f"[!] Download from {urllib.parse.urlsplit(url).netloc} failed ({e}); trying "
+                       f"{urllib.parse.urlsplit(download_urls[i + 1]).netloc}...\n")
+        with diagnostics.stage('verify'):
+            expected_sha = expected_sha or published_sha256(rel, asset_name, log_fn)
+        if expected_sha and h != expected_sha:
+            quarantine_file(tmp, log_fn)
+            raise RuntimeError(f"downloaded miner SHA256 {h} does not match the published checksum {expected_sha}")
+    except TaskCancelled:
+        raise
+    except Exception as e:
+        cached = newest_cached_miner()
+        if not cached or pinned:
+            raise
+        log_fn(f"[!] Download failed ({e}); using cached miner: {cached}\n")
+        return cached
+    os.replace(tmp, local_path)
+
+    # Make executable on unix
+    if ext == '':
+        st = os.stat(local_path)
+        os.chmod(local_path, st.st_mode | stat.S_IEXEC)
+    if expected_sha != '':
+        # Only a verified (or unpublished) checksum lets later starts skip the check.
+        remember_sha256(local_path, h)
+
+    log_fn(f"[*] Downloaded miner SHA256: {h}" + (" (matches published checksum)" if expected_sha else "") + "\n")
+    log_fn(f"[+] Miner ready: {local_path}\n")
+    return local_path
+
+
+def build_miner_command(miner_exe, api_url, private_key, threads, extreme=False, potato=False):
+    # IMPORTANT (Go flag parsing): pass bool/int flags using = syntax.
+    # Do NOT pass bool flags as `-progress true` because the `true` becomes a positional arg
+    # and Go's flag parser may stop parsing further flags (e.g. `-extreme`).
+    command = [
+        miner_exe,
+        "-url", api_url,
+        "-key", private_key,
+        "-workers", str(threads),
+        "-progress=true",
+        "-progress-interval=2",
+    ]
+    if extreme:
+        command.append("-extreme")
+    if potato:
+        command.append("-potato")
+    return command
+
+
+def machine_key():
+    """Identifies this machine for per-machine tuning results."""
+    try:
+        os_id, arch, _ = detect_os_arch()
+    except RuntimeError:
+        os_id, arch = platform.system().lower(), platform.machine().lower()
+    return f"{platform.node()}/{os_id}_{arch}/{os.cpu_count() or 1}cpu"
+
+
+def miner_version_from_path(path):
+    """Release tag of a miner downloaded into app_data_dir()/bin/<tag>, or 'custom' for other binaries."""
+    parent = os.path.dirname(os.path.abspath(path))
+    if os.path.dirname(parent) == os.path.abspath(os.path.join(app_data_dir(), 'bin')):
+        return os.path.basename(parent)
+    return 'custom'
+
+
+def worker_candidates(cpu_count):
+    """Worker counts worth trying: a spread from a quarter of the cores up to all of them."""
+    counts = {cpu_count, cpu_count - 1, cpu_count * 3 // 4, cpu_count // 2, cpu_count // 4}
+    return sorted(n for n in counts if n >= 1)
+
+
+def run_trial(command, seconds, warmup, cancel_event=None, affinity=None):
+    """Run the miner for `seconds` and return its average hashrate after `warmup` (0.0 if none was reported)."""
+    trial_telemetry = MinerTelemetry()
+    process = popen_miner(command, cpus=miner_cpus(affinity))
+
+    def _read():
+        for _lines, _live, updates in read_output(process.stdout):
+            for text in updates:
+                trial_telemetry.feed(text)
+
+    threading.Thread(target=_read, daemon=True).start()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline and process.poll() is None:
+            if cancel_event is not None:
+                if cancel_event.wait(0.5):
+                    raise TaskCancelled()
+            else:
+                time.sleep(0.5)
+    finally:
+        terminate_miner(process)
+
+    steady = [rate for t, rate in trial_telemetry.snapshot()['samples'] if t - trial_telemetry.started >= warmup]
+    return sum(steady) / len(steady) if steady else 0.0
+
+
+def tune_workers(settings, candidates, log_fn, progress_fn=None, cancel_event=None,
+                 trial_seconds=TUNE_TRIAL_SECONDS, warmup=TUNE_WARMUP_SECONDS):
+    """Mine briefly with each candidate worker count and return (best_count, {count: hashrate})."""
+    results = {}
+    for i, workers in enumerate(candidates):
+        if progress_fn:
+            progress_fn(i, len(candidates), workers)
+        log_fn(f"[*] Tuning: trial {i + 1}/{len(candidates)} with {workers} worker(s)...\n")
+        command = build_miner_command(settings['miner_exe'], settings['api_url'], settings['private_key'], workers,
+                                      settings['extreme'], settings['potato'])
+        try:
+            results[workers] = run_trial(command, trial_seconds, warmup, cancel_event, settings.get('affinity'))
+        finally:
+            # Don't leave the trial's challenge pending on the faucet.
+            best_effort_cancel_pow(settings['api_url'], settings['private_key'])
+        log_fn(f"[*] Tuning: {workers} worker(s) -> {format_hashrate(results[workers])}\n")
+    if progress_fn:
+        progress_fn(len(candidates), len(candidates), None)
+
+    best = max(results, key=results.get)
+    if results[best] <= 0:
+        raise RuntimeError("The miner reported no hashrate during tuning")
+    return best, results
+
+
+def benchmark_versions(settings, tags, log_fn, progress_fn=None, cancel_event=None,
+                       trial_seconds=TUNE_TRIAL_SECONDS, warmup=TUNE_WARMUP_SECONDS):
+    """A/B benchmark: mine with each release tag in turn (A, B, B, A) and return {tag: average hashrate}.
+
+    Both versions run with the profile's worker count, mode and affinity; missing binaries are downloaded first.
+    """
+    paths = {tag: ensure_latest_miner(log_fn, None, cancel_event, tag=tag) for tag in tags}
+    order = list(tags) + list(reversed(tags))
+    rates = {tag: [] for tag in tags}
+    for i, tag in enumerate(order):
+        if progress_fn:
+            progress_fn(i, len(order), tag)
+        log_fn(f"[*] Benchmark: trial {i + 1}/{len(order)} with miner {tag}...\n")
+        command = build_miner_command(paths[tag], settings['api_url'], settings['private_key'], settings['threads'],
+                                      settings['extreme'], settings['potato'])
+        try:
+            rate = run_trial(command, trial_seconds, warmup, cancel_event, settings.get('affinity'))
+        finally:
+            best_effort_cancel_pow(settings['api_url'], settings['private_key'])
+        rates[tag].append(rate)
+        log_fn(f"[*] Benchmark: {tag} -> {format_hashrate(rate)}\n")
+    if progress_fn:
+        progress_fn(len(order), len(order), None)
+
+    results = {tag: sum(r) / len(r) for tag, r in rates.items()}
+    if not any(results.values()):
+        raise RuntimeError("The miner reported no hashrate during the benchmark")
+    return results
+
+
+def profile_settings(profile):
+    """Launch settings for a profile dict. miner_exe is None while it still has to be downloaded."""
+    miner_path = (profile.get('miner_path') or '').strip()
+    # A pinned version always comes from the releases, and so does anything that points into our own
+    # download folder (an earlier auto-download, not a manual choice).
+    needs_download = profile.get('auto_download', True) and (
+        not miner_path or (profile.get('miner_version') or '').strip() or miner_version_from_path(miner_path) != 'custom')
+    return {
+        'api_url': (profile.get('api_url') or '').strip(),
+        'private_key': (profile.get('private_key') or '').strip(),
+        'threads': str(profile.get('threads') or '').strip() or "0",
+        'extreme': bool(profile.get('extreme', False)),
+        'potato': bool(profile.get('potato', False)),
+        'affinity': (profile.get('affinity') or '').strip(),
+        'auto_restart': bool(profile.get('auto_restart', True)),
+        'stall_seconds': str(profile.get('stall_seconds', DEFAULT_STALL_SECONDS)).strip(),
+        'metrics_address': (profile.get('metrics_address') or '').strip(),
+        'miner_version': (profile.get('miner_version') or '').strip(),
+        'earnings': bool(profile.get('earnings', False)),
+        'earnings_path': (profile.get('earnings_path') or FAUCET_DEFAULT_PATH).strip(),
+        'auto_switch_mode': bool(profile.get('auto_switch_mode', False)),
+        'record': bool(profile.get('record', False)),
+        'throttle': bool(profile.get('throttle', False)),
+        'throttle_min_workers': str(profile.get('throttle_min_workers') or '1').strip(),
+        'throttle_schedule': (profile.get('throttle_schedule') or '').strip(),
+        'throttle_idle_seconds': str(profile.get('throttle_idle_seconds') or '0').strip(),
+        'nice': str(profile.get('nice') or '').strip(),
+        'io_priority': (profile.get('io_priority') or 'normal').strip(),
+        'cpu_quota': str(profile.get('cpu_quota') or '').strip().rstrip('%'),
+        'reserve_gui_core': bool(profile.get('reserve_gui_core', False)),
+        'rotate': bool(profile.get('rotate', False)),
+        'mode_model': mode_model(profile.get('mode_model')),
+        'miner_exe': None if needs_download else resolve_miner_exe(miner_path),
+    }
+
+
+def check_settings(settings):
+    """Return (message, status) describing the first problem with the settings, or None if they are usable."""
+    if not settings['private_key']:
+        return "ERROR: Please enter your private key.\n", "Error: Missing private key"
+    # Modes are mutually exclusive
+    if settings['extreme'] and settings['potato']:
+        return ("ERROR: EXTREME and POTATO mode cannot be enabled at the same time.\n",
+                "Error: Invalid mode selection")
+    try:
+        parse_cpu_list(settings.get('affinity'))
+    except ValueError:
+        return f"ERROR: Invalid CPU list: {settings['affinity']}\n", "Error: Invalid CPU affinity"
+    if not settings.get('stall_seconds', '0').isdigit():
+        return "ERROR: Stall timeout must be a number of seconds (0 = off).\n", "Error: Invalid stall timeout"
+    if not settings.get('throttle_min_workers', '1').isdigit() or int(settings.get('throttle_min_workers', '1')) < 1:
+        return "ERROR: Throttle minimum workers must be a number >= 1.\n", "Error: Invalid throttle settings"
+    if not settings.get('throttle_idle_seconds', '0').isdigit():
+        return "ERROR: Throttle idle time must be a number of seconds (0 = off).\n", "Error: Invalid throttle settings"
+    try:
+        parse_schedule(settings.get('throttle_schedule'))
+    except ValueError as e:
+        return f"ERROR: {e}\n", "Error: Invalid throttle schedule"
+    nice = settings.get('nice', '')
+    if nice and not (nice.isdigit() and int(nice) <= 19):
+        return "ERROR: Priority (nice) must be 0-19 (empty = normal).\n", "Error: Invalid priority"
+    if settings.get('io_priority', 'normal') not in IO_PRIORITIES:
+        return f"ERROR: I/O priority must be one of {', '.join(IO_PRIORITIES)}.\n", "Error: Invalid I/O priority"
+    quota = settings.get('cpu_quota', '')
+    if quota and not (quota.isdigit() and int(quota) > 0):
+        return "ERROR: CPU quota must be a percentage of one core, e.g. 150 (empty = none).\n", "Error: Invalid CPU quota"
+    try:
+        parse_metrics_address(settings.get('metrics_address'))
+    except ValueError:
+        return (f"ERROR: Invalid metrics address: {settings['metrics_address']} (use host:port or port)\n",
+                "Error: Invalid metrics address")
+    return None
+
+
+# Leaf keys of the account response, most specific first. The faucet API isn't documented,
+# so the response is searched for the first numeric value under any of these names.
+_BALANCE_KEYS = ('balance', 'credits', 'credit', 'total_credits', 'hcc')
+_EARNED_TODAY_KEYS = ('earned_today', 'credits_today', 'today_earned', 'daily_earned', 'today')
+_DAILY_CAP_KEYS = ('daily_cap', 'cap', 'daily_limit', 'limit')
+
+
+def _find_number(data, keys):
+    """First numeric value stored under one of keys anywhere in a JSON document (breadth first)."""
+    pending = [data]
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, dict):
+            lowered = {str(k).lower(): v for k, v in node.items()}
+            for key in keys:
+                value = lowered.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    return float(value)
+                if isinstance(value, str):
+                    try:
+                        return float(value)
+                    except ValueError:
+                        pass
+            pending.extend(node.values())
+        elif isinstance(node, list):
+            pending.extend(node)
+    return None
+
+
+def parse_account(data):
+    """balance / earned_today / daily_cap (None where the response has no such field)."""
+    return {
+        'balance': _find_number(data, _BALANCE_KEYS),
+        'earned_today': _find_number(data, _EARNED_TODAY_KEYS),
+        'daily_cap': _find_number(data, _DAILY_CAP_KEYS),
+    }
+
+
+class FaucetStats:
+    """Faucet account figures polled with the profile's Bearer key, plus earning rates derived from them.
+
+    poll() contacts the faucet at most every min_interval seconds (longer after errors or a 429) and
+    otherwise returns the cached figures, so it is cheap to call from a UI timer. It blocks while it
+    does contact the faucet; run it on the executor.
+    """
+
+    def __init__(self, api_url, private_key, path=FAUCET_DEFAULT_PATH, min_interval=FAUCET_POLL_SECONDS):
+        self.url = api_url.rstrip('/') + '/' + path.lstrip('/')
+        self.private_key = private_key
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self.next_poll = 0.0
+        self.failures = 0
+        self.error = None
+        self.account = None
+        self.history = collections.deque()  # (monotonic time, balance, hashes)
+
+    def poll(self, hashes=0.0, now=None):
+        import requests
+        now = time.monotonic() if now is None else now
+        if now < self.next_poll:
+            return self.snapshot()
+        self.next_poll = now + self.min_interval
+        try:
+            r = http_client.get(self.url, endpoint='faucet', timeout=(5, 10),
+                                headers={"Authorization": f"Bearer {self.private_key}"})
+            if r.status_code == 429:
+                retry_after = r.headers.get('Retry-After', '')
+                delay = float(retry_after) if retry_after.isdigit() else self.min_interval * 2
+                self.next_poll = now + max(delay, self.min_interval)
+                raise RuntimeError("rate limited by the faucet")
+            r.raise_for_status()
+            account = parse_account(r.json())
+        except (requests.RequestException, ValueError, RuntimeError) as e:
+            self.failures += 1
+            self.next_poll = max(self.next_poll, now + min(self.min_interval * 2 ** self.failures, FAUCET_RATE_WINDOW))
+            with self._lock:
+                self.error = str(e)
+            return self.snapshot()
+        self.failures = 0
+        with self._lock:
+            self.error = None
+            self.account = account
+            if account['balance'] is not None:
+                self.history.append((now, account['balance'], hashes))
+                while len(self.history) > 2 and now - self.history[1][0] > FAUCET_RATE_WINDOW:
+                    self.history.popleft()
+        return self.snapshot()
+
+    def snapshot(self):
+        """Latest account figures plus credits_per_hour and credits_per_mhash (None until two polls are in)."""
+        with self._lock:
+            snap = dict(self.account or {})
+            snap['error'] = self.error
+            snap['credits_per_hour'] = snap['credits_per_mhash'] = None
+            if len(self.history) >= 2:
+                earned = hashed = 0.0
+                for (_, b0, h0), (_, b1, h1) in zip(self.history, list(self.history)[1:]):
+                    earned += max(0.0, b1 - b0)  # spending doesn't count against mining
+                    hashed += h1 - h0 if h1 >= h0 else h1  # the miner restarted in between
+                hours = (self.history[-1][0] - self.history[0][0]) / 3600
+                if hours > 0:
+                    snap['credits_per_hour'] = earned / hours
+                if hashed > 0:
+                    snap['credits_per_mhash'] = earned / (hashed / 1e6)
+            return snap
+
+
+def format_earnings(snap):
+    """One-line summary of a FaucetStats snapshot."""
+    parts = []
+    if snap.get('balance') is not None:
+        parts.append(f"Balance: {snap['balance']:g}")
+    if snap.get('earned_today') is not None:
+        today = f"Today: {snap['earned_today']:g}"
+        if snap.get('daily_cap'):
+            today += f"/{snap['daily_cap']:g} ({snap['earned_today'] / snap['daily_cap']:.0%} of cap)"
+        parts.append(today)
+    if snap.get('credits_per_hour') is not None:
+        parts.append(f"{snap['credits_per_hour']:.2f} credits/h")
+    if snap.get('credits_per_mhash') is not None:
+        parts.append(f"{snap['credits_per_mhash']:.4f} credits/MH")
+    if snap.get('error'):
+        parts.append(f"[!] {snap['error']}")
+    return "  |  ".join(parts) if parts else "Earnings: waiting for the faucet..."
+
+
+def mode_model(overrides=None):
+    """MODE_MODEL with a profile's "mode_model" overrides merged in."""
+    model = {mode: dict(values) for mode, values in MODE_MODEL.items()}
+    if isinstance(overrides, dict):
+        for mode, values in overrides.items():
+            if mode in model and isinstance(values, dict):
+                model[mode].update(values)
+    return model
+
+
+class ModeAdvisor:
+    """Per-mode solve and cooldown times of this machine, and credits/hour estimates built from them.
+
+    Timings are harvested from the instances' telemetry (see MinerTelemetry.take_timings) and kept in
+    app_data_dir()/mode_stats.json per machine. A daily-cap notice from the miner or the faucet marks the
+    mode's cap pool as used up until the next UTC day; switch_target() then names the mode to go to.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = None
+        self._saved_at = time.monotonic()
+        self._dirty = False
+        self.capped = {}  # cap pool -> UTC date it was reached
+        self._cap_seen = {}  # instance name -> telemetry.cap_reached already handled
+
+    def _machine_stats(self):
+        if self._stats is None:
+            self.path = self.path or os.path.join(app_data_dir(), 'mode_stats.json')
+            try:
+                with open(self.path, 'r') as file:
+                    self._stats = json.load(file)
+            except (OSError, ValueError):
+                self._stats = {}
+        return self._stats.setdefault(machine_key(), {})
+
+    def record(self, mode, solve_times, wait_times):
+        if not solve_times and not wait_times:
+            return
+        with self._lock:
+            st = self._machine_stats().setdefault(mode, {'solves': 0, 'solve_seconds': 0.0, 'waits': 0, 'wait_seconds': 0.0})
+            st['solves'] += len(solve_times)
+            st['solve_seconds'] += sum(solve_times)
+            st['waits'] += len(wait_times)
+            st['wait_seconds'] += sum(wait_times)
+            self._dirty = True
+        if time.monotonic() - self._saved_at >= MODE_STATS_SAVE_SECONDS:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._saved_at = time.monotonic()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            try:
+                with open(tmp, 'w') as file:
+                    json.dump(self._stats, file, indent=4)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+
+    def mark_capped(self, pool):
+        self.capped[pool] = time.strftime('%Y-%m-%d', time.gmtime())
+
+    def is_capped(self, pool):
+        return self.capped.get(pool) == time.strftime('%Y-%m-%d', time.gmtime())
+
+    def harvest(self, instance):
+        """Collect new timings and cap notices of a running instance."""
+        mode = instance.mode()
+        self.record(mode, *instance.telemetry.take_timings())
+        cap_reached = instance.telemetry.cap_reached
+        if cap_reached is not None and self._cap_seen.get(instance.name) != cap_reached:
+            self._cap_seen[instance.name] = cap_reached
+            self.mark_capped(instance.settings['mode_model'][mode]['cap'])
+
+    def note_earnings(self, mode, model, earnings):
+        """Mark the mode's cap pool as used up if a FaucetStats snapshot says so."""
+        if earnings.get('daily_cap') and (earnings.get('earned_today') or 0) >= earnings['daily_cap']:
+            self.mark_capped(model[mode]['cap'])
+
+    def estimates(self, model=None):
+        """{mode: {'solve', 'cooldown', 'per_hour', 'capped'}}; solve and per_hour are None without data."""
+        model = model or MODE_MODEL
+        with self._lock:
+            stats = {mode: dict(st) for mode, st in self._machine_stats().items()}
+        result = {}
+        for mode in MODES:
+            st = stats.get(mode, {})
+            solve = st['solve_seconds'] / st['solves'] if st.get('solves') else None
+            cooldown = st['wait_seconds'] / st['waits'] if st.get('waits') else model[mode]['cooldown']
+            per_hour = 3600 / (solve + cooldown) * model[mode]['reward'] if solve else None
+            result[mode] = {'solve': solve, 'cooldown': cooldown, 'per_hour': per_hour,
+                            'capped': self.is_capped(model[mode]['cap'])}
+        return result
+
+    def best(self, model=None):
+        """Mode with the highest credits/hour that isn't capped; an untried one if none has data. None if all are capped."""
+        open_modes = {mode: e for mode, e in self.estimates(model).items() if not e['capped']}
+        measured = [mode for mode, e in open_modes.items() if e['per_hour']]
+        if measured:
+            return max(measured, key=lambda mode: open_modes[mode]['per_hour'])
+        return next(iter(open_modes), None)
+
+    def switch_target(self, instance):
+        """Mode an auto-switching instance should move to because its cap is used up, or None."""
+        settings = instance.settings
+        if not settings.get('auto_switch_mode') or not instance.running():
+            return None
+        model = settings['mode_model']
+        if not self.is_capped(model[instance.mode()]['cap']):
+            return None
+        target = self.best(model)
+        return target if target != instance.mode() else None
+
+
+def format_mode_estimates(estimates, current=None):
+    parts = []
+    for mode, e in estimates.items():
+        if e['capped']:
+            text = f"{mode}: cap reached"
+        elif e['per_hour'] is None:
+            text = f"{mode}: no data"
+        else:
+            text = f"{mode}: {e['per_hour']:.1f} credits/h (solve {e['solve']:.0f}s + wait {e['cooldown']:.0f}s)"
+        parts.append(f"[{text}]" if mode == current else text)
+    return "  |  ".join(parts)
+
+
+def next_utc_day(now=None):
+    """Epoch seconds of the next UTC midnight, when daily caps reset."""
+    now = time.time() if now is None else now
+    return (int(now) // 86400 + 1) * 86400
+
+
+class ProfileRotator:
+    """When each rotating profile may mine again, and which one a capped or cooling-down miner moves on to.
+
+    Cap and cooldown notices come from the instances' telemetry (harvested by the Watchdog) and from faucet
+    figures (note_earnings). The times are wall-clock and kept in app_data_dir()/rotation.json, so a cap
+    still counts after a restart of the GUI.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._eligible_at = None  # profile -> epoch seconds
+        self._seen = {}  # instance name -> (cap_reached, cooldown) already handled
+
+    def _table(self):
+        if self._eligible_at is None:
+            self.path = self.path or os.path.join(app_data_dir(), 'rotation.json')
+            try:
+                with open(self.path, 'r') as file:
+                    self._eligible_at = {k: float(v) for k, v in json.load(file).items()}
+            except (OSError, ValueError, TypeError, AttributeError):
+                self._eligible_at = {}
+        return self._eligible_at
+
+    def save(self):
+        with self._lock:
+            now = time.time()
+            table = {profile: at for profile, at in self._table().items() if at > now}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            try:
+                with open(tmp, 'w') as file:
+                    json.dump(table, file, indent=4)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+
+    def block(self, profile, until):
+        """Mark the profile as not eligible before `until` (epoch seconds); an earlier time never shortens it."""
+        with self._lock:
+            table = self._table()
+            if until <= table.get(profile, 0):
+                return
+            table[profile] = until
+        self.save()
+
+    def eligible_in(self, profile, now=None):
+        """Seconds until the profile may mine again (0 if it may now)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return max(0.0, self._table().get(profile, 0) - now)
+
+    def harvest(self, instance):
+        """Turn new cap and cooldown notices of a running instance into blocks of its profile."""
+        telemetry = instance.telemetry
+        signals = (telemetry.cap_reached, telemetry.cooldown)
+        if self._seen.get(instance.name) == signals:
+            return
+        self._seen[instance.name] = signals
+        if telemetry.cap_reached is not None:
+            self.block(instance.profile(), next_utc_day())
+        if telemetry.cooldown is not None:
+            noticed, seconds = telemetry.cooldown
+            if seconds is None:
+                seconds = instance.settings['mode_model'][instance.mode()]['cooldown']
+            self.block(instance.profile(), time.time() - (time.monotonic() - noticed) + seconds)
+
+    def note_earnings(self, profile, earnings):
+        """Block the profile until the next UTC day if a FaucetStats snapshot shows its daily cap used up."""
+        if earnings.get('daily_cap') and (earnings.get('earned_today') or 0) >= earnings['daily_cap']:
+            self.block(profile, next_utc_day())
+
+    def rotation(self):
+        """The rotating profiles in config order."""
+        config = read_config()
+        return [name for name, profile in config['Profile'].items() if profile.get('rotate')]
+
+    def next_profile(self, current, busy=()):
+        """(name, settings) of the first eligible rotating profile after current, or None."""
+        names = self.rotation()
+        start = names.index(current) + 1 if current in names else 0
+        for name in names[start:] + names[:start]:
+            if name == current or name in busy or self.eligible_in(name):
+                continue
+            settings = profile_settings(load_profile(name))
+            if check_settings(settings) is None:
+                return name, settings
+        return None
+
+    def switch_target(self, instance, busy=()):
+        """(profile, settings, reason) a rotating instance should switch to, or None to keep mining as it is."""
+        if not instance.settings.get('rotate') or not instance.running():
+            return None
+        self.harvest(instance)
+        wait = self.eligible_in(instance.profile())
+        if wait < ROTATE_MIN_COOLDOWN:
+            return None
+        target = self.next_profile(instance.profile(), busy)
+        if target is None:
+            return None
+        name, settings = target
+        # Profiles that download their miner run with the binary this instance already has.
+        settings['miner_exe'] = settings['miner_exe'] or instance.settings['miner_exe']
+        return name, settings, f"profile '{instance.profile()}' can mine again in {format_wait(wait)}"
+
+    def status(self, now=None):
+        """[(profile, seconds until eligible)] of the rotating profiles."""
+        return [(name, self.eligible_in(name, now)) for name in self.rotation()]
+
+
+def format_wait(seconds):
+    """Short duration for the rotation status: 45s, 12m, 3h05m."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def format_rotation(status, current=None):
+    """One-line summary of ProfileRotator.status()."""
+    parts = []
+    for name, wait in status:
+        state = "mining" if name == current else f"in {format_wait(wait)}" if wait else "ready"
+        parts.append(f"{name}: {state}")
+    return "  |  ".join(parts)
+
+
+def best_effort_cancel_pow(api_url, private_key):
+    try:
+        api_url = (api_url or '').strip().rstrip('/')
+        private_key = (private_key or '').strip()
+        if not api_url or not private_key:
+            return
+        r = http_client.post(f"{api_url}/cancel_pow", endpoint='faucet', retries=1,
+                             headers={"Authorization": f"Bearer {private_key}"}, timeout=3)
+        # ignore response body; best-effort only
+        _ = r.status_code
+    except Exception:
+        pass
+
+
+def popen_miner(command, nice=None, cpus=None):
+    """Start the miner with piped output in its own process group, so stopping it also reaches its workers.
+
+    On Windows a nice level (0-19) becomes the below-normal or idle priority class. cpus (Linux) is set
+    in the child before exec, so the miner's runtime sizes itself for them from the start.
+    """
+    if os.name == 'nt':
+        flags = subprocess.CREATE_NEW_PROCESS_GROUP
+        if nice and int(nice) >= 15:
+            flags |= subprocess.IDLE_PRIORITY_CLASS
+        elif nice and int(nice) > 0:
+            flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        group = {'creationflags': flags}
+    else:
+        group = {'start_new_session': True}
+        if cpus and hasattr(os, 'sched_setaffinity'):
+            group['preexec_fn'] = lambda: _set_child_affinity(cpus)
+    # Unbuffered binary pipe: read_output() gets whatever the miner wrote as soon as it wrote it.
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0,
+                            startupinfo=hidden_startupinfo(), **group)
+
+
+def _set_child_affinity(cpus):
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError:
+        pass  # reported by affinity_applied() in the parent
+
+
+def affinity_applied(process, cpus):
+    """Whether the started miner runs on exactly these CPUs (True if it already exited)."""
+    try:
+        return os.sched_getaffinity(process.pid) == set(cpus)
+    except OSError:
+        return True
+
+
+def signal_miner(process, kill=False):
+    """Ask the miner's process group to exit (SIGTERM / CTRL_BREAK), or kill the whole group."""
+    if os.name == 'nt':
+        if kill:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True,
+                           startupinfo=hidden_startupinfo())
+        elif process.poll() is None:
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # the group is gone already
+    except PermissionError:
+        # Not our process group (started by an older version without start_new_session).
+        if process.poll() is None:
+            process.kill() if kill else process.terminate()
+
+
+def sweep_miner_group(process):
+    """Kill workers that outlived the miner in its process group (POSIX; taskkill /T covers Windows)."""
+    if os.name == 'nt':
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def terminate_miner(process, grace=STOP_GRACE_SECONDS, on_escalate=None):
+    """SIGTERM the miner's process group and SIGKILL it if the miner is still running after grace seconds.
+
+    Never raises TimeoutExpired. on_escalate() is called right before the SIGKILL.
+    """
+    if process.poll() is None:
+        signal_miner(process)
+        try:
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            if on_escalate:
+                on_escalate()
+            signal_miner(process, kill=True)
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:
+                pass
+    sweep_miner_group(process)
+
+
+def shutdown_miner(process, api_url=None, private_key=None, on_escalate=None):
+    """Cancel the pending PoW (if credentials are given) and terminate the miner. Blocking; run it on the executor.
+
+    The cancel request runs alongside the termination, so a slow faucet doesn't delay the stop.
+    """
+    cancel = None
+    if api_url and private_key:
+        cancel = threading.Thread(target=best_effort_cancel_pow, args=(api_url, private_key), daemon=True)
+        cancel.start()
+    terminate_miner(process, on_escalate=on_escalate)
+    if cancel is not None:
+        cancel.join()
+
+
+def parse_metrics_address(text):
+    """(host, port) from "host:port", ":port" or "port"; None if empty. The host defaults to localhost."""
+    text = (text or '').strip()
+    if not text:
+        return None
+    host, sep, port = text.rpartition(':')
+    if not sep:
+        host, port = '', text
+    host = host.strip('[]') or '127.0.0.1'
+    port = int(port) if port else METRICS_DEFAULT_PORT
+    if not 0 < port < 65536:
+        raise ValueError(f"port out of range: {port}")
+    return host, port
+
+
+def _metric_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# name -> (type, help, value of an instance given its telemetry snapshot)
+_METRICS = {
+    'hcc_miner_running': ('gauge', "1 while the miner process is running",
+                          lambda i, snap: 1 if i.running() else 0),
+    'hcc_miner_hashrate_hps': ('gauge', "Last reported hashrate in H/s",
+                               lambda i, snap: snap['current'] if i.running() else 0.0),
+    'hcc_miner_hashrate_avg_hps': ('gauge', "Average hashrate since the miner (re)started, in H/s",
+                                   lambda i, snap: snap['average']),
+    'hcc_miner_solutions_total': ('counter', "Solutions found since the miner (re)started",
+                                  lambda i, snap: snap['solutions']),
+    'hcc_miner_accepted_total': ('counter', "Accepted solutions since the miner (re)started",
+                                 lambda i, snap: snap['accepted']),
+    'hcc_miner_rejected_total': ('counter', "Rejected solutions since the miner (re)started",
+                                 lambda i, snap: snap['rejected']),
+    'hcc_miner_restarts_total': ('counter', "Watchdog restarts of the miner",
+                                 lambda i, snap: i.restarts),
+    'hcc_miner_uptime_seconds': ('gauge', "Seconds since the miner (re)started",
+                                 lambda i, snap: snap['uptime'] if i.running() else 0.0),
+    'hcc_miner_workers': ('gauge', "Workers the miner runs with (after throttling)",
+                          lambda i, snap: i.workers() if i.running() else 0),
+}
+
+
+def render_metrics(supervisor):
+    """Prometheus text exposition of every instance the supervisor has seen."""
+    instances = supervisor.instances()
+    snaps = [(i, i.telemetry.snapshot(samples=False)) for i in instances]
+    out = ["# HELP hcc_miner_info Miner release tag and mode", "# TYPE hcc_miner_info gauge"]
+    for i, _ in snaps:
+        out.append(f'hcc_miner_info{{profile="{_metric_label(i.name)}",version="{_metric_label(i.version)}",'
+                   f'mode="{i.mode()}"}} 1')
+    for name, (kind, help_text, value) in _METRICS.items():
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for i, snap in snaps:
+            out.append(f'{name}{{profile="{_metric_label(i.name)}"}} {value(i, snap):g}')
+    http_stats = http_client.snapshot()
+    for name, key, kind, help_text in (
+            ('hcc_http_requests_total', 'calls', 'counter', "HTTP requests (including retries) per endpoint"),
+            ('hcc_http_errors_total', 'errors', 'counter', "HTTP requests that failed or returned an error status"),
+            ('hcc_http_retries_total', 'retries', 'counter', "HTTP requests that were retries"),
+            ('hcc_http_request_seconds_sum', 'seconds', 'counter', "Total HTTP latency (until headers) per endpoint")):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for endpoint, st in http_stats.items():
+            out.append(f'{name}{{endpoint="{_metric_label(endpoint)}"}} {st[key]:g}')
+    return '\n'.join(out) + '\n'
+
+
+class MetricsServer:
+    """Optional HTTP endpoint serving render_metrics() on /metrics, from its own daemon thread.
+
+    Scrapes only take the telemetry locks for a moment; the reader threads never wait on it.
+    """
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+        self.address = None
+        self._httpd = None
+
+    def serve(self, address, log_fn=None):
+        """(Re)bind to address (host, port); None stops the endpoint. Errors are logged, not raised."""
+        if address == self.address:
+            return
+        self.close()
+        if address is None:
+            return
+        import http.server
+        supervisor = self.supervisor
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = render_metrics(supervisor).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._httpd = http.server.ThreadingHTTPServer(address, Handler)
+        except OSError as e:
+            if log_fn:
+                log_fn(f"[!] Could not start metrics endpoint on {address[0]}:{address[1]}: {e}\n")
+            return
+        self._httpd.daemon_threads = True
+        self.address = address
+        threading.Thread(target=self._httpd.serve_forever, daemon=True, name='hcc-metrics').start()
+        if log_fn:
+            log_fn(f"[*] Metrics endpoint: http://{address[0]}:{address[1]}/metrics\n")
+
+    def close(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        self._httpd = None
+        self.address = None
+
+
+_ERROR_LINE_RE = re.compile(r'(?i)\b(?:error|rejected|failed|failure|exception|invalid|denied)\b|^\[!\]')
+_LOG_STAMP_LEN = 19  # 'YYYY-mm-dd HH:MM:SS'
+_ARCHIVE_RE = r'-(\d{8}-\d{6})(?:-(\d+))?\.log\.gz$'
+
+
+def safe_file_name(name):
+    """name (e.g. a profile name) reduced to characters that are safe in a file name."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('._') or 'log'
+
+
+def session_log_dir():
+    return os.path.join(app_data_dir(), 'logs')
+
+
+def session_log_files(directory=None):
+    """Current session logs and their archives, most recently written first."""
+    directory = directory or session_log_dir()
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(('.log', '.log.gz'))]
+    except OSError:
+        return []
+    paths = [os.path.join(directory, n) for n in names]
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime
+        except OSError:
+            pass
+    return sorted(mtimes, key=mtimes.get, reverse=True)
+
+
+def _open_log(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def new_log_index():
+    return {'lines': 0, 'first': None, 'last': None, 'error_count': 0, 'errors': []}
+
+
+def index_log_line(index, line):
+    """Account for one 'YYYY-mm-dd HH:MM:SS text' line of a session log in its index."""
+    index['lines'] += 1
+    stamp = line[:_LOG_STAMP_LEN]
+    if index['first'] is None:
+        index['first'] = stamp
+    index['last'] = stamp
+    if _ERROR_LINE_RE.search(line[_LOG_STAMP_LEN + 1:]):
+        index['error_count'] += 1
+        if len(index['errors']) < SESSION_LOG_INDEX_ERRORS:
+            index['errors'].append([index['lines'], line.rstrip('\n')[:500]])
+
+
+def save_log_index(path, index):
+    try:
+        index['key'] = _file_key(os.stat(path))
+        tmp = path + '.idx.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(index, file)
+        os.replace(tmp, path + '.idx.json')
+    except OSError:
+        pass
+
+
+def load_log_index(path, save=True):
+    """Index of a session log file, rebuilt by reading the file if it is missing or stale."""
+    key = _file_key(os.stat(path))
+    try:
+        with open(path + '.idx.json', 'r') as file:
+            index = json.load(file)
+        if isinstance(index, dict) and index.get('key') == key:
+            return index
+    except (OSError, ValueError):
+        pass
+    index = new_log_index()
+    with _open_log(path) as file:
+        for line in file:
+            index_log_line(index, line)
+    if save:
+        save_log_index(path, index)
+    return index
+
+
+def remove_log_file(path):
+    for p in (path, path + '.idx.json'):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+class SessionLog:
+    """On-disk log of one output stream (the GUI, an instance, a headless profile).
+
+    write_lines() only stamps and queues the lines, so it is cheap enough for the miner reader
+    thread. A background thread writes them to <dir>/<name>.log, keeps the file's index up to date
+    and rotates it into <name>-<time>.log.gz once it exceeds max_bytes, keeping the newest archives.
+    """
+
+    def __init__(self, name, directory=None, max_bytes=SESSION_LOG_MAX_BYTES, archives=SESSION_LOG_ARCHIVES):
+        self.name = safe_file_name(name)
+        self.directory = directory or session_log_dir()
+        self.path = os.path.join(self.directory, self.name + '.log')
+        self.max_bytes = max_bytes
+        self.archives = archives
+        self.error = None  # last OSError of the writer, if any
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def write_lines(self, lines):
+        self._queue.put((time.time(), lines))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True, name=f"log-{self.name}")
+                    self._thread.start()
+
+    def pending(self):
+        """Batches queued for the writer thread."""
+        return self._queue.qsize()
+
+    def close(self, timeout=5):
+        """Write out everything queued so far and stop the writer (a later write starts a new one)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            index = load_log_index(self.path) if os.path.exists(self.path) else new_log_index()
+            file = open(self.path, 'a', encoding='utf-8', errors='replace')
+        except OSError as e:
+            self.error = e
+            while self._queue.get() is not None:
+                pass  # nowhere to write; don't let the queue grow
+            return
+        last_save = time.monotonic()
+        dirty = False
+        done = False
+        try:
+            while not done:
+                try:
+                    batch = [self._queue.get(timeout=SESSION_LOG_FLUSH_SECONDS)]
+                    while True:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                try:
+                    for item in batch:
+                        if item is None:
+                            done = True
+                            continue
+                        stamp = time.strftime('%Y-%m-%d %H:%M:%S ', time.localtime(item[0]))
+                        for text in item[1]:
+                            for line in strip_ansi_codes(text).splitlines():
+                                entry = stamp + line + '\n'
+                                file.write(entry)
+                                index_log_line(index, entry)
+                                dirty = True
+                        if file.tell() >= self.max_bytes:
+                            file.close()
+                            self._rotate(index)
+                            index = new_log_index()
+                            file = open(self.path, 'a', encoding='utf-8', errors='replace')
+                            dirty = False
+                    if not dirty:
+                        continue
+                    file.flush()
+                    if time.monotonic() - last_save >= SESSION_LOG_INDEX_SECONDS:
+                        save_log_index(self.path, index)
+                        last_save = time.monotonic()
+                        dirty = False
+                except OSError as e:
+                    self.error = e
+        finally:
+            file.close()
+            save_log_index(self.path, index)
+
+    def _rotate(self, index):
+        base = os.path.join(self.directory, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        archive, n = base + '.log.gz', 1
+        while os.path.exists(archive):
+            n += 1
+            archive = f"{base}-{n}.log.gz"
+        with open(self.path, 'rb') as src, gzip.open(archive, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        remove_log_file(self.path)
+        save_log_index(archive, index)
+        pattern = re.compile(re.escape(self.name) + _ARCHIVE_RE)
+        archives = [(m.group(1), int(m.group(2) or 1), m.group(0)) for m in map(pattern.match, os.listdir(self.directory)) if m]
+        for *_, name in sorted(archives, reverse=True)[self.archives:]:
+            remove_log_file(os.path.join(self.directory, name))
+
+
+def search_logs(pattern, since=None, errors_only=False, limit=LOG_SEARCH_LIMIT, directory=None, cancel_event=None):
+    """Lines of the session logs matching pattern (a regex, or plain text if it isn't one), ignoring case.
+
+    since ('YYYY-mm-dd[ HH:MM:SS]') skips older lines, and whole files by their index. With errors_only
+    only error lines are searched, straight from the index where it holds all of them. Newest files
+    come first. Returns a list of (file name, line number, line), at most limit long.
+    """
+    try:
+        regex = re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        regex = re.compile(re.escape(pattern), re.IGNORECASE)
+    results = []
+    for path in session_log_files(directory):
+        if cancel_event is not None and cancel_event.is_set():
+            raise TaskCancelled()
+        try:
+            # The writer owns the index of a file that is still being written.
+            index = load_log_index(path, save=path.endswith('.gz'))
+        except (OSError, EOFError):
+            continue  # rotated away in the meantime, or a damaged archive
+        if not index['lines'] or (since and index['last'] < since):
+            continue
+        if errors_only and index['error_count'] == 0:
+            continue
+        from_index = errors_only and index['error_count'] <= len(index['errors'])
+        file = None
+        try:
+            if not from_index:
+                file = _open_log(path)
+            lines = index['errors'] if from_index else enumerate(file, 1)
+            for line_no, line in lines:
+                if since and line[:_LOG_STAMP_LEN] < since:
+                    continue
+                if errors_only and not from_index and not _ERROR_LINE_RE.search(line[_LOG_STAMP_LEN + 1:]):
+                    continue
+                if regex.search(line):
+                    results.append((os.path.basename(path), line_no, line.rstrip('\n')))
+                    if len(results) >= limit:
+                        return results
+        except (OSError, EOFError):
+            continue
+        finally:
+            if file is not None:
+                file.close()
+    return results
+
+
+def recordings_dir():
+    return os.path.join(app_data_dir(), 'recordings')
+
+
+class SessionRecorder:
+    """Writes the raw output of a miner, with the time each chunk arrived, to a recording file."""
+
+    def __init__(self, path, meta=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._file = gzip.open(path, 'wb', compresslevel=6)
+        self._file.write(RECORDING_MAGIC)
+        self._file.write(json.dumps(dict(meta or {}, started=time.time())).encode('utf-8') + b'\n')
+        self._start = time.monotonic()
+
+    def write(self, data):
+        self._file.write(_RECORD_HEADER.pack(time.monotonic() - self._start, len(data)))
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+
+
+def read_recording(path):
+    """Return (meta, chunks) for a recording; chunks yields (seconds since start, bytes)."""
+    file = gzip.open(path, 'rb')
+    try:
+        if file.readline() != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a miner recording")
+        meta = json.loads(file.readline() or b'{}')
+    except (OSError, EOFError, ValueError):
+        file.close()
+        raise
+
+    def _chunks():
+        with file:
+            while True:
+                header = file.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    return  # end, or cut off by a crash
+                offset, size = _RECORD_HEADER.unpack(header)
+                data = file.read(size)
+                if data:
+                    yield offset, data
+
+    return meta, _chunks()
+
+
+def replay_recording(path, log, telemetry, speed=1.0, cancel_event=None):
+    """Feed a recording through the same splitter, telemetry and log path as a live miner.
+
+    speed multiplies real time; 0 replays as fast as possible. Returns the number of bytes replayed.
+    """
+    meta, chunks = read_recording(path)
+    replayed = [0]
+    start = time.monotonic()
+
+    def _paced():
+        for offset, data in chunks:
+            delay = start + offset / speed - time.monotonic() if speed > 0 else 0
+            if delay > 0 and cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event is not None and cancel_event.wait(max(delay, 0)):
+                raise TaskCancelled()
+            replayed[0] += len(data)
+            yield data
+
+    log.put(f"[*] Replaying {os.path.basename(path)} (profile '{meta.get('profile', '?')}', "
+            f"miner {meta.get('version', '?')}) at {f'{speed:g}x' if speed > 0 else 'full speed'}\n")
+    try:
+        feed_output(split_output(_paced()), log, telemetry)
+    finally:
+        chunks.close()
+    return replayed[0]
+
+
+def run_replay(path, speed):
+    """Replay a recording to stdout and report how fast the log/telemetry path got through it."""
+    log = LogBuffer()
+    telemetry = MinerTelemetry()
+    done = threading.Event()
+
+    def _pump():
+        while not done.wait(HEADLESS_POLL_SECONDS):
+            write_log_lines(sys.stdout, log)
+
+    pump = threading.Thread(target=_pump, daemon=True)
+    pump.start()
+    started = time.perf_counter()
+    try:
+        replayed = replay_recording(path, log, telemetry, speed)
+    except (OSError, EOFError, ValueError) as e:
+        log.put(f"[!] Replay failed: {e}\n")
+        return 1
+    finally:
+        done.set()
+        pump.join()
+        write_log_lines(sys.stdout, log)
+    elapsed = time.perf_counter() - started
+    snap = telemetry.snapshot(samples=False)
+    print(f"[*] Replayed {format_bytes(replayed)} in {elapsed:.2f}s ({format_bytes(replayed / max(elapsed, 1e-9))}/s): "
+          f"avg {format_hashrate(snap['average'])}, solutions {snap['solutions']}, "
+          f"accepted {snap['accepted']}, rejected {snap['rejected']}")
+    return 0
+
+
+class LatencyHistogram:
+    """Counts of latencies (ms) in the DIAG_BUCKETS_MS buckets, plus count, mean and max."""
+
+    def __init__(self, bounds=DIAG_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        i = 0
+        while i < len(self.bounds) and ms > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th fraction of the samples (max for the last bucket)."""
+        seen = 0
+        for bound, count in zip(self.bounds + (self.max,), self.counts):
+            seen += count
+            if seen >= p * self.count:
+                return bound
+        return self.max
+
+    def format(self):
+        if not self.count:
+            return "no samples"
+        buckets = ' '.join(f"<={bound}:{count}" for bound, count in zip(self.bounds, self.counts) if count)
+        if self.counts[-1]:
+            buckets += f" >{self.bounds[-1]}:{self.counts[-1]}"
+        return (f"n={self.count} mean {self.total / self.count:.1f} ms, p50 <={self.percentile(0.5):g}, "
+                f"p95 <={self.percentile(0.95):g}, p99 <={self.percentile(0.99):g}, max {self.max:.0f} ms  [{buckets}]")
+
+
+class Diagnostics:
+    """Where the time goes: latency histograms, start-pipeline stage times, the log line rate, and
+    cProfile/tracemalloc captures that can be switched on and off while the app runs.
+
+    Everything is cheap enough to stay on all the time except a capture. The module-level `diagnostics`
+    is shared by the GUI, the miner instances and ensure_latest_miner.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.histograms = {}  # name -> LatencyHistogram
+        self.stages = {}  # stage -> [last seconds, runs, total seconds]
+        self._lines = collections.deque()  # (monotonic time, lines) within DIAG_RATE_WINDOW
+        self.lines_total = 0
+        self._profiler = None
+        self._capture_started = None
+
+    def observe(self, name, ms):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(ms)
+
+    def stage_done(self, name, seconds):
+        with self._lock:
+            stage = self.stages.setdefault(name, [0.0, 0, 0.0])
+            stage[0] = seconds
+            stage[1] += 1
+            stage[2] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the body as a start-pipeline stage (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_done(name, time.perf_counter() - started)
+
+    def count_lines(self, n, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.lines_total += n
+            self._lines.append((now, n))
+            while self._lines and now - self._lines[0][0] > DIAG_RATE_WINDOW:
+                self._lines.popleft()
+
+    def lines_per_second(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            recent = sum(n for t, n in self._lines if now - t <= DIAG_RATE_WINDOW)
+        return recent / DIAG_RATE_WINDOW
+
+    def capturing(self):
+        return self._profiler is not None
+
+    def start_capture(self):
+        """Start cProfile (for the calling thread, e.g. the Tk thread) and tracemalloc (whole process)."""
+        import cProfile
+        import tracemalloc
+        if self._profiler is not None:
+            return
+        tracemalloc.start()
+        self._baseline = tracemalloc.take_snapshot()
+        self._profiler = cProfile.Profile()
+        self._capture_started = time.monotonic()
+        self._profiler.enable()
+
+    def stop_capture(self, directory=None):
+        """Stop the capture and write it (with the report) to a text file plus a .prof for pstats/snakeviz.
+
+        Returns the path of the text file, or None if nothing was being captured.
+        """
+        import tracemalloc
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return None
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        # Imported only now so that importing them doesn't show up as memory growth
+        import io
+        import pstats
+        seconds = time.monotonic() - self._capture_started
+        directory = directory or os.path.join(app_data_dir(), 'diagnostics')
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"capture-{time.strftime('%Y%m%d-%H%M%S')}")
+        profiler.dump_stats(base + '.prof')
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(DIAG_TOP_ENTRIES)
+        growth = snapshot.compare_to(self._baseline, 'lineno')[:DIAG_TOP_ENTRIES]
+        self._baseline = None
+        with open(base + '.txt', 'w', encoding='utf-8') as file:
+            file.write(f"Capture of {seconds:.1f}s\n\n{self.report()}\n\n")
+            file.write(f"== Memory growth during the capture (top {DIAG_TOP_ENTRIES} by line)\n")
+            file.write(''.join(f"{stat}\n" for stat in growth))
+            file.write(f"\n== Profile of the capturing thread (cumulative)\n{stats_text.getvalue()}")
+        return base + '.txt'
+
+    def report(self, extra=()):
+        """Multi-line text of everything collected so far; extra adds (label, value) lines, e.g. queue depths."""
+        now = time.monotonic()
+        lines = [f"Uptime: {format_wait(now - self.started)}",
+                 f"Log lines: {self.lines_per_second(now):.1f}/s over {DIAG_RATE_WINDOW}s, {self.lines_total} in total"]
+        lines += [f"{label}: {value}" for label, value in extra]
+        with self._lock:
+            histograms = {name: h.format() for name, h in self.histograms.items()}
+            stages = {name: list(stage) for name, stage in self.stages.items()}
+        if histograms:
+            lines.append("")
+            lines.append("Latency:")
+            lines += [f"  {name}: {text}" for name, text in sorted(histograms.items())]
+        if stages:
+            lines.append("")
+            lines.append("Start pipeline (last / mean over runs):")
+            for name in ('release lookup', 'download', 'verify', 'spawn', 'first progress line'):
+                if name in stages:
+                    last, runs, total = stages.pop(name)
+                    lines.append(f"  {name}: {last * 1000:.0f} ms / {total / runs * 1000:.0f} ms over {runs}")
+            lines += [f"  {name}: {last * 1000:.0f} ms / {total / runs * 1000:.0f} ms over {runs}"
+                      for name, (last, runs, total) in stages.items()]
+        if self.capturing():
+            lines.append("")
+            lines.append(f"Capture running for {now - self._capture_started:.0f}s")
+        return "\n".join(lines)
+
+
+diagnostics = Diagnostics()
+
+
+class StartupTrace:
+    """Wall time of each startup phase. Phases also go into the diagnostics report; with --startup-trace
+    report() prints them to stderr.
+    """
+
+    def __init__(self, enabled=False, started=None):
+        self.enabled = enabled
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        """End the current phase, naming it."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        diagnostics.stage_done(f"startup: {phase}", now - self._last)
+        self._last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        for phase, seconds in self.phases:
+            print(f"[startup] {phase:<28} {seconds * 1000:8.1f} ms", file=sys.stderr)
+        print(f"[startup] {'total':<28} {(self._last - self.started) * 1000:8.1f} ms", file=sys.stderr)
+
+
+def write_log_lines(out, log, timestamps=False):
+    """Write everything pending in a LogBuffer to a text stream."""
+    lines, dropped = log.drain()
+    diagnostics.count_lines(len(lines) + dropped)
+    if dropped:
+        lines.insert(0, f"[!] Output fell behind: {dropped} line(s) dropped\n")
+    if not lines:
+        return
+    prefix = time.strftime('%Y-%m-%d %H:%M:%S ') if timestamps else ''
+    for line in coalesce_lines([strip_ansi_codes(line) for line in lines]):
+        out.write(prefix + line.rstrip('\n') + '\n')
+    out.flush()
+
+
+def run_headless(profile_name, log_file=None, metrics_address=None, trace=None):
+    """Mine with a saved profile until the miner gives up or SIGTERM/SIGINT arrives. Returns an exit code."""
+    trace = trace or StartupTrace()
+    out = open(log_file, 'a') if log_file else sys.stdout
+    timestamps = bool(log_file)
+    log = LogBuffer()
+
+    if profile_name not in load_profile_names():
+        log.put(f"ERROR: Unknown profile '{profile_name}' in {config_file}\n")
+        write_log_lines(out, log, timestamps)
+        return 2
+    settings = profile_settings(load_profile(profile_name))
+    if metrics_address is not None:
+        settings['metrics_address'] = metrics_address
+    problem = check_settings(settings)
+    if problem:
+        log.put(problem[0])
+        write_log_lines(out, log, timestamps)
+        return 2
+    trace.mark('config')
+
+    session_log = SessionLog(f"headless-{profile_name}")
+    log.sink = session_log.write_lines
+    stop_event = threading.Event()
+    # The handlers only record what arrived; the main loop logs it (a handler must not wait for the log's lock).
+    received = []
+    capture_requested = threading.Event()
+
+    def _on_signal(signum, frame):
+        received.append(signum)
+        stop_event.set()
+
+    for name in ('SIGTERM', 'SIGINT', 'SIGHUP'):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _on_signal)
+
+    def _on_capture_signal(signum, frame):
+        # kill -USR1 <pid> starts a diagnostics capture, the next one writes it out
+        capture_requested.set()
+
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, _on_capture_signal)
+
+    def _handle_signals():
+        while received:
+            log.put(f"[*] Received signal {received.pop(0)}, stopping...\n")
+        if capture_requested.is_set():
+            capture_requested.clear()
+            if diagnostics.capturing():
+                log.put(f"[*] Diagnostics capture written to {diagnostics.stop_capture()}\n")
+            else:
+                diagnostics.start_capture()
+                log.put("[*] Diagnostics capture started; send SIGUSR1 again to write it out.\n")
+
+    if settings['miner_exe'] is None:
+        # Let the download log show up while it is running.
+        writer_done = threading.Event()
+
+        def _pump():
+            while not writer_done.wait(HEADLESS_POLL_SECONDS):
+                write_log_lines(out, log, timestamps)
+
+        threading.Thread(target=_pump, daemon=True).start()
+        try:
+            settings['miner_exe'] = ensure_latest_miner(log.put, None, stop_event, settings['miner_version'] or None)
+        except TaskCancelled:
+            _handle_signals()
+            write_log_lines(out, log, timestamps)
+            session_log.close()
+            return 0
+        except Exception as e:
+            log.put(f"[!] Auto-download failed: {e}\n")
+            settings['miner_exe'] = resolve_miner_exe('')
+        finally:
+            writer_done.set()
+    trace.mark('miner setup')
+
+    instance = MinerInstance(profile_name, settings, log=log)
+    supervisor = Supervisor()
+    supervisor.add(instance)
+    advisor = ModeAdvisor()
+    rotator = ProfileRotator()
+    Watchdog(supervisor, advisor=advisor, rotator=rotator).start()
+    MetricsServer(supervisor).serve(parse_metrics_address(settings['metrics_address']), log.put)
+    log.put(f"[*] Mining with profile '{profile_name}': {' '.join(build_miner_command(settings['miner_exe'], settings['api_url'], '***', settings['threads'], settings['extreme'], settings['potato']))}\n")
+    instance.start()
+    trace.mark('miner started')
+    trace.report()
+
+    earnings = None
+    last_summary = time.monotonic()
+    while not stop_event.wait(HEADLESS_POLL_SECONDS):
+        _handle_signals()
+        write_log_lines(out, log, timestamps)
+        if not instance.active():
+            break
+        if time.monotonic() - last_summary >= HEADLESS_STATUS_SECONDS:
+            last_summary = time.monotonic()
+            snap = instance.telemetry.snapshot()
+            log.put(f"[status] {instance.status} | hashrate {format_hashrate(snap['current'])} "
+                    f"(avg {format_hashrate(snap['average'])}) | solutions {snap['solutions']} | "
+                    f"accepted {snap['accepted']} | rejected {snap['rejected']} | restarts {instance.restarts} | "
+                    f"workers {instance.workers()}\n")
+            # settings is the instance's own dict, so it follows profile rotations
+            if not settings['earnings']:
+                earnings = None
+            elif earnings is None or earnings.private_key != settings['private_key']:
+                earnings = FaucetStats(settings['api_url'], settings['private_key'], settings['earnings_path'])
+            if earnings is not None:
+                earned = earnings.poll(snap['hashes'])
+                advisor.note_earnings(instance.mode(), settings['mode_model'], earned)
+                rotator.note_earnings(instance.profile(), earned)
+                log.put(f"[status] {format_earnings(earned)}\n")
+            log.put(f"[status] {format_mode_estimates(advisor.estimates(settings['mode_model']), instance.mode())}\n")
+            rotation = rotator.status()
+            if rotation:
+                log.put(f"[status] Rotation: {format_rotation(rotation, instance.profile())}\n")
+
+    _handle_signals()
+    if stop_event.is_set():
+        instance.stop()
+        log.put("Mining stopped.\n")
+    if instance._thread is not None:
+        instance._thread.join(5)
+    advisor.save()
+    write_log_lines(out, log, timestamps)
+    session_log.close()
+    if log_file:
+        out.close()
+    return 0 if stop_event.is_set() or instance.status == "Not Mining" else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the HCC CLI miner from a saved GUI profile, without a GUI.")
+    parser.add_argument('--headless', action='store_true', help="accepted for symmetry with hcc_gui_miner.py")
+    parser.add_argument('--profile', default='Default', help="profile name from the config file (default: Default)")
+    parser.add_argument('--log-file', help="append miner output to this file instead of stdout")
+    parser.add_argument('--metrics', metavar='HOST:PORT',
+                        help="serve Prometheus metrics here (default: the profile's metrics address; '' = off)")
+    parser.add_argument('--config', help="config file (default: dist/hcc_miner_config.json)")
+    versions = parser.add_argument_group("miner versions (run instead of mining)")
+    versions.add_argument('--list-versions', action='store_true', help="list downloaded miner versions")
+    versions.add_argument('--prune-keep', type=int, metavar='N', help="delete all but the newest N versions")
+    versions.add_argument('--prune-max-mb', type=float, metavar='MB', help="delete oldest versions beyond MB in total")
+    versions.add_argument('--ab-benchmark', nargs=2, metavar=('TAG_A', 'TAG_B'),
+                          help="compare the hashrate of two miner versions with the profile's settings")
+    logs = parser.add_argument_group("session logs (run instead of mining)")
+    logs.add_argument('--search-logs', metavar='PATTERN', help="search current and archived session logs")
+    logs.add_argument('--errors-only', action='store_true', help="only match error lines (rejected, failed, ...)")
+    logs.add_argument('--since', metavar='DATE', help="only lines from this 'YYYY-mm-dd[ HH:MM:SS]' on")
+    replay = parser.add_argument_group("recordings (run instead of mining)")
+    replay.add_argument('--replay', metavar='FILE', help="replay a recorded miner session to stdout")
+    replay.add_argument('--speed', type=float, default=1.0, help="replay speed, a multiple of real time (0 = max)")
+    parser.add_argument('--startup-trace', action='store_true', help="print how long each startup phase took to stderr")
+    global config_file
+    args = parser.parse_args(argv)
+    if args.config:
+        config_file = args.config
+
+    log_fn = lambda text: print(text, end='', flush=True)
+    if args.list_versions:
+        pinned = pinned_versions()
+        for v in cached_versions():
+            print(f"{v['tag']:<12} {format_bytes(v['size']):>10}  {'pinned  ' if v['tag'] in pinned else '        '}{v['path']}")
+        return 0
+    if args.prune_keep is not None or args.prune_max_mb is not None:
+        max_bytes = int(args.prune_max_mb * 1024 * 1024) if args.prune_max_mb is not None else None
+        removed = prune_versions(args.prune_keep, max_bytes, log_fn=log_fn)
+        print(f"Deleted {len(removed)} version(s).")
+        return 0
+    if args.replay:
+        return run_replay(args.replay, args.speed)
+    if args.search_logs is not None:
+        for name, line_no, line in search_logs(args.search_logs, args.since, args.errors_only):
+            print(f"{name}:{line_no}: {line}")
+        return 0
+    if args.ab_benchmark:
+        import requests
+        settings = profile_settings(load_profile(args.profile))
+        problem = check_settings(settings)
+        if problem:
+            log_fn(problem[0])
+            return 2
+        try:
+            results = benchmark_versions(settings, args.ab_benchmark, log_fn)
+        except (RuntimeError, OSError, requests.RequestException) as e:
+            log_fn(f"[!] Benchmark failed: {e}\n")
+            return 1
+        for tag, rate in sorted(results.items(), key=lambda item: item[1], reverse=True):
+            print(f"{tag:<12} {format_hashrate(rate)}")
+        return 0
+    return run_headless(args.profile, args.log_file, args.metrics, StartupTrace(args.startup_trace))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
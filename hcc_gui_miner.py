@@ -1,68 +1,152 @@
+import time
+_started = time.perf_counter()  # the imports below are the first phase of --startup-trace
 import tkinter as tk
 import tkinter.font as tkFont
-import subprocess
 import threading
-import queue
-import json
-import re
 import os
-import requests
-from tkinter import filedialog
-import platform
-import stat
-import hashlib
-import struct
 import shutil
+import sys
+from tkinter import filedialog
+from tkinter import ttk
+import queue
+import concurrent.futures
+
+import hcc_core
+from hcc_core import (
+    DEFAULT_LOG_MAX_LINES, MIN_LOG_MAX_LINES, TUNE_TRIAL_SECONDS, DEFAULT_STALL_SECONDS,
+    LogBuffer, MinerTelemetry, MinerInstance, Supervisor, Watchdog, MetricsServer, TaskCancelled,
+    strip_ansi_codes, ansi_segments, ANSI_COLOURS, coalesce_lines, format_hashrate, format_bytes, version_key,
+    read_config, save_profile, load_profile_names, load_profile, profile_settings, check_settings,
+    parse_metrics_address,
+    default_miner_path, resolve_miner_exe, build_miner_command, ensure_latest_miner,
+    machine_key, miner_version_from_path, worker_candidates, tune_workers,
+    cached_versions, pinned_versions, prune_versions, benchmark_versions,
+    FaucetStats, format_earnings, FAUCET_DEFAULT_PATH, ModeAdvisor, format_mode_estimates,
+    SessionLog, search_logs, session_log_dir, LOG_SEARCH_LIMIT, recordings_dir, replay_recording,
+    IO_PRIORITIES, format_cpu_list, reserve_gui_core, ProfileRotator, format_rotation, diagnostics,
+    StartupTrace,
+)
 
-config_file = 'dist/hcc_miner_config.json'
-
-# Global reference to the mining process
-mining_process = None
-
-# Global flag to indicate intentional termination
-stop_requested = False
-
-default_config = {
-    "Profile": {
-        "Default": {
-            "api_url": "https://hashcash-pow-faucet.dynv6.net/api",
-            "miner_path": "",
-            "private_key": "",
-            "threads": "0",
-            "auto_download": True,
-            "extreme": False,
-            "potato": False
-        }
-    }
-}
-
-
-def strip_ansi_codes(text):
-    ansi_escape = re.compile(r'(?:\x1B[@-_]|[\x80-\x9F])[0-?]*[ -/]*[@-~]')
-    return ansi_escape.sub('', text)
 
+# The miner instance driven by the main window (a MinerInstance, see hcc_core)
+mining_instance = None
+
+# Cancellation flag of the pending miner setup (release lookup/download), if any
+setup_cancel = None
+
+# Phase timings of this start (see main)
+startup_trace = None
+
+# The CPU the Tk thread is pinned to once a profile asks to keep a core for the GUI (see keep_gui_core)
+gui_core = None
+
+# Faucet account stats of the main window's profile while the earnings panel is on
+faucet_stats = None
+earnings_poll_pending = False
+
+# Log view poll interval and refresh interval of the hashrate stats row
+LOG_POLL_MS = 100
+DIAG_TICK_MS = 50  # event-loop lag probe
+DIAG_REFRESH_MS = 1000
+TELEMETRY_POLL_MS = 1000
+
+
+class TaskExecutor:
+    """Runs blocking work (network, disk, process waits) on a thread pool.
+
+    Results are handed back to the Tk thread: worker threads only enqueue callbacks, and a
+    root.after() pump on the Tk thread runs them, so callbacks may touch widgets freely.
+    """
+
+    def __init__(self, tk_root, max_workers=4, poll_ms=50):
+        self._root = tk_root
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hcc-task')
+        self._callbacks = queue.SimpleQueue()
+        self._poll_ms = poll_ms
+        self._root.after(poll_ms, self._pump)
+
+    def pending(self):
+        """Callbacks waiting for the Tk thread."""
+        return self._callbacks.qsize()
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """Run fn(*args) on the pool; on_done(result) or on_error(exception) then run on the Tk thread."""
+        def _finished(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                if on_done:
+                    self.call_soon(on_done, future.result())
+            elif on_error:
+                self.call_soon(on_error, error)
+            else:
+                print("Background task failed:", error)
+
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(_finished)
+        return future
+
+    def call_soon(self, fn, *args):
+        """Schedule fn(*args) on the Tk thread. Safe to call from any thread."""
+        self._callbacks.put((fn, args))
+
+    def _pump(self):
+        started = time.perf_counter()
+        while True:
+            try:
+                fn, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                print("Task callback failed:", e)
+        diagnostics.observe('task callbacks (per pump)', (time.perf_counter() - started) * 1000)
+        self._root.after(self._poll_ms, self._pump)
 
-def save_config(profile_name):
-    try:
-        with open(config_file, 'r') as file:
-            config = json.load(file)
-    except FileNotFoundError:
-        config = {"Profile": {}}
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
 
-    os.makedirs(os.path.dirname(config_file), exist_ok=True)
 
-    config["Profile"][profile_name] = {
+def form_profile():
+    """The profile values currently entered in the main window."""
+    return {
         'api_url': api_url_entry.get(),
         'miner_path': miner_path_entry.get(),
         'private_key': private_key_entry.get(),
         'threads': threads_entry.get(),
         'auto_download': bool(auto_download_var.get()),
+        'miner_version': miner_version_entry.get(),
         'extreme': bool(extreme_mode_var.get()),
-        'potato': bool(potato_mode_var.get())
+        'potato': bool(potato_mode_var.get()),
+        'log_max_lines': log_max_lines_entry.get(),
+        'affinity': affinity_entry.get(),
+        'auto_restart': bool(auto_restart_var.get()),
+        'stall_seconds': stall_seconds_entry.get(),
+        'metrics_address': metrics_address_entry.get(),
+        'earnings': bool(earnings_var.get()),
+        'earnings_path': earnings_path_entry.get(),
+        'auto_switch_mode': bool(auto_switch_var.get()),
+        'rotate': bool(rotate_var.get()),
+        'record': bool(record_var.get()),
+        'throttle': bool(throttle_var.get()),
+        'throttle_min_workers': throttle_min_entry.get(),
+        'throttle_schedule': throttle_schedule_entry.get(),
+        'throttle_idle_seconds': throttle_idle_entry.get(),
+        'nice': nice_entry.get(),
+        'io_priority': io_priority_var.get(),
+        'cpu_quota': cpu_quota_entry.get(),
+        'reserve_gui_core': bool(reserve_core_var.get())
     }
 
-    with open(config_file, 'w') as file:
-        json.dump(config, file, indent=4)
+
+def save_config(profile_name, extra=None):
+    """Save the form into the named profile. Keys not shown in the form (e.g. tuning results) are kept."""
+    values = form_profile()
+    if extra:
+        values.update(extra)
+    save_profile(profile_name, values)
 
 
 def save_config_with_name():
@@ -76,16 +160,8 @@ def save_config_with_name():
 
 
 def load_config(profile_name):
-    try:
-        with open(config_file, 'r') as file:
-            config = json.load(file)
-    except FileNotFoundError:
-        config = default_config
-        os.makedirs(os.path.dirname(config_file), exist_ok=True)
-        with open(config_file, 'w') as file:
-            json.dump(config, file, indent=4)
-
-    profile = config["Profile"].get(profile_name, default_config["Profile"]["Default"])
+    config = read_config()
+    profile = config["Profile"].get(profile_name, hcc_core.default_config["Profile"]["Default"])
 
     api_url_entry.delete(0, tk.END)
     api_url_entry.insert(0, profile.get('api_url', ''))
@@ -104,60 +180,239 @@ def load_config(profile_name):
     threads_entry.insert(0, profile.get('threads', '0'))
 
     auto_download_var.set(bool(profile.get('auto_download', True)))
+    miner_version_entry.delete(0, tk.END)
+    miner_version_entry.insert(0, profile.get('miner_version', ''))
     extreme_mode_var.set(bool(profile.get('extreme', False)))
     potato_mode_var.set(bool(profile.get('potato', False)))
 
+    log_max_lines_entry.delete(0, tk.END)
+    log_max_lines_entry.insert(0, profile.get('log_max_lines', str(DEFAULT_LOG_MAX_LINES)))
+
+    affinity_entry.delete(0, tk.END)
+    affinity_entry.insert(0, profile.get('affinity', ''))
+
+    auto_restart_var.set(bool(profile.get('auto_restart', True)))
+    stall_seconds_entry.delete(0, tk.END)
+    stall_seconds_entry.insert(0, profile.get('stall_seconds', str(DEFAULT_STALL_SECONDS)))
+
+    metrics_address_entry.delete(0, tk.END)
+    metrics_address_entry.insert(0, profile.get('metrics_address', ''))
+
+    earnings_var.set(bool(profile.get('earnings', False)))
+    earnings_path_entry.delete(0, tk.END)
+    earnings_path_entry.insert(0, profile.get('earnings_path', FAUCET_DEFAULT_PATH))
+    auto_switch_var.set(bool(profile.get('auto_switch_mode', False)))
+    rotate_var.set(bool(profile.get('rotate', False)))
+    record_var.set(bool(profile.get('record', False)))
+    throttle_var.set(bool(profile.get('throttle', False)))
+    throttle_min_entry.delete(0, tk.END)
+    throttle_min_entry.insert(0, profile.get('throttle_min_workers', '1'))
+    throttle_schedule_entry.delete(0, tk.END)
+    throttle_schedule_entry.insert(0, profile.get('throttle_schedule', ''))
+    throttle_idle_entry.delete(0, tk.END)
+    throttle_idle_entry.insert(0, profile.get('throttle_idle_seconds', '0'))
+    nice_entry.delete(0, tk.END)
+    nice_entry.insert(0, profile.get('nice', ''))
+    io_priority_var.set(profile.get('io_priority', 'normal'))
+    cpu_quota_entry.delete(0, tk.END)
+    cpu_quota_entry.insert(0, profile.get('cpu_quota', ''))
+    reserve_core_var.set(bool(profile.get('reserve_gui_core', False)))
+
+    show_tuned_hint(profile)
+
+
+def log_max_lines():
+    try:
+        return max(MIN_LOG_MAX_LINES, int(log_max_lines_entry.get().strip()))
+    except ValueError:
+        return DEFAULT_LOG_MAX_LINES
+
+
+LIVE_LINE_FG = '#7fd7ff'
+ANSI_FG = {
+    'black': '#808080', 'red': '#ff5f5f', 'green': '#5fd75f', 'yellow': '#ffd75f', 'blue': '#5f87ff',
+    'magenta': '#d75fd7', 'cyan': '#5fd7d7', 'white': '#ffffff', 'gray': '#a8a8a8',
+}
 
-def load_profile_names():
+
+def configure_log_tags(widget):
+    """Set up the ANSI colour tags and the live status line tag on a log Text widget."""
+    for colour in set(ANSI_COLOURS.values()):
+        widget.tag_configure(f'ansi-{colour}', foreground=ANSI_FG.get(colour, 'white'))
+    bold = tkFont.Font(font=widget.cget('font'))
+    bold.configure(weight='bold')
+    widget.bold_font = bold  # keep a reference; Tk drops fonts nobody holds
+    widget.tag_configure('ansi-bold', font=bold)
+    widget.tag_configure('live', foreground=LIVE_LINE_FG)
+
+
+def append_text(widget, text, max_lines, live=None):
+    """Append text to a log Text widget, trimming the oldest lines beyond max_lines.
+
+    text is a string or a list of (text, tags) segments. live replaces the line the miner is
+    redrawing in place, which is kept below the log ('' clears it, None leaves it as is).
+    """
+    # Only follow the tail if the user hasn't scrolled up to read older output.
+    at_end = widget.yview()[1] >= 1.0
+    live_chars = getattr(widget, 'live_chars', 0)
+    if live_chars:
+        widget.delete(f'end-1c-{live_chars}c', 'end-1c')
+    if isinstance(text, str):
+        if text:
+            widget.insert(tk.END, text)
+    elif text:
+        widget.insert(tk.END, *[arg for segment in text for arg in segment])
+    if live is not None:
+        widget.live_text = live
+    live_chars = 0
+    if getattr(widget, 'live_text', ''):
+        shown = widget.live_text if widget.get('end-2c') in ('\n', '') else '\n' + widget.live_text
+        widget.insert(tk.END, shown, 'live')
+        live_chars = len(shown)
+    widget.live_chars = live_chars
+    excess = int(widget.index('end-1c').split('.')[0]) - max_lines
+    if excess > 0:
+        widget.delete('1.0', f'{excess + 1}.0')
+    if at_end:
+        widget.see(tk.END)
+
+
+def clear_output():
+    """Empty the main log view, including its live line and whatever the log buffer still holds for it."""
+    log_buffer.drain()
+    log_buffer.take_live()
+    output_textbox.delete("1.0", tk.END)
+    output_textbox.live_text = ''
+    output_textbox.live_chars = 0
+
+
+def append_output(text):
+    """Append text to the main log view (and the session log)."""
+    session_log_for('gui').write_lines([text])
+    append_text(output_textbox, text, log_max_lines())
+
+
+# On-disk session logs (see hcc_core.SessionLog): 'gui' for the main window, one per instance
+session_logs = {}
+
+
+def session_log_for(name):
+    if name not in session_logs:
+        session_logs[name] = SessionLog(name)
+    return session_logs[name]
+
+
+def drain_log_into(widget, log, max_lines):
+    """Move everything pending in a LogBuffer into a log Text widget with a single insert.
+
+    Returns the number of lines taken from the buffer, dropped ones included.
+    """
+    log.set_max_lines(max_lines)
+    lines, dropped = log.drain()
+    live = log.take_live()
+    if lines or dropped or live is not None:
+        segments = []
+        if dropped:
+            segments.append((f"[!] Log view fell behind: {dropped} line(s) dropped\n", ()))
+        for line in coalesce_lines(lines):
+            segments.extend(ansi_segments(line))
+        append_text(widget, segments, max_lines,
+                    live=None if live is None else strip_ansi_codes(live))
+    return len(lines) + dropped
+
+
+def update_output_textbox():
+    """Drain everything pending in the log buffer and insert it into the log view in one go."""
+    started = time.perf_counter()
     try:
-        with open(config_file, 'r') as file:
-            config = json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        config = default_config
+        diagnostics.count_lines(drain_log_into(output_textbox, log_buffer, log_max_lines()))
+    finally:
+        diagnostics.observe('log view update (drain + Text insert)', (time.perf_counter() - started) * 1000)
+        root.after(LOG_POLL_MS, update_output_textbox)
 
-    if "Profile" in config:
-        return list(config["Profile"].keys())
-    else:
-        return ["Default"]
 
-def execute_command(cmd, output_queue):
-    global mining_process, stop_requested
+def draw_sparkline(canvas, values):
+    canvas.delete('all')
+    width = canvas.winfo_width()
+    height = canvas.winfo_height()
+    if len(values) < 2 or width < 4 or height < 4:
+        return
+    top = max(values) or 1.0
+    step = (width - 2) / (len(values) - 1)
+    points = []
+    for i, v in enumerate(values):
+        points.extend((1 + i * step, height - 2 - (height - 4) * v / top))
+    canvas.create_line(*points, fill='lime green', width=1)
+
+
+def update_telemetry_view():
+    """Refresh the hashrate stats row and sparkline from the parsed miner output."""
+    started = time.perf_counter()
     try:
-        startupinfo = None
-        if os.name == 'nt':  # If running on Windows
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-
-        mining_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
-                                          startupinfo=startupinfo)
-
-        # Continuously read output
-        for line in mining_process.stdout:
-            if line:
-                output_queue.put(line)
-
-        return_code = mining_process.wait()
-        if return_code and not stop_requested:
-            output_queue.put(f"Process exited with return code {return_code}")
-
-    except subprocess.CalledProcessError as e:
-        output_queue.put(f"Exception: {str(e)}")
+        snap = telemetry.snapshot()
+        parts = [
+            f"Hashrate: {format_hashrate(snap['current'])}",
+            f"avg {format_hashrate(snap['average'])}",
+            f"peak {format_hashrate(snap['peak'])}",
+            f"Solutions: {snap['solutions']}",
+            f"Accepted: {snap['accepted']}",
+            f"Rejected: {snap['rejected']}",
+        ]
+        if snap['last_solve_seconds'] is not None:
+            parts.append(f"Last solve: {snap['last_solve_seconds']:.1f}s")
+        if mining_instance is not None and mining_instance.restarts:
+            parts.append(f"Restarts: {mining_instance.restarts}")
+        telemetry_label.config(text="  |  ".join(parts))
+        draw_sparkline(sparkline_canvas, [rate for _, rate in snap['samples']])
+        model = mining_instance.settings['mode_model'] if mining_instance is not None else None
+        advisor_label.config(text="Mode advisor: " + format_mode_estimates(
+            mode_advisor.estimates(model), mining_instance.mode() if mining_instance is not None else None))
+        rotation = profile_rotator.status()
+        current = mining_instance.profile() if mining_instance is not None and mining_instance.active() else None
+        rotation_label.config(text="Rotation: " + format_rotation(rotation, current) if rotation else "")
+        # The watchdog changes the status (and, when switching modes or profiles, the mode and profile)
+        # of a miner behind the UI's back.
+        if mining_instance is not None and not mining_instance.stop_requested:
+            update_mining_status(f"Status: {mining_instance.status}")
+            if mining_instance.profile() != selected_profile_name.get():
+                selected_profile_name.set(mining_instance.profile())
+            extreme_mode_var.set(mining_instance.settings['extreme'])
+            potato_mode_var.set(mining_instance.settings['potato'])
     finally:
-        stop_requested = False
-        update_mining_status("Status: Not Mining")
+        diagnostics.observe('telemetry view update', (time.perf_counter() - started) * 1000)
+        root.after(TELEMETRY_POLL_MS, update_telemetry_view)
 
 
-def update_output_textbox(output_queue):
+def update_earnings_view():
+    """Refresh the earnings row; the faucet itself is only polled every FAUCET_POLL_SECONDS, on the executor."""
+    global faucet_stats, earnings_poll_pending
     try:
-        line = output_queue.get_nowait()
-        clean_line = strip_ansi_codes(line)
-        output_textbox.insert(tk.END, clean_line)
-        output_textbox.see(tk.END)
-    except queue.Empty:
-        pass
+        api_url = api_url_entry.get().strip()
+        private_key = private_key_entry.get().strip()
+        path = earnings_path_entry.get().strip() or FAUCET_DEFAULT_PATH
+        if not earnings_var.get() or not api_url or not private_key:
+            faucet_stats = None
+            earnings_label.config(text="")
+            return
+        stats = faucet_stats
+        if stats is None or stats.url != api_url.rstrip('/') + '/' + path.lstrip('/') or stats.private_key != private_key:
+            stats = faucet_stats = FaucetStats(api_url, private_key, path)
+        if not earnings_poll_pending and time.monotonic() >= stats.next_poll:
+            earnings_poll_pending = True
+
+            instance = mining_instance
+
+            def _done(snap):
+                global earnings_poll_pending
+                earnings_poll_pending = False
+                if instance is not None and isinstance(snap, dict):
+                    mode_advisor.note_earnings(instance.mode(), instance.settings['mode_model'], snap)
+                    profile_rotator.note_earnings(instance.profile(), snap)
+
+            task_executor.submit(stats.poll, telemetry.snapshot(samples=False)['hashes'], on_done=_done, on_error=_done)
+        earnings_label.config(text=format_earnings(stats.snapshot()))
     finally:
-        root.after(100, update_output_textbox, output_queue)
+        root.after(TELEMETRY_POLL_MS, update_earnings_view)
 
 
 def update_mining_status(message):
@@ -167,46 +422,6 @@ def update_mining_status(message):
     status_label.config(text=message, fg=fg_color)
 
 
-def default_miner_path():
-    """Default miner path for manual mode. If a local miner is in the same folder, prefer it; else empty."""
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Prefer a simple local name if user placed it next to the GUI.
-        candidates = ['hcc_miner.exe', 'hcc_miner', 'faucet_miner.exe', 'faucet_miner']
-        for name in candidates:
-            candidate = os.path.join(script_dir, name)
-            if os.path.exists(candidate):
-                return candidate
-    except Exception:
-        pass
-    # Empty means: rely on auto-download or PATH.
-    return ''
-
-
-def resolve_miner_exe():
-    """Resolve miner path from UI. If empty, use default. If relative, try script dir first, then PATH."""
-    p = miner_path_entry.get().strip()
-    if not p:
-        p = default_miner_path() or 'hcc_miner.exe' if os.name == 'nt' else 'hcc_miner'
-
-    # If relative, try script directory.
-    if not os.path.isabs(p):
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            candidate = os.path.join(script_dir, p)
-            if os.path.exists(candidate):
-                return candidate
-        except Exception:
-            pass
-
-        # Try PATH
-        which = shutil.which(p)
-        if which:
-            return which
-
-    return p
-
-
 def browse_miner_path():
     initial = miner_path_entry.get().strip() or default_miner_path()
     # If initial is a file, use its directory
@@ -234,214 +449,142 @@ def toggle_show_key():
         private_key_entry.config(show='*')
 
 
-GITHUB_OWNER = "Hashcash-PoW-Faucet"
-GITHUB_REPO = "HCC-CLI-Miner"
-
-
-def app_data_dir():
-    """Cross-platform per-user data dir."""
-    # Windows
-    if os.name == 'nt':
-        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
-        return os.path.join(base, 'HashcashMiner')
-    # macOS
-    if platform.system().lower() == 'darwin':
-        return os.path.join(os.path.expanduser('~'), 'Library', 'Application Support', 'HashcashMiner')
-    # Linux/Unix
-    xdg = os.environ.get('XDG_DATA_HOME')
-    if xdg:
-        return os.path.join(xdg, 'hashcashminer')
-    return os.path.join(os.path.expanduser('~'), '.local', 'share', 'hashcashminer')
-
-
-def detect_os_arch():
-    """Map current OS/arch to the release asset naming scheme."""
-    sys = platform.system().lower()
-    mach = platform.machine().lower()
-
-    # OS mapping
-    if sys.startswith('win'):
-        os_id = 'win'
-        ext = '.exe'
-    elif sys == 'darwin':
-        os_id = 'mac'
-        ext = ''
-    else:
-        os_id = 'linux'
-        ext = ''
-
-    # Arch mapping
-    # Prefer pointer size to detect 32-bit python on x86
-    ptr_bits = struct.calcsize('P') * 8
-
-    if mach in ('x86_64', 'amd64'):
-        arch = 'amd64' if ptr_bits == 64 else '386'
-    elif mach in ('i386', 'i686', 'x86'):
-        arch = '386'
-    elif mach in ('arm64', 'aarch64'):
-        arch = 'arm64'
-    elif mach.startswith('armv6') or mach == 'armv6l':
-        arch = 'armv6'
-    elif mach.startswith('armv7') or mach == 'armv7l':
-        arch = 'armv7'
-    else:
-        raise RuntimeError(f"Unsupported architecture: {platform.machine()}")
-
-    return os_id, arch, ext
-
-
-def sha256_file(path):
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b''):
-            h.update(chunk)
-    return h.hexdigest()
+def show_progress(text, done=None, total=None):
+    """Show the progress bar with a caption; without a total it runs in indeterminate mode."""
+    progress_label.config(text=text)
+    if total:
+        progress_bar.stop()
+        progress_bar.config(mode='determinate', maximum=total, value=done or 0)
+    elif str(progress_bar.cget('mode')) != 'indeterminate':
+        progress_bar.config(mode='indeterminate', value=0)
+        progress_bar.start(15)
+    progress_frame.grid()
 
 
-def github_latest_release():
-    url = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    return r.json()
+def hide_progress():
+    progress_bar.stop()
+    progress_frame.grid_remove()
 
 
-def find_asset(release_json, asset_name):
-    for a in release_json.get('assets', []):
-        if a.get('name') == asset_name:
-            return a
-    return None
-
-
-def ensure_latest_miner(log_fn):
-    """Download the latest miner binary for this OS/arch into app data dir and return its path."""
-    rel = github_latest_release()
-    tag = rel.get('tag_name', '')
-    version = tag[1:] if tag.startswith('v') else tag
-
-    os_id, arch, ext = detect_os_arch()
-    asset_name = f"hcc_miner_{os_id}_{arch}_{version}{ext}"
-
-    asset = find_asset(rel, asset_name)
-    if not asset:
-        raise RuntimeError(f"No matching asset in latest release: {asset_name}")
+def show_download_progress(done, total):
+    if total:
+        text = f"Downloading miner {done * 100 // total}% ({format_bytes(done)} / {format_bytes(total)})"
+    else:
+        text = f"Downloading miner ({format_bytes(done)})"
+    show_progress(text, done, total)
+    update_mining_status(f"Status: {text}")
 
-    download_url = asset.get('browser_download_url')
-    if not download_url:
-        raise RuntimeError('Missing download URL for asset')
 
-    base = app_data_dir()
-    bin_dir = os.path.join(base, 'bin', tag)
-    os.makedirs(bin_dir, exist_ok=True)
-    local_path = os.path.join(bin_dir, asset_name)
+def cancel_setup():
+    """Cancel a pending miner download/verification (no-op if nothing is pending)."""
+    if setup_cancel is not None:
+        setup_cancel.set()
 
-    if os.path.exists(local_path):
-        try:
-            local_size = os.path.getsize(local_path)
-        except Exception:
-            local_size = None
 
-        expected_size = asset.get('size')
+def current_settings():
+    """Snapshot of the form as used to launch the miner (plus profile keys the form doesn't show)."""
+    return keep_gui_core(profile_settings({**load_profile(selected_profile_name.get()), **form_profile()}))
 
-        # If the cached file size doesn't match the GitHub asset size, re-download.
-        if expected_size is not None and local_size is not None and int(local_size) != int(expected_size):
-            log_fn(f"[!] Cached miner size mismatch (local={local_size} bytes, expected={expected_size} bytes). Re-downloading...\n")
-        else:
-            # Log SHA256 for troubleshooting (compare with release notes)
-            try:
-                h = sha256_file(local_path)
-                log_fn(f"[*] Cached miner SHA256: {h}\n")
-            except Exception:
-                pass
-            log_fn(f"[*] Using cached miner: {local_path}\n")
-            return local_path
-
-    log_fn(f"[*] Downloading latest miner: {asset_name}\n")
-    r = requests.get(download_url, timeout=60)
-    r.raise_for_status()
-
-    tmp = local_path + '.tmp'
-    with open(tmp, 'wb') as f:
-        f.write(r.content)
-    os.replace(tmp, local_path)
-
-    # Make executable on unix
-    if ext == '':
-        st = os.stat(local_path)
-        os.chmod(local_path, st.st_mode | stat.S_IEXEC)
 
-    try:
-        h = sha256_file(local_path)
-        log_fn(f"[*] Downloaded miner SHA256: {h}\n")
-    except Exception:
-        pass
+def keep_gui_core(settings):
+    """Reserve a core for the GUI (once, on the Tk thread) if the profile asks for it.
 
-    log_fn(f"[+] Miner ready: {local_path}\n")
-    return local_path
+    From then on every miner started by this GUI is kept off it (see hcc_core.miner_cpus).
+    """
+    global gui_core
+    if settings['reserve_gui_core'] and gui_core is None:
+        gui_core = reserve_gui_core() or set()
+        if gui_core:
+            log_buffer.put(f"[*] CPU {format_cpu_list(gui_core)} is reserved for the GUI; miners run on the others.\n")
+    return settings
 
 
 def start_mining():
-    global mining_process
+    global setup_cancel
 
     # Disable the "Mine" button to prevent re-clicking
     mine_button.config(state=tk.DISABLED)
 
-    if mining_process is None or mining_process.poll() is not None:
+    if mining_instance is None or not mining_instance.active():
         # Clear the output textbox only if mining is not already in progress
-        output_textbox.delete("1.0", tk.END)
+        # The session log keeps it all; mark where this run starts.
+        clear_output()
+        session_log_for('gui').write_lines([f"=== Mine: profile '{selected_profile_name.get()}' ===\n"])
+
+    settings = current_settings()
+    problem = check_settings(settings)
+    if problem:
+        append_output(problem[0])
+        update_mining_status(problem[1])
+        mine_button.config(state=tk.NORMAL)
+        return
+    metrics_server.serve(parse_metrics_address(settings['metrics_address']), log_buffer.put)
+
+    # Auto-download the latest (or pinned) miner if enabled and no manual path applies (see profile_settings).
+    # Release lookup, download and verification run on the task executor; launch_miner()
+    # continues on the Tk thread once they are done.
+    if settings['miner_exe'] is None:
+        setup_cancel = threading.Event()
+        cancel = setup_cancel
+        show_progress("Preparing miner...")
+        update_mining_status("Status: Preparing miner")
+        task_executor.submit(
+            ensure_latest_miner, log_buffer.put,
+            lambda done, total: task_executor.call_soon(show_download_progress, done, total),
+            cancel, settings['miner_version'] or None,
+            on_done=lambda path: on_miner_ready(path, cancel),
+            on_error=lambda e: on_miner_setup_failed(e, cancel),
+        )
+        return
 
-    api_url = api_url_entry.get().strip()
-    private_key = private_key_entry.get().strip()
-    threads = threads_entry.get().strip() or "0"
+    launch_miner()
 
-    if not private_key:
-        output_textbox.insert(tk.END, "ERROR: Please enter your private key.\n")
-        update_mining_status("Error: Missing private key")
-        mine_button.config(state=tk.NORMAL)
+
+def on_miner_ready(path, cancel):
+    hide_progress()
+    if cancel.is_set():
+        on_miner_setup_failed(TaskCancelled(), cancel)
         return
+    # The downloaded path stays out of the form, so saving the profile doesn't turn it into a manual path.
+    launch_miner(path)
 
-    # Modes are mutually exclusive
-    if extreme_mode_var.get() and potato_mode_var.get():
-        output_textbox.insert(tk.END, "ERROR: EXTREME and POTATO mode cannot be enabled at the same time.\n")
-        update_mining_status("Error: Invalid mode selection")
+
+def on_miner_setup_failed(e, cancel):
+    if cancel is not setup_cancel:
+        return  # a newer Mine click owns the UI by now
+    hide_progress()
+    if cancel.is_set() or isinstance(e, TaskCancelled):
+        append_output("Miner setup cancelled.\n")
+        update_mining_status("Status: Not Mining")
         mine_button.config(state=tk.NORMAL)
         return
+    append_output(f"[!] Auto-download failed: {e}\n")
+    launch_miner()
 
-    # Auto-download latest miner if enabled and no explicit path was set
-    if auto_download_var.get() and not miner_path_entry.get().strip():
-        try:
-            def _log(msg):
-                output_textbox.insert(tk.END, msg)
-                output_textbox.see(tk.END)
-            path = ensure_latest_miner(_log)
-            miner_path_entry.delete(0, tk.END)
-            miner_path_entry.insert(0, path)
-        except Exception as e:
-            output_textbox.insert(tk.END, f"[!] Auto-download failed: {e}\n")
-            output_textbox.see(tk.END)
-
-    miner_exe = resolve_miner_exe()
+
+def launch_miner(miner_exe=None):
+    global mining_instance
+    settings = current_settings()
+    miner_exe = settings['miner_exe'] = miner_exe or settings['miner_exe'] or resolve_miner_exe(miner_path_entry.get())
     # If it's an absolute path and doesn't exist, show a friendly error.
     if os.path.isabs(miner_exe) and not os.path.exists(miner_exe):
-        output_textbox.insert(tk.END, f"ERROR: Miner executable not found: {miner_exe}\n")
+        append_output(f"ERROR: Miner executable not found: {miner_exe}\n")
         update_mining_status("Error: Missing miner executable")
         mine_button.config(state=tk.NORMAL)
         return
 
-    # IMPORTANT (Go flag parsing): pass bool/int flags using = syntax.
-    # Do NOT pass bool flags as `-progress true` because the `true` becomes a positional arg
-    # and Go's flag parser may stop parsing further flags (e.g. `-extreme`).
-    command = [
-        miner_exe,
-        "-url", api_url,
-        "-key", private_key,
-        "-workers", threads,
-        "-progress=true",
-        "-progress-interval=2",
-    ]
-    if extreme_mode_var.get():
-        command.append("-extreme")
-    if potato_mode_var.get():
-        command.append("-potato")
+    instance = MinerInstance(selected_profile_name.get(), settings, log=log_buffer, telemetry=telemetry,
+                             on_exit=lambda inst: task_executor.call_soon(on_miner_exited, inst),
+                             on_state=lambda inst: task_executor.call_soon(on_miner_state, inst))
+    try:
+        supervisor.add(instance)
+    except RuntimeError as e:
+        append_output(f"ERROR: {e} in the Instances window.\n")
+        update_mining_status("Error: Profile already running")
+        mine_button.config(state=tk.NORMAL)
+        return
+    command = build_miner_command(miner_exe, settings['api_url'], settings['private_key'], settings['threads'],
+                                  settings['extreme'], settings['potato'])
 
     # Debug: Log mode + command into the GUI output (so we can verify flags are passed)
 #    mode = "EXTREME" if extreme_mode_var.get() else "normal"
@@ -451,51 +594,690 @@ def start_mining():
 
     print("Executing:", " ".join(command))
 
-    # Start the command in a new thread
-    output_queue = queue.Queue()
-    threading.Thread(target=execute_command, args=(command, output_queue), daemon=True).start()
-    update_output_textbox(output_queue)
+    # Start the miner on its reader thread; its output is parsed into telemetry and picked up by the
+    # update_output_textbox loop
+    mining_instance = instance
+    instance.start()
     update_mining_status("Status: Mining")
 
 
-def best_effort_cancel_pow():
+def start_tuning():
+    """Tune button: find the fastest worker count for this machine and store it in the current profile."""
+    global setup_cancel
+    if mining_instance is not None and mining_instance.active():
+        append_output("ERROR: Stop mining before tuning the worker count.\n")
+        return
+    settings = current_settings()
+    problem = check_settings(settings)
+    if problem:
+        append_output(problem[0])
+        update_mining_status(problem[1])
+        return
+
+    setup_cancel = threading.Event()
+    cancel = setup_cancel
+    profile_name = selected_profile_name.get()
+    mine_button.config(state=tk.DISABLED)
+    tune_button.config(state=tk.DISABLED)
+    show_progress("Tuning workers...")
+    update_mining_status("Status: Tuning workers")
+    append_output(f"[*] Tuning worker count: {TUNE_TRIAL_SECONDS}s per trial. Press Stop or Cancel to abort.\n")
+    task_executor.submit(
+        run_tuning, settings, cancel,
+        on_done=lambda result: on_tuning_done(result, profile_name, cancel),
+        on_error=lambda e: on_tuning_failed(e, cancel),
+    )
+
+
+def run_tuning(settings, cancel):
+    """Executor task: make sure a miner is available, then run the tuning trials."""
+    if not settings['miner_exe']:
+        settings['miner_exe'] = ensure_latest_miner(log_buffer.put, None, cancel, settings['miner_version'] or None)
+
+    def _progress(done, total, workers):
+        text = f"Tuning workers: trial {done + 1}/{total} ({workers} workers)" if workers else "Tuning workers: done"
+        task_executor.call_soon(show_progress, text, done, total)
+
+    best, results = tune_workers(settings, worker_candidates(os.cpu_count() or 1), log_buffer.put, _progress, cancel)
+    return settings['miner_exe'], best, results
+
+
+def on_tuning_done(result, profile_name, cancel):
+    miner_exe, best, results = result
+    if not finish_tuning(cancel) or cancel.is_set():
+        return
+    version = miner_version_from_path(miner_exe)
+    threads_entry.delete(0, tk.END)
+    threads_entry.insert(0, str(best))
+    tuned = dict(load_profile(profile_name).get('tuned_workers', {}))
+    tuned[f"{machine_key()}|{version}"] = {
+        'workers': best,
+        'hashrate': results[best],
+        'results': {str(k): v for k, v in results.items()},
+        'tuned_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    save_config(profile_name, extra={'tuned_workers': tuned})
+    show_tuned_hint({'tuned_workers': tuned})
+    append_output(f"[+] Best worker count: {best} ({format_hashrate(results[best])}, miner {version}); "
+                  f"saved to profile '{profile_name}'.\n")
+
+
+def on_tuning_failed(e, cancel):
+    if not finish_tuning(cancel):
+        return
+    if cancel.is_set() or isinstance(e, TaskCancelled):
+        append_output("Tuning cancelled.\n")
+    else:
+        append_output(f"[!] Tuning failed: {e}\n")
+
+
+def finish_tuning(cancel):
+    """Restore the UI after tuning or a version benchmark; returns False if a newer Mine/Tune click owns the UI by now."""
+    tune_button.config(state=tk.NORMAL)
+    if cancel is not setup_cancel:
+        return False
+    hide_progress()
+    update_mining_status("Status: Not Mining")
+    mine_button.config(state=tk.NORMAL)
+    return True
+
+
+def start_replay():
+    """Feed a recorded miner session into the log view and hashrate row, as if the miner were running."""
+    global setup_cancel
+    if mining_instance is not None and mining_instance.active():
+        append_output("ERROR: Stop mining before replaying a recording.\n")
+        return
     try:
-        api_url = api_url_entry.get().strip().rstrip('/')
-        private_key = private_key_entry.get().strip()
-        if not api_url or not private_key:
-            return
-        r = requests.post(f"{api_url}/cancel_pow", headers={"Authorization": f"Bearer {private_key}"}, timeout=3)
-        # ignore response body; best-effort only
-        _ = r.status_code
-    except Exception:
-        pass
+        speed = float(replay_speed_entry.get().strip() or "1")
+        if speed < 0:
+            raise ValueError
+    except ValueError:
+        append_output("ERROR: Replay speed must be a number >= 0 (0 = as fast as possible).\n")
+        return
+    path = filedialog.askopenfilename(
+        title='Select a miner recording',
+        initialdir=recordings_dir() if os.path.isdir(recordings_dir()) else None,
+        filetypes=[('Miner recordings', '*.hccrec.gz'), ('All files', '*')],
+    )
+    if not path:
+        return
+
+    setup_cancel = threading.Event()
+    cancel = setup_cancel
+    mine_button.config(state=tk.DISABLED)
+    tune_button.config(state=tk.DISABLED)
+    clear_output()
+    telemetry.reset()
+    show_progress("Replaying...")
+    update_mining_status("Status: Replaying a recording (Stop or Cancel ends it)")
+    task_executor.submit(
+        replay_recording, path, log_buffer, telemetry, speed, cancel,
+        on_done=lambda replayed: on_replay_done(replayed, cancel),
+        on_error=lambda e: on_replay_done(e, cancel),
+    )
+
+
+def on_replay_done(result, cancel):
+    if not finish_tuning(cancel):
+        return
+    if cancel.is_set() or isinstance(result, TaskCancelled):
+        append_output("Replay stopped.\n")
+    elif isinstance(result, Exception):
+        append_output(f"[!] Replay failed: {result}\n")
+    else:
+        append_output(f"[*] Replay finished ({format_bytes(result)}).\n")
+
+
+def show_tuned_hint(profile):
+    """Show the tuned worker count for this machine (newest miner version) next to the Workers field."""
+    prefix = machine_key() + '|'
+    records = [(key[len(prefix):], rec) for key, rec in profile.get('tuned_workers', {}).items() if key.startswith(prefix)]
+    if not records:
+        tuned_label.config(text="")
+        return
+    version, rec = max(records, key=lambda item: version_key(item[0]))
+    tuned_label.config(text=f"tuned: {rec.get('workers')} ({format_hashrate(rec.get('hashrate', 0))}, {version})")
+
+
+def on_miner_exited(instance):
+    """Called on the Tk thread when the main window's miner has ended."""
+    if instance is not mining_instance or instance.stop_requested:
+        return  # stop_mining() takes care of the UI
+    update_mining_status(f"Status: {instance.status}")
+    # After a relaunch (mode switch, throttle, rotation) the miner is already starting again by now.
+    if instance.restart_at is None and instance.state == "exited":
+        mine_button.config(state=tk.NORMAL)
+
+
+def on_miner_state(instance):
+    """Called on the Tk thread when the main window's miner changes lifecycle state."""
+    if instance.state in ("stopping", "killing") or (instance is mining_instance and instance.state == "running"):
+        update_mining_status(f"Status: {instance.status}")
 
 
 def stop_mining():
-    global mining_process, stop_requested
-    stop_requested = True  # Set the flag when stopping
-    if mining_process:
-        best_effort_cancel_pow()
-        mining_process.terminate()
-        mining_process.wait(5)
-        mining_process = None
-        output_textbox.insert(tk.END, "Mining stopped.\n")
+    global mining_instance
+    cancel_setup()
+    instance = mining_instance
+    if instance is not None and instance.active():
+        mining_instance = None
+        instance.stop_requested = True  # Set the flag when stopping
+        stop_button.config(state=tk.DISABLED)
+        update_mining_status("Status: Stopping...")
+        task_executor.submit(
+            instance.stop,
+            on_done=lambda _: on_miner_stopped(),
+            on_error=on_miner_stop_failed,
+        )
+        return
     update_mining_status("Status: Not Mining")
     mine_button.config(state=tk.NORMAL)
 
 
+def on_miner_stopped():
+    append_output("Mining stopped.\n")
+    update_mining_status("Status: Not Mining")
+    stop_button.config(state=tk.NORMAL)
+    mine_button.config(state=tk.NORMAL)
+
+
+def on_miner_stop_failed(e):
+    append_output(f"[!] Error stopping miner: {e}\n")
+    on_miner_stopped()
+
+
 def on_closing():
-    global mining_process
-    if mining_process:
-        # Terminate the process using its PID
-        try:
-            mining_process.terminate()
-            mining_process.wait(5)  # Wait for 5 seconds to allow process to terminate
-        except Exception as e:
-            print("Error terminating process:", e)
+    cancel_setup()
+    mode_advisor.save()
+    running = [instance for instance in supervisor.instances() if instance.active()]
+    if running:
+        # Hide the window right away and let the executor wait for the miners to exit.
+        root.withdraw()
+        pending = [len(running)]
+
+        def _stopped(error=None):
+            if error is not None:
+                print("Error terminating process:", error)
+            pending[0] -= 1
+            if pending[0] == 0:
+                close_session_logs()
+                task_executor.shutdown()
+                root.destroy()  # Close the GUI
+
+        for instance in running:
+            task_executor.submit(instance.stop, False, on_done=lambda _: _stopped(), on_error=_stopped)
+        return
+    close_session_logs()
+    task_executor.shutdown()
     root.destroy()  # Close the GUI
 
 
+def close_session_logs():
+    for session_log in session_logs.values():
+        session_log.close()
+
+
+# Instances window: run further profiles side by side with the main window's miner.
+instances_window = None
+instance_panes = {}  # profile name -> {'text', 'status', 'stats'}
+
+
+def open_instances_window():
+    global instances_window
+    if instances_window is not None and instances_window.winfo_exists():
+        instances_window.lift()
+        return
+
+    win = tk.Toplevel(root)
+    win.title("Miner instances")
+    win.minsize(800, 500)
+    win.grid_columnconfigure(0, weight=1)
+    win.grid_rowconfigure(2, weight=1)
+    instances_window = win
+    instance_panes.clear()
+
+    win.aggregate_label = tk.Label(win, text="", font=custom_font, anchor='w')
+    win.aggregate_label.grid(row=0, column=0, sticky='we', padx=6, pady=4)
+
+    profiles_frame = tk.Frame(win)
+    profiles_frame.grid(row=1, column=0, sticky='we', padx=6)
+    for i, name in enumerate(load_profile_names()):
+        profile = load_profile(name)
+        detail = f"workers={profile.get('threads', '0')}"
+        if profile.get('affinity'):
+            detail += f", cpus={profile['affinity']}"
+        tk.Label(profiles_frame, text=f"{name} ({detail})", anchor='w').grid(row=i, column=0, sticky='w')
+        tk.Button(profiles_frame, text="Start", width=8,
+                  command=lambda n=name: start_instance(n)).grid(row=i, column=1, padx=2)
+        tk.Button(profiles_frame, text="Stop", width=8,
+                  command=lambda n=name: stop_instance(n)).grid(row=i, column=2, padx=2)
+
+    win.notebook = ttk.Notebook(win)
+    win.notebook.grid(row=2, column=0, sticky='nsew', padx=6, pady=6)
+
+    # Re-attach panes for instances that kept running while the window was closed.
+    for instance in supervisor.instances():
+        if instance is not mining_instance and instance.active():
+            instance_pane(instance.name)
+
+    update_instance_logs()
+    update_instance_stats()
+
+
+def instance_pane(name):
+    """Notebook tab (status, stats and log) of an instance in the Instances window."""
+    pane = instance_panes.get(name)
+    if pane is not None:
+        return pane
+    frame = tk.Frame(instances_window.notebook)
+    frame.grid_columnconfigure(0, weight=1)
+    frame.grid_rowconfigure(2, weight=1)
+    status = tk.Label(frame, text="Status: Not Mining", anchor='w')
+    status.grid(row=0, column=0, sticky='we')
+    stats = tk.Label(frame, text="", anchor='w')
+    stats.grid(row=1, column=0, sticky='we')
+    text = tk.Text(frame, bg='black', fg='white')
+    configure_log_tags(text)
+    text.grid(row=2, column=0, sticky='nsew')
+    instances_window.notebook.add(frame, text=name)
+    pane = instance_panes[name] = {'text': text, 'status': status, 'stats': stats, 'max_lines': DEFAULT_LOG_MAX_LINES}
+    return pane
+
+
+def start_instance(name):
+    current = supervisor.get(name)
+    if current is not None and current.active():
+        return
+    profile = load_profile(name)
+    settings = keep_gui_core(profile_settings(profile))
+    pane = instance_pane(name)
+    try:
+        pane['max_lines'] = max(MIN_LOG_MAX_LINES, int(profile.get('log_max_lines', DEFAULT_LOG_MAX_LINES)))
+    except ValueError:
+        pane['max_lines'] = DEFAULT_LOG_MAX_LINES
+    problem = check_settings(settings)
+    if problem:
+        append_text(pane['text'], problem[0], pane['max_lines'])
+        return
+
+    log = LogBuffer(pane['max_lines'], sink=session_log_for(f"instance-{name}").write_lines)
+    instance = MinerInstance(name, settings, log=log)
+    try:
+        supervisor.add(instance)
+    except RuntimeError as e:
+        append_text(pane['text'], f"ERROR: {e} in the main window.\n", pane['max_lines'])
+        return
+    if settings['miner_exe'] is None:
+        instance.status = "Preparing miner"
+
+        def _ready(path):
+            if instance.stop_requested:
+                instance.status = "Not Mining"
+                return
+            settings['miner_exe'] = path
+            instance.start()
+
+        def _failed(e):
+            instance.log.put(f"[!] Auto-download failed: {e}\n")
+            instance.status = "Error: Missing miner executable"
+
+        task_executor.submit(ensure_latest_miner, instance.log.put, None, None, settings['miner_version'] or None,
+                             on_done=_ready, on_error=_failed)
+        return
+    instance.start()
+
+
+def stop_instance(name):
+    instance = supervisor.get(name)
+    if instance is None or instance is mining_instance:
+        return
+    instance.stop_requested = True
+    instance.status = "Stopping..."
+    task_executor.submit(instance.stop, on_done=lambda _: instance.log.put("Mining stopped.\n"),
+                         on_error=lambda e: instance.log.put(f"[!] Error stopping miner: {e}\n"))
+
+
+def update_instance_logs():
+    if instances_window is None or not instances_window.winfo_exists():
+        return
+    for name, pane in instance_panes.items():
+        instance = supervisor.get(name)
+        if instance is not None:
+            drain_log_into(pane['text'], instance.log, pane['max_lines'])
+    instances_window.after(LOG_POLL_MS, update_instance_logs)
+
+
+def update_instance_stats():
+    if instances_window is None or not instances_window.winfo_exists():
+        return
+    total = supervisor.aggregate()
+    instances_window.aggregate_label.config(
+        text=f"Running: {total['running']}  |  Total hashrate: {format_hashrate(total['current'])} "
+             f"(avg {format_hashrate(total['average'])})  |  Solutions: {total['solutions']}  |  "
+             f"Accepted: {total['accepted']}  |  Rejected: {total['rejected']}")
+    for name, pane in instance_panes.items():
+        instance = supervisor.get(name)
+        if instance is None:
+            continue
+        message = f"Status: {instance.status}"
+        fg_color = "red" if "Error:" in message or "Exception:" in message or "Process exited" in message else "green"
+        pane['status'].config(text=message, fg=fg_color)
+        snap = instance.telemetry.snapshot()
+        pane['stats'].config(text=f"Hashrate: {format_hashrate(snap['current'])}  |  avg {format_hashrate(snap['average'])}"
+                                  f"  |  peak {format_hashrate(snap['peak'])}  |  Solutions: {snap['solutions']}"
+                                  f"  |  Accepted: {snap['accepted']}  |  Rejected: {snap['rejected']}")
+    instances_window.after(TELEMETRY_POLL_MS, update_instance_stats)
+
+
+versions_window = None
+
+
+def open_versions_window():
+    """Cached miner versions: pin one to the current profile, prune old ones, A/B benchmark two."""
+    global versions_window
+    if versions_window is not None and versions_window.winfo_exists():
+        versions_window.lift()
+        refresh_versions()
+        return
+
+    win = tk.Toplevel(root)
+    win.title("Miner versions")
+    win.grid_columnconfigure(0, weight=1)
+    win.grid_rowconfigure(0, weight=1)
+    versions_window = win
+
+    win.listbox = tk.Listbox(win, selectmode=tk.MULTIPLE, width=60, height=10, font=('Courier', 10))
+    win.listbox.grid(row=0, column=0, columnspan=4, sticky='nsew', padx=6, pady=6)
+
+    tk.Button(win, text="Pin to profile", width=14, command=pin_selected_version).grid(row=1, column=0, sticky='w', padx=6)
+    tk.Button(win, text="Unpin (latest)", width=14, command=lambda: set_pinned_version('')).grid(row=1, column=1, padx=2)
+    tk.Button(win, text="A/B benchmark", width=14, command=start_version_benchmark).grid(row=1, column=2, padx=2)
+    tk.Button(win, text="Delete", width=14, command=delete_selected_versions).grid(row=1, column=3, padx=6)
+
+    prune_frame = tk.Frame(win)
+    prune_frame.grid(row=2, column=0, columnspan=4, sticky='w', padx=6, pady=6)
+    tk.Label(prune_frame, text="Keep newest:").grid(row=0, column=0)
+    win.keep_entry = tk.Entry(prune_frame, width=4)
+    win.keep_entry.insert(0, "3")
+    win.keep_entry.grid(row=0, column=1)
+    tk.Label(prune_frame, text="and at most (MB, empty = no limit):").grid(row=0, column=2, padx=(12, 2))
+    win.max_mb_entry = tk.Entry(prune_frame, width=6)
+    win.max_mb_entry.grid(row=0, column=3)
+    tk.Button(prune_frame, text="Prune", width=10, command=prune_cached_versions).grid(row=0, column=4, padx=6)
+    tk.Label(win, text="Pinned and running versions are never deleted. "
+                       "The benchmark uses the current Workers, mode and affinity.", fg='gray').grid(
+        row=3, column=0, columnspan=4, sticky='w', padx=6, pady=(0, 6))
+    refresh_versions()
+
+
+def refresh_versions():
+    if versions_window is None or not versions_window.winfo_exists():
+        return
+    pinned = pinned_versions()
+    running = running_versions()
+    listbox = versions_window.listbox
+    listbox.delete(0, tk.END)
+    versions_window.tags = []
+    for v in cached_versions():
+        marks = ", ".join(m for m, on in (("pinned", v['tag'] in pinned), ("running", v['tag'] in running)) if on)
+        listbox.insert(tk.END, f"{v['tag']:<12} {format_bytes(v['size']):>10}  {marks}")
+        versions_window.tags.append(v['tag'])
+
+
+def selected_versions():
+    return [versions_window.tags[i] for i in versions_window.listbox.curselection()]
+
+
+def running_versions():
+    return {instance.version for instance in supervisor.instances() if instance.active()}
+
+
+def set_pinned_version(tag):
+    miner_version_entry.delete(0, tk.END)
+    miner_version_entry.insert(0, tag)
+    if miner_version_from_path(miner_path_entry.get().strip() or '.') != 'custom':
+        miner_path_entry.delete(0, tk.END)  # a downloaded binary, not a manual path
+    profile_name = selected_profile_name.get()
+    save_config(profile_name)
+    append_output(f"[*] Profile '{profile_name}' now uses miner {tag or 'latest'}.\n")
+    refresh_versions()
+
+
+def pin_selected_version():
+    tags = selected_versions()
+    if len(tags) != 1:
+        append_output("ERROR: Select exactly one version to pin.\n")
+        return
+    set_pinned_version(tags[0])
+
+
+def delete_selected_versions():
+    protect = pinned_versions() | running_versions()
+    for tag in selected_versions():
+        if tag in protect:
+            append_output(f"[!] Not deleting miner {tag}: it is pinned or running.\n")
+            continue
+        path = next((v['path'] for v in cached_versions() if v['tag'] == tag), None)
+        if path is None:
+            continue
+        try:
+            shutil.rmtree(os.path.dirname(path))
+            append_output(f"[*] Deleted miner {tag}\n")
+        except OSError as e:
+            append_output(f"[!] Could not delete miner {tag}: {e}\n")
+    refresh_versions()
+
+
+def prune_cached_versions():
+    try:
+        keep = int(versions_window.keep_entry.get().strip()) if versions_window.keep_entry.get().strip() else None
+        max_mb = versions_window.max_mb_entry.get().strip()
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else None
+    except ValueError:
+        append_output("ERROR: Keep newest and MB must be numbers.\n")
+        return
+    removed = prune_versions(keep, max_bytes, protect=running_versions(), log_fn=append_output)
+    append_output(f"[*] Pruned {len(removed)} miner version(s).\n")
+    refresh_versions()
+
+
+def start_version_benchmark():
+    """Mine with two versions in turn and report which one is faster on this machine."""
+    global setup_cancel
+    tags = selected_versions()
+    if len(tags) != 2:
+        append_output("ERROR: Select exactly two versions to compare.\n")
+        return
+    if mining_instance is not None and mining_instance.active():
+        append_output("ERROR: Stop mining before benchmarking miner versions.\n")
+        return
+    settings = current_settings()
+    problem = check_settings(settings)
+    if problem:
+        append_output(problem[0])
+        update_mining_status(problem[1])
+        return
+
+    setup_cancel = threading.Event()
+    cancel = setup_cancel
+    mine_button.config(state=tk.DISABLED)
+    tune_button.config(state=tk.DISABLED)
+    show_progress("Benchmarking versions...")
+    update_mining_status("Status: Benchmarking miner versions")
+    append_output(f"[*] A/B benchmark of {tags[0]} vs {tags[1]}: 4 trials of {TUNE_TRIAL_SECONDS}s. "
+                  f"Press Stop or Cancel to abort.\n")
+
+    def _progress(done, total, tag):
+        text = f"Benchmark: trial {done + 1}/{total} ({tag})" if tag else "Benchmark: done"
+        task_executor.call_soon(show_progress, text, done, total)
+
+    task_executor.submit(
+        benchmark_versions, settings, tags, log_buffer.put, _progress, cancel,
+        on_done=lambda results: on_version_benchmark_done(results, cancel),
+        on_error=lambda e: on_version_benchmark_failed(e, cancel),
+    )
+
+
+def on_version_benchmark_done(results, cancel):
+    if not finish_tuning(cancel) or cancel.is_set():
+        return
+    ranked = sorted(results, key=results.get, reverse=True)
+    best, other = ranked[0], ranked[1]
+    gain = (results[best] / results[other] - 1) * 100 if results[other] else float('inf')
+    append_output(f"[+] Benchmark: {best} {format_hashrate(results[best])} vs {other} "
+                  f"{format_hashrate(results[other])} ({gain:+.1f}%). Use \"Pin to profile\" to stay on {best}.\n")
+    refresh_versions()
+
+
+def on_version_benchmark_failed(e, cancel):
+    if not finish_tuning(cancel):
+        return
+    if cancel.is_set() or isinstance(e, TaskCancelled):
+        append_output("Benchmark cancelled.\n")
+    else:
+        append_output(f"[!] Benchmark failed: {e}\n")
+
+
+# Log search window: searches the current and archived session logs on the task executor.
+log_search_window = None
+log_search_cancel = None
+
+
+def open_log_search_window():
+    global log_search_window
+    if log_search_window is not None and log_search_window.winfo_exists():
+        log_search_window.lift()
+        return
+
+    win = tk.Toplevel(root)
+    win.title("Search logs")
+    win.grid_columnconfigure(1, weight=1)
+    win.grid_rowconfigure(2, weight=1)
+    log_search_window = win
+
+    tk.Label(win, text="Text or regex:").grid(row=0, column=0, sticky='w', padx=6, pady=6)
+    win.pattern_entry = tk.Entry(win, width=40)
+    win.pattern_entry.grid(row=0, column=1, sticky='we')
+    win.pattern_entry.bind('<Return>', lambda event: start_log_search())
+    tk.Button(win, text="Search", width=12, command=start_log_search).grid(row=0, column=2, padx=6)
+
+    options = tk.Frame(win)
+    options.grid(row=1, column=0, columnspan=3, sticky='w', padx=6)
+    win.errors_only_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(options, text="Error lines only (rejected, failed, ...)", variable=win.errors_only_var).grid(row=0, column=0)
+    tk.Label(options, text="Since (YYYY-mm-dd[ HH:MM:SS]):").grid(row=0, column=1, padx=(12, 2))
+    win.since_entry = tk.Entry(options, width=20)
+    win.since_entry.grid(row=0, column=2)
+
+    win.results = tk.Text(win, bg='black', fg='white', width=110, height=24)
+    win.results.grid(row=2, column=0, columnspan=3, sticky='nsew', padx=6, pady=6)
+    win.status = tk.Label(win, text=f"Logs are kept in {session_log_dir()}", fg='gray', anchor='w')
+    win.status.grid(row=3, column=0, columnspan=3, sticky='we', padx=6, pady=(0, 6))
+    win.pattern_entry.focus_set()
+
+
+def start_log_search():
+    global log_search_cancel
+    win = log_search_window
+    pattern = win.pattern_entry.get()
+    if not pattern and not win.errors_only_var.get():
+        win.status.config(text="Enter something to search for.")
+        return
+    if log_search_cancel is not None:
+        log_search_cancel.set()
+    cancel = log_search_cancel = threading.Event()
+    win.status.config(text="Searching...")
+    task_executor.submit(
+        search_logs, pattern, win.since_entry.get().strip() or None, win.errors_only_var.get(),
+        LOG_SEARCH_LIMIT, None, cancel,
+        on_done=lambda results: show_log_search_results(results, cancel),
+        on_error=lambda e: show_log_search_results(e, cancel),
+    )
+
+
+def show_log_search_results(results, cancel):
+    win = log_search_window
+    if cancel is not log_search_cancel or win is None or not win.winfo_exists():
+        return  # superseded by a newer search, or the window is gone
+    if isinstance(results, Exception):
+        if not isinstance(results, TaskCancelled):
+            win.status.config(text=f"Search failed: {results}")
+        return
+    win.results.delete('1.0', tk.END)
+    win.results.insert(tk.END, ''.join(f"{name}:{line_no}: {line}\n" for name, line_no, line in results))
+    more = " (limit reached)" if len(results) >= LOG_SEARCH_LIMIT else ""
+    win.status.config(text=f"{len(results)} match(es){more} in {session_log_dir()}")
+
+
+def measure_tk_lag(due):
+    """How much later than asked for the event loop gets to a callback, every DIAG_TICK_MS."""
+    now = time.perf_counter()
+    diagnostics.observe('Tk event loop lag', max(0.0, now - due) * 1000)
+    root.after(DIAG_TICK_MS, measure_tk_lag, time.perf_counter() + DIAG_TICK_MS / 1000)
+
+
+# Diagnostics window: the diagnostics report, refreshed every DIAG_REFRESH_MS while it is open.
+diagnostics_window = None
+
+
+def open_diagnostics_window():
+    global diagnostics_window
+    if diagnostics_window is not None and diagnostics_window.winfo_exists():
+        diagnostics_window.lift()
+        return
+
+    win = tk.Toplevel(root)
+    win.title("Diagnostics")
+    win.grid_columnconfigure(1, weight=1)
+    win.grid_rowconfigure(0, weight=1)
+    diagnostics_window = win
+
+    win.report = tk.Text(win, width=120, height=28)
+    win.report.grid(row=0, column=0, columnspan=2, sticky='nsew', padx=6, pady=6)
+    win.capture_button = tk.Button(win, width=24, command=toggle_diagnostics_capture)
+    win.capture_button.grid(row=1, column=0, sticky='w', padx=6, pady=(0, 6))
+    win.status = tk.Label(win, text="", fg='gray', anchor='w')
+    win.status.grid(row=1, column=1, sticky='we', padx=6, pady=(0, 6))
+    update_diagnostics_window()
+
+
+def diagnostics_report():
+    """The diagnostics report with the current queue depths of this window."""
+    extra = [
+        ("Log buffer (lines waiting for the view)", log_buffer.pending()),
+        ("Task callbacks waiting for the Tk thread", task_executor.pending()),
+        ("Session log batches waiting for the writer", session_log_for('gui').pending()),
+    ]
+    return diagnostics.report(extra)
+
+
+def update_diagnostics_window():
+    win = diagnostics_window
+    if win is None or not win.winfo_exists():
+        return
+    win.report.delete('1.0', tk.END)
+    win.report.insert(tk.END, diagnostics_report())
+    win.capture_button.config(text="Stop capture and save" if diagnostics.capturing() else "Start profile capture")
+    win.after(DIAG_REFRESH_MS, update_diagnostics_window)
+
+
+def toggle_diagnostics_capture():
+    """cProfile of the Tk thread plus tracemalloc, written to the diagnostics folder when stopped."""
+    win = diagnostics_window
+    if not diagnostics.capturing():
+        diagnostics.start_capture()
+        win.status.config(text="Capturing; the GUI is a little slower meanwhile.")
+    else:
+        try:
+            path = diagnostics.stop_capture()
+        except OSError as e:
+            win.status.config(text=f"Could not write the capture: {e}")
+        else:
+            win.status.config(text=f"Saved to {path}")
+    win.capture_button.config(text="Stop capture and save" if diagnostics.capturing() else "Start profile capture")
+
+
 def update_profile_options():
     profile_names = load_profile_names()
 
@@ -511,124 +1293,332 @@ def update_profile_options():
         selected_profile_name.set("Default")
 
 
-# Create the main window
-root = tk.Tk()
-root.title("Hashcash Credits GUI miner")
-# Give the window a reasonable minimum size so the log is usable
-root.minsize(900, 600)
-# Make the main entry column expand, but also allow full-width widgets spanning all columns
-root.grid_columnconfigure(0, weight=0)
-root.grid_columnconfigure(1, weight=1)
-root.grid_columnconfigure(2, weight=0)
-
-# Customizing font
-custom_font = tkFont.Font(family="Helvetica", size=10, weight="bold")
-
-# Create and place labels, entry widgets, and the output textbox
-tk.Label(root, text="Faucet API base URL:").grid(row=0, column=0, sticky='w')
-api_url_entry = tk.Entry(root, width=50)
-api_url_entry.grid(row=0, column=1, sticky='we')
-
-# Miner executable path (auto-detects script folder by default)
-tk.Label(root, text="Miner executable (optional):").grid(row=1, column=0, sticky='w')
-miner_path_entry = tk.Entry(root, width=50)
-miner_path_entry.grid(row=1, column=1, sticky='we')
-if not miner_path_entry.get().strip():
-    dmp = default_miner_path()
-    if dmp:
-        miner_path_entry.insert(0, dmp)
-browse_button = tk.Button(root, text="Browse...", command=browse_miner_path, width=12)
-browse_button.grid(row=1, column=2, padx=6)
-
-# Private key + show toggle
-tk.Label(root, text="Private key (from the web faucet):").grid(row=2, column=0, sticky='w')
-private_key_entry = tk.Entry(root, width=50, show="*")
-private_key_entry.grid(row=2, column=1, sticky='we')
-show_key_var = tk.BooleanVar(value=False)
-show_key_cb = tk.Checkbutton(root, text="Show key", variable=show_key_var, command=toggle_show_key)
-show_key_cb.grid(row=2, column=2, padx=6)
-
-# Workers
-tk.Label(root, text="Workers (0 = auto-detect CPU cores):").grid(row=3, column=0, sticky='w')
-threads_entry = tk.Entry(root, width=5)
-threads_entry.grid(row=3, column=1, sticky='w')
-
-# Auto-download checkbox
-auto_download_var = tk.BooleanVar(value=True)
-auto_download_cb = tk.Checkbutton(root, text="Auto-download latest miner (GitHub Releases)", variable=auto_download_var)
-auto_download_cb.grid(row=4, column=0, columnspan=2, sticky='w')
-
-#
-# Extreme mode checkbox
-extreme_mode_var = tk.BooleanVar(value=False)
-extreme_mode_cb = tk.Checkbutton(
-    root,
-    text="EXTREME mode (higher difficulty but no cooldown and higher daily cap)",
-    variable=extreme_mode_var,
-)
-extreme_mode_cb.grid(row=5, column=0, columnspan=2, sticky='w')
-
-# Potato mode checkbox
-potato_mode_var = tk.BooleanVar(value=False)
-potato_mode_cb = tk.Checkbutton(
-    root,
-    text="POTATO mode (lower difficulty for low-power devices; counts toward normal daily cap; 5 min cooldown)",
-    variable=potato_mode_var,
-)
-potato_mode_cb.grid(row=6, column=0, columnspan=2, sticky='w')
+def profile_selected(*args):
+    load_config(selected_profile_name.get())
 
-tk.Label(root, text="Profile name:").grid(row=12)
-profile_name_entry = tk.Entry(root, width=20)
-profile_name_entry.grid(row=13, column=0)
 
-save_as_button = tk.Button(root, text="Save profile", command=save_config_with_name, width=20)
-save_as_button.grid(row=15, column=0)
+def create_window():
+    """Create the main window and get it on screen right away, with a placeholder until build_ui() is done."""
+    global root, startup_label
+    root = tk.Tk()
+    root.title("Hashcash Credits GUI miner")
+    # Give the window a reasonable minimum size so the log is usable
+    root.minsize(900, 600)
+    startup_label = tk.Label(root, text="Starting...", fg='gray')
+    startup_label.place(relx=0.5, rely=0.5, anchor='center')
+    root.update()
+
+
+def build_ui():
+    """Fill the main window and start the background loops. Widgets live in module globals."""
+    global custom_font, api_url_entry, miner_path_entry, browse_button, private_key_entry
+    global show_key_var, show_key_cb, threads_frame, threads_entry, affinity_entry, tuned_label, tune_button
+    global throttle_var, throttle_cb, throttle_min_entry, throttle_schedule_entry, throttle_idle_entry
+    global nice_entry, io_priority_var, cpu_quota_entry, reserve_core_var, reserve_core_cb
+    global download_frame, miner_version_entry, versions_button
+    global auto_download_var, auto_download_cb, extreme_mode_var, extreme_mode_cb, potato_mode_var, potato_mode_cb
+    global earnings_frame, earnings_var, earnings_path_entry, earnings_label
+    global advisor_frame, auto_switch_var, advisor_label, mode_advisor
+    global rotate_var, rotation_label, profile_rotator
+    global telemetry_frame, telemetry_label, sparkline_canvas, log_frame, log_max_lines_entry
+    global auto_restart_var, auto_restart_cb, stall_seconds_entry, metrics_address_entry
+    global record_var, record_cb, replay_speed_entry, replay_button
+    global profile_name_entry, save_as_button
+    global instances_button, search_logs_button, diagnostics_button, selected_profile_name, profile_option_menu, output_textbox
+    global mine_button, stop_button
+    global progress_frame, progress_label, progress_bar, cancel_button, status_label
+    global supervisor, watchdog, metrics_server, task_executor, log_buffer, telemetry
+
+    # Make the main entry column expand, but also allow full-width widgets spanning all columns
+    root.grid_columnconfigure(0, weight=0)
+    root.grid_columnconfigure(1, weight=1)
+    root.grid_columnconfigure(2, weight=0)
+
+    # Customizing font
+    custom_font = tkFont.Font(family="Helvetica", size=10, weight="bold")
+
+    # Create and place labels, entry widgets, and the output textbox
+    tk.Label(root, text="Faucet API base URL:").grid(row=0, column=0, sticky='w')
+    api_url_entry = tk.Entry(root, width=50)
+    api_url_entry.grid(row=0, column=1, sticky='we')
+
+    # Miner executable path (auto-detects script folder by default)
+    tk.Label(root, text="Miner executable (optional):").grid(row=1, column=0, sticky='w')
+    miner_path_entry = tk.Entry(root, width=50)
+    miner_path_entry.grid(row=1, column=1, sticky='we')
+    if not miner_path_entry.get().strip():
+        dmp = default_miner_path()
+        if dmp:
+            miner_path_entry.insert(0, dmp)
+    browse_button = tk.Button(root, text="Browse...", command=browse_miner_path, width=12)
+    browse_button.grid(row=1, column=2, padx=6)
+
+    # Private key + show toggle
+    tk.Label(root, text="Private key (from the web faucet):").grid(row=2, column=0, sticky='w')
+    private_key_entry = tk.Entry(root, width=50, show="*")
+    private_key_entry.grid(row=2, column=1, sticky='we')
+    show_key_var = tk.BooleanVar(value=False)
+    show_key_cb = tk.Checkbutton(root, text="Show key", variable=show_key_var, command=toggle_show_key)
+    show_key_cb.grid(row=2, column=2, padx=6)
+
+    # Workers + tuning
+    tk.Label(root, text="Workers (0 = auto-detect CPU cores):").grid(row=3, column=0, sticky='w')
+    threads_frame = tk.Frame(root)
+    threads_frame.grid(row=3, column=1, sticky='w')
+    threads_entry = tk.Entry(threads_frame, width=5)
+    threads_entry.grid(row=0, column=0, sticky='w')
+    tk.Label(threads_frame, text="CPU affinity (e.g. 0-3,6; Linux):").grid(row=0, column=1, sticky='w', padx=(12, 2))
+    affinity_entry = tk.Entry(threads_frame, width=12)
+    affinity_entry.grid(row=0, column=2, sticky='w')
+    tuned_label = tk.Label(threads_frame, text="", fg='gray')
+    tuned_label.grid(row=0, column=3, sticky='w', padx=6)
+    throttle_var = tk.BooleanVar(value=False)
+    throttle_cb = tk.Checkbutton(threads_frame, text="Throttle to load; min workers:", variable=throttle_var)
+    throttle_cb.grid(row=1, column=0, columnspan=2, sticky='w')
+    throttle_min_entry = tk.Entry(threads_frame, width=4)
+    throttle_min_entry.grid(row=1, column=2, sticky='w')
+    throttle_min_entry.insert(0, "1")
+    tk.Label(threads_frame, text="schedule (mon-fri 09:00-18:00=2):").grid(row=1, column=3, sticky='w', padx=(12, 2))
+    throttle_schedule_entry = tk.Entry(threads_frame, width=24)
+    throttle_schedule_entry.grid(row=1, column=4, sticky='w')
+    tk.Label(threads_frame, text="idle after (s, 0 = off):").grid(row=1, column=5, sticky='w', padx=(12, 2))
+    throttle_idle_entry = tk.Entry(threads_frame, width=6)
+    throttle_idle_entry.grid(row=1, column=6, sticky='w')
+    throttle_idle_entry.insert(0, "0")
+    tk.Label(threads_frame, text="Priority (nice 0-19):").grid(row=2, column=0, columnspan=2, sticky='w')
+    nice_entry = tk.Entry(threads_frame, width=4)
+    nice_entry.grid(row=2, column=2, sticky='w')
+    tk.Label(threads_frame, text="I/O priority:").grid(row=2, column=3, sticky='w', padx=(12, 2))
+    io_priority_var = tk.StringVar(value='normal')
+    tk.OptionMenu(threads_frame, io_priority_var, *IO_PRIORITIES).grid(row=2, column=4, sticky='w')
+    tk.Label(threads_frame, text="CPU quota (%):").grid(row=2, column=5, sticky='w', padx=(12, 2))
+    cpu_quota_entry = tk.Entry(threads_frame, width=6)
+    cpu_quota_entry.grid(row=2, column=6, sticky='w')
+    reserve_core_var = tk.BooleanVar(value=False)
+    reserve_core_cb = tk.Checkbutton(threads_frame, text="Keep a core for the GUI", variable=reserve_core_var)
+    reserve_core_cb.grid(row=2, column=7, sticky='w', padx=(12, 0))
+    tune_button = tk.Button(root, text="Tune", command=start_tuning, width=12)
+    tune_button.grid(row=3, column=2, padx=6)
+
+    # Auto-download checkbox + pinned miner version
+    download_frame = tk.Frame(root)
+    download_frame.grid(row=4, column=0, columnspan=2, sticky='w')
+    auto_download_var = tk.BooleanVar(value=True)
+    auto_download_cb = tk.Checkbutton(download_frame, text="Auto-download latest miner (GitHub Releases)",
+                                      variable=auto_download_var)
+    auto_download_cb.grid(row=0, column=0, sticky='w')
+    tk.Label(download_frame, text="Pinned version (empty = latest):").grid(row=0, column=1, sticky='w', padx=(12, 2))
+    miner_version_entry = tk.Entry(download_frame, width=10)
+    miner_version_entry.grid(row=0, column=2, sticky='w')
+    versions_button = tk.Button(root, text="Versions...", command=open_versions_window, width=12)
+    versions_button.grid(row=4, column=2, padx=6)
+
+    #
+    # Extreme mode checkbox
+    extreme_mode_var = tk.BooleanVar(value=False)
+    extreme_mode_cb = tk.Checkbutton(
+        root,
+        text="EXTREME mode (higher difficulty but no cooldown and higher daily cap)",
+        variable=extreme_mode_var,
+    )
+    extreme_mode_cb.grid(row=5, column=0, columnspan=2, sticky='w')
+
+    # Potato mode checkbox
+    potato_mode_var = tk.BooleanVar(value=False)
+    potato_mode_cb = tk.Checkbutton(
+        root,
+        text="POTATO mode (lower difficulty for low-power devices; counts toward normal daily cap; 5 min cooldown)",
+        variable=potato_mode_var,
+    )
+    potato_mode_cb.grid(row=6, column=0, columnspan=2, sticky='w')
+
+    # Hashrate telemetry: stats + sparkline
+    telemetry_frame = tk.Frame(root)
+    telemetry_frame.grid(row=8, column=0, columnspan=3, sticky='we', padx=6)
+    telemetry_frame.grid_columnconfigure(0, weight=1)
+    telemetry_label = tk.Label(telemetry_frame, text="Hashrate: -", anchor='w')
+    telemetry_label.grid(row=0, column=0, sticky='we')
+    sparkline_canvas = tk.Canvas(telemetry_frame, width=240, height=32, bg='black', highlightthickness=0)
+    sparkline_canvas.grid(row=0, column=1, padx=6, pady=2)
+    earnings_frame = tk.Frame(telemetry_frame)
+    earnings_frame.grid(row=1, column=0, columnspan=2, sticky='we')
+    earnings_frame.grid_columnconfigure(3, weight=1)
+    earnings_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(earnings_frame, text="Show earnings (polls the faucet every few minutes), API path:",
+                   variable=earnings_var).grid(row=0, column=0, sticky='w')
+    earnings_path_entry = tk.Entry(earnings_frame, width=12)
+    earnings_path_entry.grid(row=0, column=1, sticky='w')
+    earnings_path_entry.insert(0, FAUCET_DEFAULT_PATH)
+    earnings_label = tk.Label(earnings_frame, text="", anchor='w')
+    earnings_label.grid(row=0, column=3, sticky='we', padx=6)
+    advisor_frame = tk.Frame(telemetry_frame)
+    advisor_frame.grid(row=2, column=0, columnspan=2, sticky='we')
+    advisor_frame.grid_columnconfigure(1, weight=1)
+    auto_switch_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(advisor_frame, text="Auto-switch mode at daily cap", variable=auto_switch_var).grid(
+        row=0, column=0, sticky='w')
+    advisor_label = tk.Label(advisor_frame, text="", anchor='w', fg='gray')
+    advisor_label.grid(row=0, column=1, sticky='we', padx=6)
+    rotate_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(advisor_frame, text="Rotate profiles on cooldown / daily cap", variable=rotate_var).grid(
+        row=1, column=0, sticky='w')
+    rotation_label = tk.Label(advisor_frame, text="", anchor='w', fg='gray')
+    rotation_label.grid(row=1, column=1, sticky='we', padx=6)
+
+    # Log view size + watchdog
+    tk.Label(root, text="Max log lines:").grid(row=7, column=0, sticky='w')
+    log_frame = tk.Frame(root)
+    log_frame.grid(row=7, column=1, columnspan=2, sticky='w')
+    log_max_lines_entry = tk.Entry(log_frame, width=8)
+    log_max_lines_entry.grid(row=0, column=0, sticky='w')
+    log_max_lines_entry.insert(0, str(DEFAULT_LOG_MAX_LINES))
+    auto_restart_var = tk.BooleanVar(value=True)
+    auto_restart_cb = tk.Checkbutton(log_frame, text="Auto-restart on crash/stall; stall after (s, 0 = off):",
+                                     variable=auto_restart_var)
+    auto_restart_cb.grid(row=0, column=1, sticky='w', padx=(12, 2))
+    stall_seconds_entry = tk.Entry(log_frame, width=6)
+    stall_seconds_entry.grid(row=0, column=2, sticky='w')
+    stall_seconds_entry.insert(0, str(DEFAULT_STALL_SECONDS))
+    tk.Label(log_frame, text="Metrics (host:port, empty = off):").grid(row=0, column=3, sticky='w', padx=(12, 2))
+    metrics_address_entry = tk.Entry(log_frame, width=16)
+    metrics_address_entry.grid(row=0, column=4, sticky='w')
+    record_var = tk.BooleanVar(value=False)
+    record_cb = tk.Checkbutton(log_frame, text="Record miner output (for replay)", variable=record_var)
+    record_cb.grid(row=1, column=1, sticky='w', padx=(12, 2))
+    tk.Label(log_frame, text="Replay speed (x, 0 = max):").grid(row=1, column=3, sticky='w', padx=(12, 2))
+    replay_speed_entry = tk.Entry(log_frame, width=6)
+    replay_speed_entry.grid(row=1, column=4, sticky='w')
+    replay_speed_entry.insert(0, "1")
+    replay_button = tk.Button(root, text="Replay...", command=start_replay, width=12)
+    replay_button.grid(row=6, column=2, padx=6)
+    diagnostics_button = tk.Button(root, text="Diagnostics...", command=open_diagnostics_window, width=12)
+    diagnostics_button.grid(row=5, column=2, padx=6)
+
+    tk.Label(root, text="Profile name:").grid(row=12)
+    profile_name_entry = tk.Entry(root, width=20)
+    profile_name_entry.grid(row=13, column=0)
+
+    save_as_button = tk.Button(root, text="Save profile", command=save_config_with_name, width=20)
+    save_as_button.grid(row=15, column=0)
+
+    instances_button = tk.Button(root, text="Instances...", command=open_instances_window, width=20)
+    instances_button.grid(row=15, column=1)
+
+    search_logs_button = tk.Button(root, text="Search logs...", command=open_log_search_window, width=12)
+    search_logs_button.grid(row=15, column=2)
+
+    selected_profile_name = tk.StringVar(root)
 
-selected_profile_name = tk.StringVar(root)
+    profile_names = load_profile_names()
 
-profile_names = load_profile_names()
+    if profile_names:
+        selected_profile_name.set(profile_names[0])
+    else:
+        selected_profile_name.set("Default")
 
-if profile_names:
-    selected_profile_name.set(profile_names[0])
-else:
-    selected_profile_name.set("Default")
+    tk.Label(root, text="Select existing profile:").grid(row=12, column=1)
 
-tk.Label(root, text="Select existing profile:").grid(row=12, column=1)
+    profile_option_menu = tk.OptionMenu(root, selected_profile_name, *profile_names)
+    profile_option_menu.grid(row=13, column=1)
 
-profile_option_menu = tk.OptionMenu(root, selected_profile_name, *profile_names)
-profile_option_menu.grid(row=13, column=1)
+    selected_profile_name.trace("w", profile_selected)
 
+    output_textbox = tk.Text(root, bg='black', fg='white')
+    configure_log_tags(output_textbox)
+    # Full width (all columns) and expandable
+    output_textbox.grid(row=11, column=0, columnspan=3, sticky='nsew', padx=6, pady=6)
 
-def profile_selected(*args):
+    # Allow the log box row to expand when resizing the window
+    root.grid_rowconfigure(11, weight=1)
+
+    # Create and place the "mine" button with custom color and font
+    mine_button = tk.Button(root, text="Mine", command=start_mining, bg="green", font=custom_font, height=2)
+    mine_button.grid(row=9, column=0, columnspan=2, sticky='we', padx=6, pady=6)
+
+    # Create and place the "Stop" button with custom color and font
+    stop_button = tk.Button(root, text="Stop", command=stop_mining, bg="red", font=custom_font, height=2)
+    stop_button.grid(row=9, column=2, columnspan=1, sticky='we', padx=6, pady=6)
+
+    # Progress indicator for background setup work (hidden while idle)
+    progress_frame = tk.Frame(root)
+    progress_frame.grid(row=10, column=0, columnspan=3, sticky='we', padx=6)
+    progress_frame.grid_columnconfigure(1, weight=1)
+    progress_label = tk.Label(progress_frame, text="")
+    progress_label.grid(row=0, column=0, sticky='w')
+    progress_bar = ttk.Progressbar(progress_frame, mode='determinate')
+    progress_bar.grid(row=0, column=1, sticky='we', padx=6)
+    cancel_button = tk.Button(progress_frame, text="Cancel", command=cancel_setup, width=12)
+    cancel_button.grid(row=0, column=2)
+    progress_frame.grid_remove()
+
+    # Status label
+    status_label = tk.Label(root, text="Status: Not Mining", font=custom_font)
+    status_label.grid(row=16, column=0, columnspan=3)
+
+    # Load the configuration at startup
     load_config(selected_profile_name.get())
+    startup_label.destroy()
+    startup_trace.mark('widgets and config')
+
+    # All miner instances of this GUI (main window + Instances window)
+    supervisor = Supervisor()
+
+    # Per-mode solve/cooldown times and credits/hour estimates (normal / EXTREME / POTATO)
+    mode_advisor = ModeAdvisor()
+
+    # When each rotating profile may mine again (cooldowns, daily caps)
+    profile_rotator = ProfileRotator()
 
+    # Restarts stalled/crashed miners of profiles with auto-restart enabled, switches modes at the daily cap
+    # and rotates profiles
+    watchdog = Watchdog(supervisor, advisor=mode_advisor, rotator=profile_rotator)
+    watchdog.start()
 
-selected_profile_name.trace("w", profile_selected)
+    # Background work (download, verification, cancel/stop) runs here; results come back via root.after
+    task_executor = TaskExecutor(root)
 
+    # Shared buffer between the miner reader thread and the log view, drained every LOG_POLL_MS
+    log_buffer = LogBuffer(log_max_lines(), sink=session_log_for('gui').write_lines)
+    update_output_textbox()
+
+    # Optional Prometheus endpoint over all instances; (re)bound to the profile's address on Mine
+    metrics_server = MetricsServer(supervisor)
+    try:
+        metrics_server.serve(parse_metrics_address(metrics_address_entry.get()), log_buffer.put)
+    except ValueError:
+        pass
 
-output_textbox = tk.Text(root, bg='black', fg='white')
-# Full width (all columns) and expandable
-output_textbox.grid(row=11, column=0, columnspan=3, sticky='nsew', padx=6, pady=6)
+    # Parsed hashrate/result counters of the running miner
+    telemetry = MinerTelemetry()
+    update_telemetry_view()
+    update_earnings_view()
+    measure_tk_lag(time.perf_counter())
 
-# Allow the log box row to expand when resizing the window
-root.grid_rowconfigure(11, weight=1)
+    root.protocol("WM_DELETE_WINDOW", on_closing)
+    startup_trace.mark('background services')
 
-# Create and place the "mine" button with custom color and font
-mine_button = tk.Button(root, text="Mine", command=start_mining, bg="green", font=custom_font, height=2)
-mine_button.grid(row=9, column=0, columnspan=2, sticky='we', padx=6, pady=6)
 
-# Create and place the "Stop" button with custom color and font
-stop_button = tk.Button(root, text="Stop", command=stop_mining, bg="red", font=custom_font, height=2)
-stop_button.grid(row=9, column=2, columnspan=1, sticky='we', padx=6, pady=6)
+def startup_done():
+    """First idle moment of the event loop: the window is drawn and usable."""
+    startup_trace.mark('first idle')
+    startup_trace.report()
 
-# Status label
-status_label = tk.Label(root, text="Status: Not Mining", font=custom_font)
-status_label.grid(row=16, column=0, columnspan=3)
 
-# Load the configuration at startup
-load_config(selected_profile_name.get())
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if '--headless' in argv:
+        return hcc_core.main(argv)
+    global startup_trace
+    startup_trace = StartupTrace('--startup-trace' in argv, _started)
+    startup_trace.mark('imports')
+    create_window()
+    startup_trace.mark('window shown')
+    build_ui()
+    root.after_idle(startup_done)
+    # Start the GUI event loop
+    root.mainloop()
+    return 0
 
-root.protocol("WM_DELETE_WINDOW", on_closing)
 
-# Start the GUI event loop
-root.mainloop()
+if __name__ == '__main__':
+    sys.exit(main())